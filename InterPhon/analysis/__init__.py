@@ -1,18 +1,25 @@
 """
 InterPhon analysis sub-package.
 
-This sub-package consists of following four modules:
+This sub-package consists of following seven modules:
 
 dos.py -> dos class to analyze density of states.
 band.py -> band to analyze dispersion relation.
 mode.py -> mode class to analyze vibrational motions.
 thermal_properties.py -> thermal property class to analyze thermodynamic properties such as vibrational entropy.
+convergence.py -> dos convergence class to find the converged k-point grid of density of states.
+projection.py -> projection group class to project density of states and band onto groups of atoms.
+quasi_harmonic.py -> quasi-harmonic class to analyze thermodynamic properties over strained cells.
 """
 
-from .dos import DOS
+from .projection import ProjectionGroup
+from .dos import DOS, DOSAccumulator
 from .band import Band
 from .mode import Mode
-from .thermal_properties import ThermalProperty
+from .thermal_properties import ThermalProperty, DOSThermalProperty
+from .convergence import DOSConvergence
+from .quasi_harmonic import QuasiHarmonic
 
-__all__ = ["dos", "band", "mode", "thermal_properties",
-           "DOS", "Band", "Mode", "ThermalProperty"]
+__all__ = ["dos", "band", "mode", "thermal_properties", "convergence", "projection", "quasi_harmonic",
+           "DOS", "DOSAccumulator", "Band", "Mode", "ThermalProperty", "DOSThermalProperty", "DOSConvergence", "ProjectionGroup",
+           "QuasiHarmonic"]
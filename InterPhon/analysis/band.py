@@ -1,4 +1,8 @@
 import numpy as np
+from InterPhon.analysis.projection import ProjectionGroup
+from InterPhon.analysis.dos import window_band
+from InterPhon.util import branch_collection, save_figure
+from InterPhon.inout.results import write_band_dat
 
 
 class Band(object):
@@ -11,8 +15,15 @@ class Band(object):
 
     :param process: Instance of PostProcess class
     :type process: :class:`core.PostProcess`
+    :param window: Frequency window (unit: THz) of the branches to be analyzed (if None: all the branches), defaults to None
+    :type window: List[float]
+    :param cartesian: Measure the k-point path in Cartesian reciprocal space (unit: 1/Angstrom) (`True`)
+                      or in the unit of reciprocal lattice vectors (`False`), defaults to `False`
+    :type cartesian: bool
     """
-    def __init__(self, process):
+    def __init__(self, process,
+                 window=None,
+                 cartesian: bool = False):
         """
         Constructor of Band class.
         """
@@ -22,45 +33,97 @@ class Band(object):
                                      len(self.process.unit_cell.xyz_true),
                                      len(self.process.unit_cell.xyz_true)), dtype=float)
         self.ind_high_sym = [0]
+        self.group = ProjectionGroup(self.process.unit_cell)
+        self.window = window
+        self.cartesian = cartesian
+        self.w_q = self.process.w_q
+        self.order = None
+        self.ind_band = np.arange(len(self.process.unit_cell.xyz_true))
 
     def set(self):
         """
         Set the k-point path connecting the high-symmetry points and corresponding eigen-frequency, w(k).
+        Only the branches in the window (**self.ind_band**) are projected.
         """
-        for ind, kpt in enumerate(self.process.k_points[1:], 1):
-            self.k_points_length[ind] = self.k_points_length[ind - 1] \
-                                        + np.sqrt(np.dot(self.process.k_points[ind] - self.process.k_points[ind - 1],
-                                                         self.process.k_points[ind] - self.process.k_points[ind - 1]))
-
-            if np.allclose(self.process.k_points[ind], self.process.k_points[ind - 1]):
-                self.ind_high_sym.append(ind)
-        self.ind_high_sym.append(ind)
-
-        for ind_kpt, eig_freqs in enumerate(self.process.w_q):
-            for ind_freq, _ in enumerate(eig_freqs):
-                for ind_mode, _ in enumerate(self.process.unit_cell.xyz_true):
-                    self.projected_w[ind_kpt, ind_freq, ind_mode] = \
-                        1 * (abs(self.process.v_q[ind_kpt, ind_freq, ind_mode]) ** 2)
-
-    def write(self, out_folder: str = '.'):
+        _k_points = np.array(self.process.k_points, dtype=float).reshape((-1, 3))
+        if self.cartesian:
+            _k_points = np.dot(_k_points, self.process.reciprocal_matrix)
+        self.k_points_length = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(_k_points, axis=0), axis=1))))
+
+        # The high-symmetry points are repeated at the junction of line segments.
+        _junction = np.all(np.isclose(_k_points[1:], _k_points[:-1]), axis=1).nonzero()[0] + 1
+        self.ind_high_sym = [0] + _junction.tolist() + [_k_points.shape[0] - 1]
+
+        _band = window_band(self.process.w_q, self.window)
+        self.ind_band = np.arange(self.process.w_q.shape[1])[_band]
+        self.w_q = self.process.w_q
+        self.order = None
+
+        # |v| ** 2 of the whole eigen-mode in the window, accumulated in place without complex temporaries.
+        self.projected_w = np.zeros(self.process.v_q.shape, dtype=float)
+        np.square(self.process.v_q[:, _band, :].real, out=self.projected_w[:, _band, :])
+        self.projected_w[:, _band, :] += np.square(self.process.v_q[:, _band, :].imag)
+
+    def set_connection(self, chunk_size: int = 2 ** 20):
         """
-        Write phonon Band in the file name of **band.dat**.
+        Connect the branches along the k-point path by eigen-mode, instead of the order of eigen-frequency at each k-point.
+        The branches of neighbouring k-points are assigned to each other by the overlap of eigen-mode, |<v_i(k - 1)|v_j(k)>| ** 2,
+        for all the pairs of neighbouring k-points at once: each branch takes the branch of its largest overlap,
+        and the conflicts are resolved by the greedy assignment of the largest remaining overlap,
+        so that the branches cross each other without exchanging their labels.
+        The index of eigen-frequency for each connected branch is set in **self.order**,
+        and the reordered eigen-frequency (**self.w_q**) and projection (**self.projected_w**) are used for write and plot.
+
+        :param chunk_size: The number of overlap elements to be evaluated at once, defaults to 2 ** 20
+        :type chunk_size: int
+        """
+        num_k_points, num_mode = self.process.w_q.shape
+        _block = max(1, chunk_size // (num_mode * num_mode))
+
+        _assign = np.empty((num_k_points - 1, num_mode), dtype=int)
+        for start in range(0, num_k_points - 1, _block):
+            _end = min(start + _block, num_k_points - 1)
+            _v_prev = self.process.v_q[start:_end, :, :]
+            _v_next = self.process.v_q[start + 1:_end + 1, :, :]
+            _assign[start:_end, :] = _assign_branch(abs(np.einsum('kbi,kci->kbc', _v_prev.conj(), _v_next)) ** 2)
+
+        # The connected branch follows the assignment from the first k-point.
+        self.order = np.empty((num_k_points, num_mode), dtype=int)
+        self.order[0, :] = np.arange(num_mode)
+        for ind in range(1, num_k_points):
+            self.order[ind, :] = _assign[ind - 1, self.order[ind - 1, :]]
+
+        _ind_k = np.arange(num_k_points)[:, np.newaxis]
+        self.w_q = self.process.w_q[_ind_k, self.order]
+        if self.window is not None:
+            self.ind_band = np.nonzero((self.w_q.max(axis=0) >= self.window[0]) & (self.w_q.min(axis=0) <= self.window[1]))[0]
+
+        _v_q = self.process.v_q[_ind_k, self.order[:, self.ind_band], :]
+        self.projected_w = np.zeros(self.process.v_q.shape, dtype=float)
+        self.projected_w[:, self.ind_band, :] = _v_q.real ** 2 + _v_q.imag ** 2
+
+    def group_projected_w(self, atom_sets) -> np.ndarray:
+        """
+        Projection of eigen-mode onto the given groups of atoms defined in **self.group**.
+
+        :param atom_sets: List of the name of group or the Index of atoms
+        :type atom_sets: List[str or List[int]]
+        :return: '(num_k_points, num_mode, num_group) size' projection for each group
+        :rtype: np.ndarray[float]
+        """
+        return np.dot(self.projected_w, self.group.matrix(atom_sets).T)
+
+    def write(self, out_folder: str = '.', compress: bool = False):
+        """
+        Write phonon Band in the file name of **band.dat** (or **band.dat.gz**).
 
         :param out_folder: Folder path for **band.dat** to be stored, defaults to .
         :type out_folder: str
+        :param compress: Write in gzip-compressed file (True) or not (False), defaults to False
+        :type compress: bool
         """
-        with open(out_folder + '/band.dat', 'w') as outfile:
-            comment = "Phonon Band"
-            outfile.write("%s" % comment + '\n')
-            outfile.write("%s" %
-                          '    K_Points_Path' +
-                          '    Frequency (THz)' + '\n')
-
-            for x, y_set in zip(self.k_points_length, self.process.w_q):
-                line = ' %16.9f ' % x
-                for y in y_set:
-                    line = line + ' %16.9f ' % y
-                outfile.write("%s" % line + '\n')
+        write_band_dat(out_folder, self.k_points_length, self.w_q[:, self.ind_band],
+                       cartesian=self.cartesian, compress=compress)
 
     def plot(self,
              k_labels=[],
@@ -70,13 +133,15 @@ class Band(object):
              option='plain',
              cmap='jet',
              colorbar_label=None,
-             colorbar_location='right'):
+             colorbar_location='right',
+             out_file='band.png',
+             show=True):
         """
-        Plot phonon Band in the file name of **band.png**.
+        Plot phonon Band in the file of out_file (defaults to **band.png**).
 
         :param k_labels: The label of high-symmetry k-points, defaults to []
         :type k_labels: List[str]
-        :param atoms: The Index of atoms to be projected in Band plot, defaults to None
+        :param atoms: The Index of atoms (or the name of group in self.group) to be projected in Band plot, defaults to None
         :type atoms: List[int]
         :param elimit: Energy (unit: THz) limitation of Band plot, defaults to None
         :type elimit: List[int]
@@ -90,6 +155,10 @@ class Band(object):
         :type colorbar_label: str
         :param colorbar_location: Location of colorbar, defaults to right
         :type colorbar_location: str
+        :param out_file: Path of the figure file, defaults to band.png
+        :type out_file: str
+        :param show: Show the figure on interactive backend (True) or not (False), defaults to `True`
+        :type show: bool
         """
 
         from matplotlib import pyplot as plt
@@ -102,7 +171,10 @@ class Band(object):
         font_bar = {'size': 24, 'color': 'black'}
         font_bar_title = {'family': 'Arial', 'size': 30, 'color': 'black', 'weight': 'bold'}
 
-        if elimit is None:
+        if elimit is None and self.window is not None:
+            y_min = self.window[0]
+            y_max = self.window[1]
+        elif elimit is None:
             y_min = np.floor(self.process.w_q.min()) - 1
             y_max = np.ceil(self.process.w_q.max()) + 1
         else:
@@ -131,7 +203,7 @@ class Band(object):
 
         if option == 'plain':
             ax = fig.subplots()
-            ax.plot(self.k_points_length, self.process.w_q, color=color, linewidth=2)
+            ax.add_collection(branch_collection(self.k_points_length, self.w_q[:, self.ind_band], color=color, linewidth=2))
 
             # ax.set_xlabel('K-points', fontdict=font_x)
             ax.set_xlim(self.k_points_length[0], self.k_points_length[-1])
@@ -149,44 +221,27 @@ class Band(object):
             ax.grid(True)
 
             fig.tight_layout()
-            plt.savefig('band.png', dpi=300, format='png', bbox_inches='tight')
-            plt.show()
+            save_figure(fig, out_file, show=show)
 
         elif option == 'projection':
-            from matplotlib.collections import LineCollection
-
-            _projected_w = np.zeros((len(self.process.k_points),
-                                     len(self.process.unit_cell.xyz_true),
-                                     1))
             try:
-                ind_modes = [ind for ind, val in enumerate(self.process.unit_cell.xyz_true) if val in atoms]
-                for ind_mode in ind_modes:
-                    _projected_w[:, :, 0] += self.projected_w[:, :, ind_mode]
-            except TypeError:
+                _projected_w = self.group_projected_w([atoms])
+            except (TypeError, KeyError):
                 print("\nFail to identify the index of atoms='{0}'".format(atoms))
                 print("Please designate the 'atoms' parameter for which band will be projected\n")
                 raise
 
             if colorbar_location == 'right':
                 ax = fig.subplots()
-                for ind_freq in range(self.process.w_q.shape[1]):
-                    _x = self.k_points_length
-                    _y = self.process.w_q[:, ind_freq]
-
-                    points = np.array([_x, _y]).T.reshape(-1, 1, 2)
-                    segments = np.concatenate([points[:-1], points[1:]], axis=1)
-
-                    norm = plt.Normalize(vmin=0, vmax=1)
-                    lc = LineCollection(segments, cmap=cmap, norm=norm)
-                    lc.set_array(_projected_w[:, ind_freq, 0])
-                    lc.set_linewidth(2)
-                    line = ax.add_collection(lc)
+                line = ax.add_collection(branch_collection(self.k_points_length, self.w_q[:, self.ind_band],
+                                                           array=_projected_w[:, self.ind_band, 0],
+                                                           cmap=cmap, norm=plt.Normalize(vmin=0, vmax=1), linewidth=2))
 
                 cbar = fig.colorbar(line, ax=ax, extend='max', ticks=[0, 0.2, 0.4, 0.6, 0.8, 1])
                 cbar.ax.set_yticklabels([0, 0.2, 0.4, 0.6, 0.8, 1], fontdict=font_bar)
 
                 if colorbar_label is None:
-                    label = 'Contribution of atom-{0}'.format(set(atoms))
+                    label = 'Contribution of {0}'.format(self.group.label(atoms))
                 else:
                     label = 'Contribution of {0}'.format(colorbar_label)
 
@@ -194,25 +249,16 @@ class Band(object):
 
             elif colorbar_location == 'bottom':
                 ax, cax = fig.subplots(nrows=2, gridspec_kw={"height_ratios": [1, 0.05]})
-                for ind_freq in range(self.process.w_q.shape[1]):
-                    _x = self.k_points_length
-                    _y = self.process.w_q[:, ind_freq]
-
-                    points = np.array([_x, _y]).T.reshape(-1, 1, 2)
-                    segments = np.concatenate([points[:-1], points[1:]], axis=1)
-
-                    norm = plt.Normalize(vmin=0, vmax=1)
-                    lc = LineCollection(segments, cmap=cmap, norm=norm)
-                    lc.set_array(_projected_w[:, ind_freq, 0])
-                    lc.set_linewidth(2)
-                    line = ax.add_collection(lc)
+                line = ax.add_collection(branch_collection(self.k_points_length, self.w_q[:, self.ind_band],
+                                                           array=_projected_w[:, self.ind_band, 0],
+                                                           cmap=cmap, norm=plt.Normalize(vmin=0, vmax=1), linewidth=2))
 
                 cbar = fig.colorbar(line, cax=cax, extend='max', ticks=[0, 0.2, 0.4, 0.6, 0.8, 1],
                                     orientation="horizontal")
                 cbar.cax.set_xticklabels([0, 0.2, 0.4, 0.6, 0.8, 1], fontdict=font_bar)
 
                 if colorbar_label is None:
-                    label = 'Contribution of atom-{0}'.format(set(atoms))
+                    label = 'Contribution of {0}'.format(self.group.label(atoms))
                 else:
                     label = 'Contribution of {0}'.format(colorbar_label)
 
@@ -234,8 +280,7 @@ class Band(object):
             ax.grid(True)
 
             fig.tight_layout()
-            plt.savefig('band.png', dpi=300, format='png', bbox_inches='tight')
-            plt.show()
+            save_figure(fig, out_file, show=show)
 
     def plot_with_dos(self,
                       k_labels=[],
@@ -254,13 +299,15 @@ class Band(object):
                       bulk_dos=None,
                       bulk_option='fill',
                       bulk_legend=None,
-                      proportion=1.0):
+                      proportion=1.0,
+                      out_file='band_dos.png',
+                      show=True):
         """
-        Plot phonon Band with associated DOS in the file name of **band_dos.png**.
+        Plot phonon Band with associated DOS in the file of out_file (defaults to **band_dos.png**).
 
         :param k_labels: The label of high-symmetry k-points, defaults to []
         :type k_labels: List[str]
-        :param band_atoms: The Index of atoms to be projected in Band plot, defaults to None
+        :param band_atoms: The Index of atoms (or the name of group in self.group) to be projected in Band plot, defaults to None
         :type band_atoms: List[int]
         :param elimit: Energy (unit: THz) limitation of Band plot, defaults to None
         :type elimit: List[int]
@@ -274,7 +321,7 @@ class Band(object):
         :type colorbar_label: str
         :param dos_object: Instance of DOS class, defaults to None
         :type dos_object: :class:`analysis.dos`
-        :param dos_atoms: The Index of atoms to be projected in DOS plot, defaults to None
+        :param dos_atoms: The Index of atoms (or the name of group in dos_object.group) to be projected in DOS plot, defaults to None
         :type dos_atoms: List[int]
         :param dos_color: The color of total DOS line, defaults to tab:orange
         :type dos_color: str
@@ -292,6 +339,10 @@ class Band(object):
         :type bulk_legend: str
         :param proportion: Constant to be multiplied to bulk DOS, defaults to 1.0
         :type proportion: float
+        :param out_file: Path of the figure file, defaults to band_dos.png
+        :type out_file: str
+        :param show: Show the figure on interactive backend (True) or not (False), defaults to `True`
+        :type show: bool
         """
 
         from matplotlib import pyplot as plt
@@ -303,7 +354,10 @@ class Band(object):
         self.process.num_figure = self.process.num_figure + 1
         fig = plt.figure(self.process.num_figure, (14, 9))
 
-        if elimit is None:
+        if elimit is None and self.window is not None:
+            y_min = self.window[0]
+            y_max = self.window[1]
+        elif elimit is None:
             y_min = np.floor(self.process.w_q.min()) - 1
             y_max = np.ceil(self.process.w_q.max()) + 1
         else:
@@ -334,7 +388,8 @@ class Band(object):
                                              gridspec_kw={"width_ratios": [7, 3]},
                                              sharey=True)
 
-            ax_band.plot(self.k_points_length, self.process.w_q, color=band_color, linewidth=2)
+            ax_band.add_collection(branch_collection(self.k_points_length, self.w_q[:, self.ind_band],
+                                                     color=band_color, linewidth=2))
 
             ax_band.yaxis.set_ticks_position('both')
 
@@ -354,7 +409,6 @@ class Band(object):
             ax_band.grid(True)
 
         elif band_option == 'projection':
-            from matplotlib.collections import LineCollection
             from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 
             font_y = {'family': 'Arial', 'size': 36, 'color': 'black', 'weight': 'bold'}
@@ -366,32 +420,16 @@ class Band(object):
                                              gridspec_kw={"width_ratios": [7, 3]},
                                              sharey=True)
 
-            _projected_w = np.zeros((len(self.process.k_points),
-                                     len(self.process.unit_cell.xyz_true),
-                                     1))
             try:
-                ind_modes = [ind for ind, val in enumerate(self.process.unit_cell.xyz_true) if val in band_atoms]
-                for ind_mode in ind_modes:
-                    _projected_w[:, :, 0] += self.projected_w[:, :, ind_mode]
-            except TypeError:
+                _projected_w = self.group_projected_w([band_atoms])
+            except (TypeError, KeyError):
                 print("\nFail to identify the index of atoms='{0}'".format(band_atoms))
                 print("Please designate the 'atoms' parameter for which band will be projected\n")
                 raise
 
-            for ind_freq in range(self.process.w_q.shape[1]):
-                _x = self.k_points_length
-                _y = self.process.w_q[:, ind_freq]
-
-                points = np.array([_x, _y]).T.reshape(-1, 1, 2)
-                segments = np.concatenate([points[:-1], points[1:]], axis=1)
-
-                norm = plt.Normalize(vmin=0, vmax=1)
-
-                lc = LineCollection(segments, cmap=cmap, norm=norm)
-                lc.set_array(_projected_w[:, ind_freq, 0])
-                lc.set_linewidth(2)
-
-                line = ax_band.add_collection(lc)
+            line = ax_band.add_collection(branch_collection(self.k_points_length, self.w_q[:, self.ind_band],
+                                                            array=_projected_w[:, self.ind_band, 0],
+                                                            cmap=cmap, norm=plt.Normalize(vmin=0, vmax=1), linewidth=2))
 
             # fig.subplots_adjust(bottom=0.1)
             # cbar_ax = fig.add_axes([0.1, 0.02, 0.6, 0.06])
@@ -404,7 +442,7 @@ class Band(object):
             cbar.ax.set_xticklabels([0, 0.2, 0.4, 0.6, 0.8, 1], fontdict=font_bar)
 
             if colorbar_label is None:
-                label = 'Contribution of atom-{0}'.format(set(band_atoms))
+                label = 'Contribution of {0}'.format(self.group.label(band_atoms))
             else:
                 label = 'Contribution of {0}'.format(colorbar_label)
 
@@ -469,22 +507,16 @@ class Band(object):
             ax_dos.plot(dos_object.tdos, dos_object.freq, color=dos_color, label='total dos', linewidth=4)
             ax_dos.yaxis.set_ticks_position('both')
 
-            __pdos = np.zeros((len(dos_atoms), dos_object.freq.shape[0]))
-            ind_modes = []
             try:
-                for ind_set, atom_set in enumerate(dos_atoms):
-                    ind_modes.append([ind for ind, val in enumerate(self.process.unit_cell.xyz_true)
-                                      if val in atom_set])
-                    for ind_mode in ind_modes[ind_set]:
-                        __pdos[ind_set, :] += dos_object.pdos[ind_mode, :]
-            except TypeError:
+                __pdos = dos_object.group_pdos(dos_atoms)
+            except (TypeError, KeyError):
                 print("\nFail to identify the index of atoms='{0}'".format(dos_atoms))
                 print("Please designate the 'atoms' parameter for which DOS will be projected\n")
                 raise
 
             for ind_set, _pdos_ in enumerate(__pdos):
                 if dos_legends is None:
-                    label = 'atom-{0}'.format(set(dos_atoms[ind_set]))
+                    label = dos_object.group.label(dos_atoms[ind_set])
                 else:
                     label = dos_legends[ind_set]
 
@@ -513,15 +545,9 @@ class Band(object):
             ax_dos.plot(dos_object.tdos, dos_object.freq, color=dos_color, label='total dos', linewidth=4)
             ax_dos.yaxis.set_ticks_position('both')
 
-            __pdos = np.zeros((len(dos_atoms), dos_object.freq.shape[0]))
-            ind_modes = []
             try:
-                for ind_set, atom_set in enumerate(dos_atoms):
-                    ind_modes.append([ind for ind, val in enumerate(self.process.unit_cell.xyz_true)
-                                      if val in atom_set])
-                    for ind_mode in ind_modes[ind_set]:
-                        __pdos[ind_set, :] += dos_object.pdos[ind_mode, :]
-            except TypeError:
+                __pdos = dos_object.group_pdos(dos_atoms)
+            except (TypeError, KeyError):
                 print("\nFail to identify the index of atoms='{0}'".format(dos_atoms))
                 print("Please designate the 'atoms' parameter for which DOS will be projected\n")
                 raise
@@ -530,7 +556,7 @@ class Band(object):
             x_data = np.cumsum(__pdos, axis=0)
             for ind, atom in enumerate(dos_atoms):
                 if dos_legends is None:
-                    labels.append('atom-{0}'.format(set(atom)))
+                    labels.append(dos_object.group.label(atom))
                 else:
                     labels.append(dos_legends[ind])
 
@@ -543,5 +569,34 @@ class Band(object):
             ax_dos.legend(loc=legend_location, fontsize='xx-large')
 
         # fig.tight_layout()
-        plt.savefig('band_dos.png', dpi=300, format='png', bbox_inches='tight')
-        plt.show()
+        save_figure(fig, out_file, show=show)
+
+
+def _assign_branch(_overlap: np.ndarray) -> np.ndarray:
+    """
+    Batched assignment of the branches of a k-point to those of the next k-point by their overlap.
+    The branch of the largest overlap is taken for each branch, which is the optimal assignment if they are all distinct.
+    Otherwise, the conflicting k-points are resolved by the greedy assignment of the largest remaining overlap,
+    i.e., the pairs are assigned one by one for all the conflicting k-points at once, which is not guaranteed to be optimal.
+
+    :param _overlap: '(num_k_points, num_mode, num_mode) size' overlap between the branches of a k-point (row) and the next (column)
+    :type _overlap: np.ndarray[float]
+    :return: '(num_k_points, num_mode) size' branch of the next k-point assigned to each branch
+    :rtype: np.ndarray[int]
+    """
+    num_mode = _overlap.shape[1]
+    _assign = np.argmax(_overlap, axis=2)
+
+    _sorted = np.sort(_assign, axis=1)
+    _conflict = np.any(_sorted[:, 1:] == _sorted[:, :-1], axis=1).nonzero()[0]
+    if _conflict.shape[0] == 0:
+        return _assign
+
+    __overlap = _overlap[_conflict, :, :].copy()
+    _batch = np.arange(_conflict.shape[0])
+    for _ in range(num_mode):
+        _row, _col = np.divmod(np.argmax(__overlap.reshape((_conflict.shape[0], -1)), axis=1), num_mode)
+        _assign[_conflict, _row] = _col
+        __overlap[_batch, _row, :] = -1.0
+        __overlap[_batch, :, _col] = -1.0
+    return _assign
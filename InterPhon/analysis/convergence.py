@@ -0,0 +1,167 @@
+import time
+import numpy as np
+from InterPhon.util import k_points
+from InterPhon.analysis import DOS, ThermalProperty
+
+
+class DOSConvergence(object):
+    """
+    DOSConvergence class to find the converged k-point grid of phonon DOS.
+    Its instance variables contain an instance of :class:`core.PostProcess` class storing the information on force constant.
+    Starting from the given Gamma-centered grid, the number of k-points along each periodic direction is doubled at each level,
+    so that the grid of a level contains all the k-points of the previous level.
+    Only the newly added k-points are evaluated by :class:`core.PostProcess.eval_phonon`,
+    and the eigen-frequency and eigen-mode of the others are reused from the previous level.
+    The levels are stepped until the change of total DOS and free energy falls below the given thresholds,
+    and the cost and error at each level are written using the :class:`analysis.DOSConvergence.write` method.
+
+    :param process: Instance of PostProcess class
+    :type process: :class:`core.PostProcess`
+    :param num_k_points: '(3,) size' the number of k-points of the initial grid, defaults to [4, 4, 4] (1 along the non-periodic direction)
+    :type num_k_points: List[int]
+    :param sigma: Sigma of gaussian smearing (if 0.0: tetrahedron method is used instead), defaults to 0.1
+    :type sigma: float
+    :param num_dos: The number of DOS points, defaults to 200
+    :type num_dos: int
+    :param temp: Temperature (unit: K) where free energy is compared, defaults to 300
+    :type temp: float
+    :param dos_tol: Threshold of the relative change of total DOS, defaults to 0.01
+    :type dos_tol: float
+    :param free_energy_tol: Threshold of the change of free energy (unit: eV/atom), defaults to 0.001
+    :type free_energy_tol: float
+    :param max_level: The maximum number of levels, defaults to 4
+    :type max_level: int
+    """
+    def __init__(self, process,
+                 num_k_points=None,
+                 sigma: float = 0.1,
+                 num_dos: int = 200,
+                 temp: float = 300,
+                 dos_tol: float = 0.01,
+                 free_energy_tol: float = 0.001,
+                 max_level: int = 4):
+        """
+        Constructor of DOSConvergence class.
+        """
+        self.process = process
+        self.sigma = sigma
+        self.num_dos = num_dos
+        self.temp = temp
+        self.dos_tol = dos_tol
+        self.free_energy_tol = free_energy_tol
+        self.max_level = max_level
+
+        self._ind_pbc = self.process.user_arg.periodicity.nonzero()[0]
+        if num_k_points is None:
+            num_k_points = [4, 4, 4]
+        self.num_k_points = [int(num_k_points[ind]) if ind in self._ind_pbc else 1 for ind in range(3)]
+
+        self.grid = []
+        self.num_total = []
+        self.num_new = []
+        self.time = []
+        self.dos_error = []
+        self.free_energy = []
+        self.free_energy_error = []
+        self.converged = False
+        self.dos = None
+
+    def set(self):
+        """
+        Step through the nested grids until convergence,
+        leaving the eigen-frequency and eigen-mode of the last grid in the instance of PostProcess class.
+        """
+        _grid = list(self.num_k_points)
+        _w_q, _v_q, _dyn_matrix = None, None, None
+        _prev_freq, _prev_tdos = None, None
+
+        for level in range(self.max_level):
+            _k_points, _ = k_points.gamma_centered(['', '', 'Gamma', '{0} {1} {2}'.format(*_grid), '0 0 0'],
+                                                   self._ind_pbc)
+            _ind_grid = np.indices(_grid).reshape((3, -1))
+
+            # The k-points with even indices along all the periodic directions were evaluated at the previous level.
+            if _w_q is None:
+                _is_new = np.ones((len(_k_points),), dtype=bool)
+            else:
+                _is_new = np.any(_ind_grid % 2 == 1, axis=0)
+                _prev_grid = [(num + 1) // 2 for num in _grid]
+                _ind_prev = ((_ind_grid[0] // 2) * _prev_grid[1] + _ind_grid[1] // 2) * _prev_grid[2] + _ind_grid[2] // 2
+
+            __start = time.perf_counter()
+            self.process.k_points = [_k_points[ind] for ind in _is_new.nonzero()[0]]
+            self.process.eval_phonon()
+            __time = time.perf_counter() - __start
+
+            __w_q = np.empty((len(_k_points), self.process.w_q.shape[1]), dtype=float)
+            __v_q = np.empty((len(_k_points),) + self.process.v_q.shape[1:], dtype=complex)
+            __dyn_matrix = np.empty((len(_k_points),) + self.process.dyn_matrix.shape[1:], dtype=complex)
+            __w_q[_is_new], __v_q[_is_new], __dyn_matrix[_is_new] = \
+                self.process.w_q, self.process.v_q, self.process.dyn_matrix
+            if _w_q is not None:
+                __w_q[~_is_new], __v_q[~_is_new], __dyn_matrix[~_is_new] = \
+                    _w_q[_ind_prev[~_is_new]], _v_q[_ind_prev[~_is_new]], _dyn_matrix[_ind_prev[~_is_new]]
+            _w_q, _v_q, _dyn_matrix = __w_q, __v_q, __dyn_matrix
+
+            self.process.k_points = _k_points
+            self.process.auto_k_points = list(_grid)
+            self.process.w_q, self.process.v_q, self.process.dyn_matrix = _w_q, _v_q, _dyn_matrix
+
+            self.dos = DOS(self.process, sigma=self.sigma, num_dos=self.num_dos)
+            self.dos.set()
+            thermal = ThermalProperty(self.process, temp=[self.temp])
+            thermal.set()
+
+            self.grid.append(list(_grid))
+            self.num_total.append(len(_k_points))
+            self.num_new.append(int(np.count_nonzero(_is_new)))
+            self.time.append(__time)
+            self.free_energy.append(thermal.free_energy[0])
+
+            if _prev_tdos is None:
+                self.dos_error.append(np.nan)
+                self.free_energy_error.append(np.nan)
+            else:
+                # Relative L1 change of total DOS with respect to the previous level on the current frequency points
+                __tdos = np.interp(self.dos.freq, _prev_freq, _prev_tdos, left=0.0, right=0.0)
+                self.dos_error.append(np.trapz(abs(self.dos.tdos - __tdos), self.dos.freq)
+                                      / np.trapz(abs(self.dos.tdos), self.dos.freq))
+                self.free_energy_error.append(abs(self.free_energy[-1] - self.free_energy[-2]))
+
+                if self.dos_error[-1] < self.dos_tol and self.free_energy_error[-1] < self.free_energy_tol:
+                    self.converged = True
+                    break
+
+            if self._ind_pbc.shape[0] == 0:
+                break
+
+            _prev_freq, _prev_tdos = self.dos.freq, self.dos.tdos
+            _grid = [2 * num if ind in self._ind_pbc else 1 for ind, num in enumerate(_grid)]
+
+    def write(self, out_folder='.'):
+        """
+        Write the cost and error at each level in the file name of **dos_convergence.dat**.
+
+        :param out_folder: Folder path for **dos_convergence.dat** to be stored, defaults to .
+        :type out_folder: str
+        """
+        with open(out_folder + '/dos_convergence.dat', 'w') as outfile:
+            if self.converged:
+                comment = "Phonon DOS converged at the grid of {0}".format(self.grid[-1])
+            else:
+                comment = "Phonon DOS not converged until the grid of {0}".format(self.grid[-1])
+            outfile.write("%s" % comment + '\n')
+            outfile.write("%s" %
+                          '      Grid      ' +
+                          '   Total_k-points' +
+                          '     New_k-points' +
+                          '         Time (s)' +
+                          '        DOS_error' +
+                          '    Free_energy (eV/atom)' +
+                          '    Free_energy_error (eV/atom)' + '\n')
+
+            for ind, grid in enumerate(self.grid):
+                line = ' %4d %4d %4d ' % tuple(grid) + ' %15d ' % self.num_total[ind] + ' %15d ' % self.num_new[ind] \
+                       + ' %15.3f ' % self.time[ind] + ' %15.9f ' % self.dos_error[ind] \
+                       + ' %23.9f ' % self.free_energy[ind] + ' %29.9f ' % self.free_energy_error[ind]
+                outfile.write("%s" % line + '\n')
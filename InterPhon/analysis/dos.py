@@ -1,5 +1,34 @@
 import numpy as np
-from InterPhon.util import tetrahedron_1d, tetrahedron_2d, tetrahedron_3d
+from InterPhon.analysis.projection import ProjectionGroup
+from InterPhon.util import tetrahedron_1d, tetrahedron_2d, tetrahedron_3d, tetrahedron_parallel
+from InterPhon.util import spectral_bound, chebyshev_moment, kpm_density
+from InterPhon.util import save_figure
+from InterPhon.inout.results import write_dos_dat
+
+
+def window_band(w_q: np.ndarray,
+                window=None,
+                margin: float = 0.0) -> slice:
+    """
+    Phonon branches whose eigen-frequencies reach the frequency window extended by the margin.
+    Eigen-frequencies are sorted at each k-point, so that the branches are contiguous.
+
+    :param w_q: '(num_k_points, num_mode) size' eigen-frequency
+    :type w_q: np.ndarray[float]
+    :param window: Frequency window (unit: THz) (if None: all the branches), defaults to None
+    :type window: List[float]
+    :param margin: Extension (unit: THz) of the window at both sides, defaults to 0.0
+    :type margin: float
+    :return: Slice of the branches
+    :rtype: slice
+    """
+    if window is None:
+        return slice(0, w_q.shape[1])
+
+    _ind_band = np.nonzero((w_q.max(axis=0) >= window[0] - margin) & (w_q.min(axis=0) <= window[1] + margin))[0]
+    if _ind_band.shape[0] == 0:
+        return slice(0, 0)
+    return slice(_ind_band[0], _ind_band[-1] + 1)
 
 
 class DOS(object):
@@ -16,24 +45,55 @@ class DOS(object):
     :type sigma: float
     :param num_dos: The number of DOS points, defaults to 200
     :type num_dos: int
+    :param cutoff: Truncation range of gaussian smearing in the unit of sigma (if None: no truncation), defaults to None
+    :type cutoff: float
+    :param num_process: The number of processes for tetrahedron method over phonon branches (if None: the number of CPUs), defaults to 1
+    :type num_process: int
+    :param axes: Custom axes ({name: '(3,) size' cartesian vector}) onto which DOS is projected, defaults to None
+    :type axes: dict
+    :param window: Frequency window (unit: THz) where the DOS points are placed (if None: the whole range of eigen-frequency), defaults to None
+    :type window: List[float]
+    :param adaptive: Prefactor of adaptive gaussian smearing, where sigma of each eigen-frequency is set from its group velocity
+                     and the spacing of k-point grid (if None: the same sigma for all eigen-frequencies), defaults to None
+    :type adaptive: float
     """
     def __init__(self, process,
                  sigma: float = 0.1,
-                 num_dos: int = 200):
+                 num_dos: int = 200,
+                 cutoff: float = None,
+                 num_process: int = 1,
+                 axes: dict = None,
+                 window=None,
+                 adaptive: float = None):
         """
         Constructor of DOS class.
         """
         self.process = process
         self.sigma = sigma
         self.num_dos = num_dos
-
-        _minimum_freq = np.min(self.process.w_q)
-        _maximum_freq = np.max(self.process.w_q)
-
-        self._freq = np.arange(_minimum_freq - 2, _maximum_freq + 2,
-                               (_maximum_freq - _minimum_freq + 4) / self.num_dos)
+        self.cutoff = cutoff
+        self.num_process = num_process
+        self.axes = axes
+        self.window = window
+        self.adaptive = adaptive
+
+        if self.window is None and self.process.w_q.size == 0:
+            # Eigen-frequencies are not evaluated, and the frequency points are set by :class:`analysis.DOS.set_kpm`.
+            self._freq = np.empty((0,))
+        elif self.window is None:
+            _minimum_freq = np.min(self.process.w_q)
+            _maximum_freq = np.max(self.process.w_q)
+
+            self._freq = np.arange(_minimum_freq - 2, _maximum_freq + 2,
+                                   (_maximum_freq - _minimum_freq + 4) / self.num_dos)
+        else:
+            # All the DOS points are concentrated in the window.
+            self._freq = np.arange(self.window[0], self.window[1], (self.window[1] - self.window[0]) / self.num_dos)
         self._pdos = np.zeros((len(self.process.unit_cell.xyz_true), self._freq.shape[0]))
         self._tdos = np.empty((self._freq.shape[0],))
+        self._method = None
+        self._projection = None
+        self.group = ProjectionGroup(self.process.unit_cell)
 
     @property
     def freq(self):
@@ -47,103 +107,397 @@ class DOS(object):
     def tdos(self):
         return self._tdos
 
+    @property
+    def projection(self):
+        return self._projection
+
     def set(self):
         """
         Set the frequency points and corresponding density of states, n(w).
+        The projections onto atoms, directions, and axes are set together in **self.projection**.
         """
-        if self.sigma == 0.0:
+        # The magnitudes of eigen-mode projected onto custom axes are integrated as additional modes in the same pass.
+        _v_q, _axes = self._set_axis_weight()
+        _pdos = np.zeros((_v_q.shape[2], self._freq.shape[0]))
+
+        # The branches which do not contribute to the DOS points in the window are skipped.
+        if self.adaptive is not None:
+            _sigma_q = self._set_adaptive_sigma()
+            _band = window_band(self.process.w_q, self.window, margin=8.0 * _sigma_q.max())
+        elif self.sigma == 0.0:
+            _band = window_band(self.process.w_q, self.window)
+        elif self.cutoff is not None:
+            _band = window_band(self.process.w_q, self.window, margin=self.cutoff * self.sigma)
+        else:
+            _band = window_band(self.process.w_q, self.window, margin=8.0 * self.sigma)
+        _w_q = self.process.w_q[:, _band]
+        _v_q = _v_q[:, _band, :]
+
+        if self.adaptive is not None:
+            # Gaussian Smearing Method with sigma adapted to each eigen-frequency for Brillouin zone integration
+            _pdos = self._set_adaptive_gaussian(_w_q, _v_q, _sigma_q[:, _band])
+
+        elif self.sigma == 0.0:
             # Linear Tetrahedron Method for Brillouin zone integration
             _ind_pbc = self.process.user_arg.periodicity.nonzero()[0]
             if _ind_pbc.shape[0] == 0:
                 self._freq = self.process.w_q[0, :]
                 self._tdos = np.ones(self._freq.shape[0])
+                return
 
             elif _ind_pbc.shape[0] == 1:
-                self._pdos = tetrahedron_1d(self._freq,
-                                            self._pdos,
-                                            self.process.k_points,
-                                            self.process.w_q,
-                                            self.process.v_q,
-                                            self.process.auto_k_points,
-                                            _ind_pbc)
-                self._tdos = self._pdos.sum(axis=0)
+                _pdos = tetrahedron_parallel(tetrahedron_1d,
+                                             self._freq,
+                                             _pdos,
+                                             self.process.k_points,
+                                             _w_q,
+                                             _v_q,
+                                             self.process.auto_k_points,
+                                             _ind_pbc,
+                                             num_process=self.num_process)
 
             elif _ind_pbc.shape[0] == 2:
-                self._pdos = tetrahedron_2d(self._freq,
-                                            self._pdos,
-                                            self.process.k_points,
-                                            self.process.w_q,
-                                            self.process.v_q,
-                                            self.process.auto_k_points,
-                                            _ind_pbc)
-                self._tdos = self._pdos.sum(axis=0)
+                _pdos = tetrahedron_parallel(tetrahedron_2d,
+                                             self._freq,
+                                             _pdos,
+                                             self.process.k_points,
+                                             _w_q,
+                                             _v_q,
+                                             self.process.auto_k_points,
+                                             _ind_pbc,
+                                             num_process=self.num_process)
 
             elif _ind_pbc.shape[0] == 3:
-                self._pdos = tetrahedron_3d(self._freq,
-                                            self._pdos,
-                                            self.process.k_points,
-                                            self.process.w_q,
-                                            self.process.v_q,
-                                            self.process.auto_k_points,
-                                            _ind_pbc)
-                self._tdos = self._pdos.sum(axis=0)
+                _pdos = tetrahedron_parallel(tetrahedron_3d,
+                                             self._freq,
+                                             _pdos,
+                                             self.process.k_points,
+                                             _w_q,
+                                             _v_q,
+                                             self.process.auto_k_points,
+                                             _ind_pbc,
+                                             num_process=self.num_process)
+
+        elif self.cutoff is not None:
+            # Gaussian Smearing Method truncated at (cutoff * sigma) for Brillouin zone integration
+            _pdos = self._set_truncated_gaussian(_w_q, _v_q)
 
         else:
             # Gaussian Smearing Method for Brillouin zone integration
-            for eig_freqs, eig_modes in zip(self.process.w_q, self.process.v_q):
+            for eig_freqs, eig_modes in zip(_w_q, _v_q):
                 for ind_freq, eig_freq in enumerate(eig_freqs):
-                    for ind_mode, _ in enumerate(self.process.unit_cell.xyz_true):
-                        self._pdos[ind_mode, :] = self._pdos[ind_mode, :] \
+                    for ind_mode in range(_pdos.shape[0]):
+                        _pdos[ind_mode, :] = _pdos[ind_mode, :] \
                                         + 1 / (self.sigma * np.sqrt(2 * np.pi)) \
                                         * np.exp(- (self._freq - eig_freq) ** 2 / (2 * self.sigma ** 2)) \
                                         / len(self.process.k_points) \
                                         * (abs(eig_modes[ind_freq, ind_mode]) ** 2)
 
-            self._tdos = self._pdos.sum(axis=0)
+        self._pdos = _pdos[:len(self.process.unit_cell.xyz_true), :]
+        self._tdos = self._pdos.sum(axis=0)
+        self._set_projection(_pdos[len(self.process.unit_cell.xyz_true):, :], _axes)
 
-    def write(self, out_folder='.'):
+    def _set_axis_weight(self) -> tuple:
+        """
+        Eigen-mode extended by the magnitude of each atomic displacement projected onto the custom axes,
+        i.e., |n · v_atom|, whose square is integrated in the same way as |v| ** 2 of each Cartesian component.
+        The out-of-plane axis (normal to the two periodic lattice vectors) is added to the custom axes for 2D periodic systems.
+        The axes along a Cartesian direction reuse the corresponding component without extension.
+
+        :return: A set of '(num_k_points, num_mode, num_mode + extension) size' eigen-mode
+                 and list of (name, Cartesian direction (or None), index of the first extended column) for each axis
+        :rtype: tuple
         """
-        Write total and projected DOSs in the file name of **total_dos.dat** and **projected_dos.dat**, respectively.
+        _axes = [(name, np.asarray(axis, dtype=float)) for name, axis in (self.axes or {}).items()]
+
+        _ind_pbc = self.process.user_arg.periodicity.nonzero()[0]
+        if _ind_pbc.shape[0] == 2 and hasattr(self.process.unit_cell, 'lattice_matrix'):
+            _axes.append(('out-of-plane', np.cross(self.process.unit_cell.lattice_matrix[_ind_pbc[0]],
+                                                   self.process.unit_cell.lattice_matrix[_ind_pbc[1]])))
+
+        num_mode = len(self.process.unit_cell.xyz_true)
+        _extension = []
+        _info = []
+        for name, axis in _axes:
+            axis = axis / np.linalg.norm(axis)
+            if np.count_nonzero(abs(axis) > 1e-12) == 1:
+                _info.append((name, int(np.argmax(abs(axis))), None))
+            else:
+                _info.append((name, None, num_mode + len(_extension) * (num_mode // 3)))
+                _extension.append(abs(np.dot(self.process.v_q.reshape(self.process.v_q.shape[:2] + (num_mode // 3, 3)),
+                                             axis)))
 
-        :param out_folder: Folder path for **total_dos.dat** and **projected_dos.dat** to be stored, defaults to .
-        :type out_folder: str
+        if len(_extension) == 0:
+            return self.process.v_q, _info
+        return np.concatenate([abs(self.process.v_q)] + _extension, axis=2), _info
+
+    def _set_projection(self, _pdos_axis: np.ndarray,
+                        _axes: list) -> None:
+        """
+        Set the structured array of projected DOS (**self.projection**) with the following fields:
+        'freq', 'total', 'x', 'y', 'z', (custom axes), ('in-plane' for 2D periodic systems),
+        and 'atom-XXX', 'atom-XXX-x', 'atom-XXX-y', 'atom-XXX-z', (atom-XXX-custom axes), ('atom-XXX-in-plane') for each atom.
+
+        :param _pdos_axis: '(extension, num_dos) size' partial DOS of the extended columns
+        :type _pdos_axis: np.ndarray[float]
+        :param _axes: List of (name, Cartesian direction (or None), index of the first extended column) for each axis
+        :type _axes: list
+        """
+        _atoms = self.process.unit_cell.xyz_true[::3]
+        _pdos_atom = self._pdos.reshape((len(_atoms), 3, self._freq.shape[0]))
+
+        _fields = {'freq': self._freq, 'total': self._tdos}
+        _fields_atom = {}
+        for ind_atom, atom in enumerate(_atoms):
+            _fields_atom['atom-{0:0>3}'.format(atom)] = _pdos_atom[ind_atom].sum(axis=0)
+            for direction, name in enumerate(('x', 'y', 'z')):
+                _fields_atom['atom-{0:0>3}-{1}'.format(atom, name)] = _pdos_atom[ind_atom, direction]
+
+        for direction, name in enumerate(('x', 'y', 'z')):
+            _fields[name] = _pdos_atom[:, direction].sum(axis=0)
+
+        for name, direction, column in _axes:
+            if direction is not None:
+                __pdos = _pdos_atom[:, direction]
+            else:
+                __pdos = _pdos_axis[column - self._pdos.shape[0]:column - self._pdos.shape[0] + len(_atoms)]
+
+            _fields[name] = __pdos.sum(axis=0)
+            for ind_atom, atom in enumerate(_atoms):
+                _fields_atom['atom-{0:0>3}-{1}'.format(atom, name)] = __pdos[ind_atom]
+
+            if name == 'out-of-plane':
+                _fields['in-plane'] = self._tdos - _fields[name]
+                for ind_atom, atom in enumerate(_atoms):
+                    _fields_atom['atom-{0:0>3}-in-plane'.format(atom)] = _pdos_atom[ind_atom].sum(axis=0) - __pdos[ind_atom]
+
+        _fields.update(_fields_atom)
+        self._projection = np.zeros(self._freq.shape, dtype=[(name, float) for name in _fields])
+        for name, value in _fields.items():
+            self._projection[name] = value
+
+    def _set_truncated_gaussian(self, _w_q: np.ndarray = None,
+                                _v_q: np.ndarray = None,
+                                chunk_size: int = 4096) -> np.ndarray:
+        """
+        Gaussian smearing evaluated only on the frequency points within (cutoff * sigma) of each eigen-frequency.
+        Each eigen-frequency is mapped to its nearest frequency point, and the gaussian is evaluated
+        on the precomputed offsets around that point, i.e., (num_eig * num_offset) times instead of (num_eig * num_dos).
+        The contributions of each chunk are accumulated by np.bincount for each column of eigen-mode,
+        which adds (num_chunk * num_column * num_dos) to the cost, small for the chunk of many eigen-frequencies.
+
+        :param _w_q: '(num_k_points, num_band) size' eigen-frequency (if None: self.process.w_q), defaults to None
+        :type _w_q: np.ndarray
+        :param _v_q: '(num_k_points, num_band, num_column) size' eigen-mode (if None: self.process.v_q), defaults to None
+        :type _v_q: np.ndarray
+        :param chunk_size: The number of eigen-frequencies to be accumulated at once, defaults to 4096
+        :type chunk_size: int
+        :return: '(num_column, num_dos) size' partial DOS for each column of eigen-mode
+        :rtype: np.ndarray[float]
+        """
+        if _w_q is None:
+            _w_q = self.process.w_q
+        if _v_q is None:
+            _v_q = self.process.v_q
+        _pdos = np.zeros((_v_q.shape[2], self._freq.shape[0]))
+        num_dos = self._freq.shape[0]
+        num_mode = _pdos.shape[0]
+        _step = self._freq[1] - self._freq[0]
+
+        _offset = np.arange(-int(np.ceil(self.cutoff * self.sigma / _step)),
+                            int(np.ceil(self.cutoff * self.sigma / _step)) + 1)
+        _eig_freqs = _w_q.reshape(-1)
+        _weights = (abs(_v_q) ** 2).reshape((-1, num_mode))
+
+        for start in range(0, _eig_freqs.shape[0], chunk_size):
+            __eig_freq = _eig_freqs[start:start + chunk_size]
+            __weight = _weights[start:start + chunk_size, :]
+
+            _center = np.rint((__eig_freq - self._freq[0]) / _step).astype(int)
+            _ind_x = _center[:, np.newaxis] + _offset[np.newaxis, :]
+            _inside = (_ind_x >= 0) & (_ind_x < num_dos)
+            _ind_x = np.clip(_ind_x, 0, num_dos - 1)
+
+            _gaussian = 1 / (self.sigma * np.sqrt(2 * np.pi)) \
+                * np.exp(- (self._freq[_ind_x] - __eig_freq[:, np.newaxis]) ** 2 / (2 * self.sigma ** 2)) \
+                * (abs(self._freq[_ind_x] - __eig_freq[:, np.newaxis]) <= self.cutoff * self.sigma) \
+                * _inside / len(self.process.k_points)
+
+            for ind_mode in range(num_mode):
+                _pdos[ind_mode, :] += np.bincount(_ind_x.reshape(-1),
+                                                  weights=(_gaussian * __weight[:, ind_mode, np.newaxis]).reshape(-1),
+                                                  minlength=num_dos)
+
+        return _pdos
+
+    def _set_adaptive_sigma(self) -> np.ndarray:
+        """
+        Sigma of gaussian smearing for each eigen-frequency, adaptive * sqrt(sum_i (v · dq_i) ** 2),
+        from the group velocity v and the spacing dq_i of k-point grid along each periodic direction,
+        i.e., the variation of eigen-frequency across a grid cell.
+        Sigma is bounded below by the fixed sigma (or the spacing of DOS points if the fixed sigma is 0.0)
+        for flat branches and the k-points of vanishing group velocity.
+
+        :return: '(num_k_points, num_mode) size' sigma of gaussian smearing
+        :rtype: np.ndarray[float]
+        """
+        if self.process.g_q.shape[:2] != self.process.w_q.shape:
+            self.process.eval_group_velocity()
+
+        _ind_pbc = self.process.user_arg.periodicity.nonzero()[0]
+        _sigma_min = max(self.sigma, self._freq[1] - self._freq[0])
+        if len(self.process.auto_k_points) == 0:
+            print("\nCaution: adaptive smearing requires the automatic grid of k-points, "
+                  "and the fixed sigma of %f is used instead" % _sigma_min)
+            return np.full(self.process.w_q.shape, _sigma_min)
+
+        _dq = self.process.reciprocal_matrix[_ind_pbc, :] \
+            / np.array(self.process.auto_k_points, dtype=float)[_ind_pbc, np.newaxis]
+        _sigma_q = self.adaptive * np.sqrt(np.sum(np.dot(self.process.g_q, _dq.T) ** 2, axis=2))
+        return np.maximum(_sigma_q, _sigma_min)
+
+    def _set_adaptive_gaussian(self, _w_q: np.ndarray,
+                               _v_q: np.ndarray,
+                               _sigma_q: np.ndarray,
+                               chunk_size: int = 1024) -> np.ndarray:
+        """
+        Gaussian smearing with the sigma given for each eigen-frequency.
+
+        :param _w_q: '(num_k_points, num_band) size' eigen-frequency
+        :type _w_q: np.ndarray
+        :param _v_q: '(num_k_points, num_band, num_column) size' eigen-mode
+        :type _v_q: np.ndarray
+        :param _sigma_q: '(num_k_points, num_band) size' sigma of gaussian smearing
+        :type _sigma_q: np.ndarray
+        :param chunk_size: The number of eigen-frequencies to be smeared at once, defaults to 1024
+        :type chunk_size: int
+        :return: '(num_column, num_dos) size' partial DOS for each column of eigen-mode
+        :rtype: np.ndarray[float]
+        """
+        _pdos = np.zeros((_v_q.shape[2], self._freq.shape[0]))
+        _eig_freqs = _w_q.reshape(-1)
+        _sigmas = _sigma_q.reshape(-1)
+        _weights = (abs(_v_q) ** 2).reshape((-1, _v_q.shape[2]))
+
+        for start in range(0, _eig_freqs.shape[0], chunk_size):
+            __eig_freq = _eig_freqs[start:start + chunk_size, np.newaxis]
+            __sigma = _sigmas[start:start + chunk_size, np.newaxis]
+
+            _gaussian = 1 / (__sigma * np.sqrt(2 * np.pi)) \
+                * np.exp(- (self._freq - __eig_freq) ** 2 / (2 * __sigma ** 2)) / len(self.process.k_points)
+            _pdos += np.dot(_weights[start:start + chunk_size, :].T, _gaussian)
+
+        return _pdos
+
+    def group_pdos(self, atom_sets) -> np.ndarray:
         """
-        with open(out_folder + '/total_dos.dat', 'w') as outfile:
-            if self.sigma == 0.0:
-                comment = "Total phonon DOS by Linear Tetrahedron Method"
-                outfile.write("%s" % comment + '\n')
+        Partial DOS projected onto the given groups of atoms defined in **self.group**.
 
-            elif self.sigma != 0.0:
-                comment = "Total phonon DOS by Gaussian Smearing with Sigma = %f" % self.sigma
-                outfile.write("%s" % comment + '\n')
+        :param atom_sets: List of the name of group or the Index of atoms
+        :type atom_sets: List[str or List[int]]
+        :return: '(num_group, num_dos) size' partial DOS for each group
+        :rtype: np.ndarray[float]
+        """
+        return np.dot(self.group.matrix(atom_sets), self._pdos)
 
-            outfile.write("%s" %
-                          '    Frequency (THz)' +
-                          '    Total_Density_of_State' + '\n')
+    def set_accumulator(self, accumulator):
+        """
+        Set the frequency points and corresponding density of states, n(w), from the histogram of :class:`analysis.DOSAccumulator`,
+        instead of the eigen-frequency and eigen-mode stored in the instance of PostProcess class.
+        The histogram is convoluted with gaussian of the given sigma (if 0.0: histogram itself).
+        Only the projections onto atoms and Cartesian directions are available from the histogram.
 
-            for x, y in zip(self._freq, self._tdos):
-                line = ' %16.9f ' % x + ' %16.9f ' % y
-                outfile.write("%s" % line + '\n')
+        :param accumulator: Instance of DOSAccumulator class
+        :type accumulator: :class:`analysis.DOSAccumulator`
+        """
+        self._method = 'histogram'
+        self._freq = accumulator.freq
+        self._pdos = accumulator.pdos(sigma=self.sigma)
+        self._tdos = self._pdos.sum(axis=0)
+        self._set_projection(np.zeros((0, self._freq.shape[0])), [])
+
+    def set_kpm(self, num_moment: int = 200,
+                num_vector: int = 16,
+                seed: int = None):
+        """
+        Set the frequency points and corresponding density of states, n(w), by stochastic kernel polynomial method,
+        which requires only the matrix-vector products with dynamical matrix D(q) instead of its full diagonalization.
+        D(q) is built from force constant at each k-point by :class:`core.PostProcess.dynamical_matrix`,
+        so that :class:`core.PostProcess.eval_phonon` can be skipped for large systems (then, window is required or
+        the frequency points are spread over the spectral bounds of D(q)).
+        The spectral density of eigenvalue, lambda = sign(w) * (2 * pi * w) ** 2, is converted into n(w) by |d lambda / dw|.
+        The resolution is controlled by num_moment, and the stochastic error decreases as 1 / sqrt(num_vector).
+        Only the projections onto atoms and Cartesian directions are available.
+
+        :param num_moment: The number of Chebyshev moments, defaults to 200
+        :type num_moment: int
+        :param num_vector: The number of random phase vectors for stochastic trace, defaults to 16
+        :type num_vector: int
+        :param seed: Seed of random phase vectors, defaults to None
+        :type seed: int
+        """
+        self._method = 'kpm'
+        _rng = np.random.default_rng(seed)
+
+        _moments = []
+        _bounds = []
+        for k_point in self.process.k_points:
+            _dyn_matrix = self.process.dynamical_matrix(k_point)
+            _bounds.append(spectral_bound(_dyn_matrix))
+            _moments.append(chebyshev_moment(_dyn_matrix, _bounds[-1], num_moment=num_moment,
+                                             num_vector=num_vector, rng=_rng))
+
+        _unit = 2 * np.pi * 10 ** 12  # THz
+        if self._freq.shape[0] == 0:
+            _lower = min(bound[0] for bound in _bounds)
+            _upper = max(bound[1] for bound in _bounds)
+            _minimum_freq = np.sign(_lower) * np.sqrt(abs(_lower)) / _unit
+            _maximum_freq = np.sign(_upper) * np.sqrt(abs(_upper)) / _unit
+            self._freq = np.arange(_minimum_freq, _maximum_freq, (_maximum_freq - _minimum_freq) / self.num_dos)
+
+        _eig = np.sign(self._freq) * (_unit * self._freq) ** 2
+        _jacobian = 2 * _unit ** 2 * abs(self._freq)
 
-        with open(out_folder + '/projected_dos.dat', 'w') as outfile:
-            if self.sigma == 0.0:
-                comment = "Projected phonon DOS by Linear Tetrahedron Method"
-                outfile.write("%s" % comment + '\n')
+        self._pdos = np.zeros((len(self.process.unit_cell.xyz_true), self._freq.shape[0]))
+        for _moment, _bound in zip(_moments, _bounds):
+            self._pdos += kpm_density(_moment, _eig, _bound) * _jacobian / len(self.process.k_points)
+        self._tdos = self._pdos.sum(axis=0)
+        self._set_projection(np.zeros((0, self._freq.shape[0])), [])
 
-            elif self.sigma != 0.0:
-                comment = "Projected phonon DOS by Gaussian Smearing with Sigma = %f" % self.sigma
-                outfile.write("%s" % comment + '\n')
+    def method_label(self) -> str:
+        """
+        Description of the method of DOS evaluation, which is written in the comment line of DOS files.
+
+        :return: Description of the method (e.g., Gaussian Smearing with Sigma = 0.100000)
+        :rtype: str
+        """
+        if self._method == 'histogram':
+            return "Histogram with Sigma = %f" % self.sigma
 
-            line = "%s" % '    Frequency (THz)'
-            for xyz_true in self.process.unit_cell.xyz_true:
-                line += '   pdos-atom-{0:0>3}  '.format(xyz_true)
-            outfile.write(line + '\n')
+        elif self._method == 'kpm':
+            return "Kernel Polynomial Method"
 
-            for x_ind, x in enumerate(self._freq):
-                line = ' %16.9f ' % x
-                for ind, _ in enumerate(self.process.unit_cell.xyz_true):
-                    line += ' %16.9f ' % self._pdos[ind, x_ind]
-                outfile.write(line + '\n')
+        elif self.adaptive is not None:
+            return "Adaptive Gaussian Smearing with Factor = %f" % self.adaptive
+
+        elif self.sigma == 0.0:
+            return "Linear Tetrahedron Method"
+
+        else:
+            return "Gaussian Smearing with Sigma = %f" % self.sigma
+
+    def write(self, out_folder='.', compress=False):
+        """
+        Write total and projected DOSs in the file name of **total_dos.dat** and **projected_dos.dat**, respectively
+        (or with .gz extension).
+
+        :param out_folder: Folder path for **total_dos.dat** and **projected_dos.dat** to be stored, defaults to .
+        :type out_folder: str
+        :param compress: Write in gzip-compressed files (True) or not (False), defaults to False
+        :type compress: bool
+        """
+        write_dos_dat(out_folder, self._freq, self._tdos, self._pdos,
+                      self.process.unit_cell.xyz_true, self.method_label(), compress=compress)
 
     def plot(self,
              plot_total=True,
@@ -158,13 +512,15 @@ class DOS(object):
              bulk_dos=None,
              bulk_option='fill',
              bulk_legend=None,
-             proportion=1.0):
+             proportion=1.0,
+             out_file='dos.png',
+             show=True):
         """
-        Plot DOSs in the file name of **dos.png**.
+        Plot DOSs in the file of out_file (defaults to **dos.png**).
 
         :param plot_total: Plot total DOS (True) or not (False), defaults to `True`
         :type plot_total: bool
-        :param atoms: The Index of atoms to be projected in DOS plot, defaults to None
+        :param atoms: The Index of atoms (or the name of group in self.group) to be projected in DOS plot, defaults to None
         :type atoms: List[int]
         :param elimit: Energy (unit: THz) limitation of DOS plot, defaults to None
         :type elimit: List[int]
@@ -188,6 +544,10 @@ class DOS(object):
         :type bulk_legend: str
         :param proportion: Constant to be multiplied to bulk DOS, defaults to 1.0
         :type proportion: float
+        :param out_file: Path of the figure file, defaults to dos.png
+        :type out_file: str
+        :param show: Show the figure on interactive backend (True) or not (False), defaults to `True`
+        :type show: bool
         """
 
         from matplotlib import pyplot as plt
@@ -202,7 +562,10 @@ class DOS(object):
             fig = plt.figure(self.process.num_figure, figsize=(13, 9))
             ax = fig.subplots()
 
-            if elimit is None:
+            if elimit is None and self.window is not None:
+                x_min = self.window[0]
+                x_max = self.window[1]
+            elif elimit is None:
                 x_min = np.floor(self.process.w_q.min()) - 1
                 x_max = np.ceil(self.process.w_q.max()) + 1
             else:
@@ -242,8 +605,7 @@ class DOS(object):
                 ax.legend(loc=legend_location, fontsize='xx-large')
 
                 fig.tight_layout()
-                plt.savefig('dos.png', dpi=300, format='png', bbox_inches='tight')
-                plt.show()
+                save_figure(fig, out_file, show=show)
 
             elif option == 'line':
                 if bulk_dos is not None:
@@ -270,22 +632,16 @@ class DOS(object):
                     #         label='total dos',
                     #         linewidth=4)
 
-                __pdos = np.zeros((len(atoms), self._freq.shape[0]))
-                ind_modes = []
                 try:
-                    for ind_set, atom_set in enumerate(atoms):
-                        ind_modes.append([ind for ind, val in enumerate(self.process.unit_cell.xyz_true)
-                                          if val in atom_set])
-                        for ind_mode in ind_modes[ind_set]:
-                            __pdos[ind_set, :] += self._pdos[ind_mode, :]
-                except TypeError:
+                    __pdos = self.group_pdos(atoms)
+                except (TypeError, KeyError):
                     print("\nFail to identify the index of atoms='{0}'".format(atoms))
                     print("Please designate the 'atoms' parameter for which DOS will be projected\n")
                     raise
 
                 for ind_set, _pdos_ in enumerate(__pdos):
                     if legends is None:
-                        label = 'atom-{0}'.format(set(atoms[ind_set]))
+                        label = self.group.label(atoms[ind_set])
                     else:
                         label = legends[ind_set]
 
@@ -297,7 +653,7 @@ class DOS(object):
                 # color_set = ['tab:purple', 'black']
                 # for ind_set, _pdos_ in enumerate(__pdos):
                 #     if legends is None:
-                #         label = 'atom-{0}'.format(set(atoms[ind_set]))
+                #         label = self.group.label(atoms[ind_set])
                 #     else:
                 #         label = legends[ind_set]
                 #
@@ -321,8 +677,7 @@ class DOS(object):
                 ax.legend(loc=legend_location, fontsize='xx-large')
 
                 fig.tight_layout()
-                plt.savefig('dos.png', dpi=300, format='png', bbox_inches='tight')
-                plt.show()
+                save_figure(fig, out_file, show=show)
 
             elif option == 'stack':
                 if bulk_dos is not None:
@@ -347,15 +702,9 @@ class DOS(object):
                             label='total dos',
                             linewidth=4)
 
-                __pdos = np.zeros((len(atoms), self._freq.shape[0]))
-                ind_modes = []
                 try:
-                    for ind_set, atom_set in enumerate(atoms):
-                        ind_modes.append([ind for ind, val in enumerate(self.process.unit_cell.xyz_true)
-                                          if val in atom_set])
-                        for ind_mode in ind_modes[ind_set]:
-                            __pdos[ind_set, :] += self._pdos[ind_mode, :]
-                except TypeError:
+                    __pdos = self.group_pdos(atoms)
+                except (TypeError, KeyError):
                     print("\nFail to identify the index of atoms='{0}'".format(atoms))
                     print("Please designate the 'atoms' parameter for which DOS will be projected\n")
                     raise
@@ -363,7 +712,7 @@ class DOS(object):
                 if legends is None:
                     labels = []
                     for atom in atoms:
-                        labels.append('atom-{0}'.format(set(atom)))
+                        labels.append(self.group.label(atom))
                 else:
                     labels = legends
 
@@ -391,15 +740,17 @@ class DOS(object):
                 ax.legend(loc=legend_location, fontsize='xx-large')
 
                 fig.tight_layout()
-                plt.savefig('dos.png', dpi=300, format='png', bbox_inches='tight')
-                plt.show()
+                save_figure(fig, out_file, show=show)
 
         elif orientation == 'vertical':
             self.process.num_figure = self.process.num_figure + 1
             fig = plt.figure(self.process.num_figure, (6, 9))
             ax = fig.subplots()
 
-            if elimit is None:
+            if elimit is None and self.window is not None:
+                y_min = self.window[0]
+                y_max = self.window[1]
+            elif elimit is None:
                 y_min = np.floor(self.process.w_q.min()) - 1
                 y_max = np.ceil(self.process.w_q.max()) + 1
             else:
@@ -441,8 +792,7 @@ class DOS(object):
                 ax.legend(loc=legend_location, fontsize='xx-large')
 
                 fig.tight_layout()
-                plt.savefig('dos.png', dpi=300, format='png', bbox_inches='tight')
-                plt.show()
+                save_figure(fig, out_file, show=show)
 
             elif option == 'line':
                 if bulk_dos is not None:
@@ -468,22 +818,16 @@ class DOS(object):
                     ax.yaxis.set_ticks_position('both')
                     ax.yaxis.set_label_position("right")
 
-                __pdos = np.zeros((len(atoms), self._freq.shape[0]))
-                ind_modes = []
                 try:
-                    for ind_set, atom_set in enumerate(atoms):
-                        ind_modes.append([ind for ind, val in enumerate(self.process.unit_cell.xyz_true)
-                                          if val in atom_set])
-                        for ind_mode in ind_modes[ind_set]:
-                            __pdos[ind_set, :] += self._pdos[ind_mode, :]
-                except TypeError:
+                    __pdos = self.group_pdos(atoms)
+                except (TypeError, KeyError):
                     print("\nFail to identify the index of atoms='{0}'".format(atoms))
                     print("Please designate the 'atoms' parameter for which DOS will be projected\n")
                     raise
 
                 for ind_set, _pdos_ in enumerate(__pdos):
                     if legends is None:
-                        label = 'atom-{0}'.format(set(atoms[ind_set]))
+                        label = self.group.label(atoms[ind_set])
                     else:
                         label = legends[ind_set]
 
@@ -507,8 +851,7 @@ class DOS(object):
                 ax.legend(loc=legend_location, fontsize='xx-large')
 
                 fig.tight_layout()
-                plt.savefig('dos.png', dpi=300, format='png', bbox_inches='tight')
-                plt.show()
+                save_figure(fig, out_file, show=show)
 
             elif option == 'stack':
                 if bulk_dos is not None:
@@ -534,15 +877,9 @@ class DOS(object):
                     ax.yaxis.set_ticks_position('both')
                     ax.yaxis.set_label_position("right")
 
-                __pdos = np.zeros((len(atoms), self._freq.shape[0]))
-                ind_modes = []
                 try:
-                    for ind_set, atom_set in enumerate(atoms):
-                        ind_modes.append([ind for ind, val in enumerate(self.process.unit_cell.xyz_true)
-                                          if val in atom_set])
-                        for ind_mode in ind_modes[ind_set]:
-                            __pdos[ind_set, :] += self._pdos[ind_mode, :]
-                except TypeError:
+                    __pdos = self.group_pdos(atoms)
+                except (TypeError, KeyError):
                     print("\nFail to identify the index of atoms='{0}'".format(atoms))
                     print("Please designate the 'atoms' parameter for which DOS will be projected\n")
                     raise
@@ -551,7 +888,7 @@ class DOS(object):
                 x_data = np.cumsum(__pdos, axis=0)
                 for ind, atom in enumerate(atoms):
                     if legends is None:
-                        labels.append('atom-{0}'.format(set(atom)))
+                        labels.append(self.group.label(atom))
                     else:
                         labels.append(legends[ind])
 
@@ -572,5 +909,126 @@ class DOS(object):
                 ax.legend(loc=legend_location, fontsize='xx-large')
 
                 fig.tight_layout()
-                plt.savefig('dos.png', dpi=300, format='png', bbox_inches='tight')
-                plt.show()
+                save_figure(fig, out_file, show=show)
+
+
+class DOSAccumulator(object):
+    """
+    DOSAccumulator class to build density of states n(w) from a stream of eigen-frequencies and eigen-modes.
+    The eigen-frequencies are counted on a fixed-width histogram with the weight of |eigen-mode| ** 2 for each phonon mode,
+    so that the state is only '(num_mode, num_dos) size' irrespective of the number of k-points added.
+    The accumulated histogram is passed to :class:`analysis.DOS.set_accumulator`,
+    and it can be stored and restored by :class:`analysis.DOSAccumulator.save` and :class:`analysis.DOSAccumulator.load`.
+
+    :param freq_min: Lower bound (unit: THz) of histogram
+    :type freq_min: float
+    :param freq_max: Upper bound (unit: THz) of histogram
+    :type freq_max: float
+    :param num_dos: The number of histogram bins, defaults to 200
+    :type num_dos: int
+    :param num_mode: The number of phonon modes (= len(unit_cell.xyz_true)), defaults to 3
+    :type num_mode: int
+    """
+    def __init__(self, freq_min: float,
+                 freq_max: float,
+                 num_dos: int = 200,
+                 num_mode: int = 3):
+        """
+        Constructor of DOSAccumulator class.
+        """
+        self.freq_min = float(freq_min)
+        self.freq_max = float(freq_max)
+        self.num_dos = num_dos
+        self.num_mode = num_mode
+
+        self.num_k_points = 0
+        self.num_outside = 0
+        self._hist = np.zeros((self.num_mode, self.num_dos))
+
+    @property
+    def width(self):
+        return (self.freq_max - self.freq_min) / self.num_dos
+
+    @property
+    def freq(self):
+        return self.freq_min + (np.arange(self.num_dos) + 0.5) * self.width
+
+    @property
+    def hist(self):
+        return self._hist
+
+    def add(self, w_q: np.ndarray,
+            weight: np.ndarray) -> None:
+        """
+        Add a chunk of k-points to the histogram.
+        Eigen-frequencies outside [freq_min, freq_max) are not counted, but their number is kept in **self.num_outside**.
+
+        :param w_q: '(num_k_points, num_mode) size' eigen-frequency of the chunk
+        :type w_q: np.ndarray[float]
+        :param weight: '(num_k_points, num_mode, num_mode) size' |eigen-mode| ** 2 of the chunk, i.e., abs(v_q) ** 2
+        :type weight: np.ndarray[float]
+        """
+        _ind_x = np.floor((w_q.reshape(-1) - self.freq_min) / self.width).astype(int)
+        _inside = (_ind_x >= 0) & (_ind_x < self.num_dos)
+
+        _ind_bin = _ind_x[_inside, np.newaxis] * self.num_mode + np.arange(self.num_mode)
+        self._hist += np.bincount(_ind_bin.reshape(-1),
+                                  weights=weight.reshape((-1, self.num_mode))[_inside].reshape(-1),
+                                  minlength=self.num_dos * self.num_mode).reshape((self.num_dos, self.num_mode)).T
+
+        self.num_k_points = self.num_k_points + w_q.shape[0]
+        self.num_outside = self.num_outside + int(np.count_nonzero(~_inside))
+
+    def pdos(self, sigma: float = 0.0,
+             cutoff: float = 5.0) -> np.ndarray:
+        """
+        Partial DOS normalized by the number of k-points and histogram width,
+        which is convoluted with gaussian on the histogram bins truncated at (cutoff * sigma).
+
+        :param sigma: Sigma of gaussian smearing (if 0.0: no convolution), defaults to 0.0
+        :type sigma: float
+        :param cutoff: Truncation range of gaussian in the unit of sigma, defaults to 5.0
+        :type cutoff: float
+        :return: '(num_mode, num_dos) size' partial DOS for each phonon mode
+        :rtype: np.ndarray[float]
+        """
+        _pdos = self._hist / (max(self.num_k_points, 1) * self.width)
+        if sigma == 0.0:
+            return _pdos
+
+        _offset = np.arange(-int(np.ceil(cutoff * sigma / self.width)), int(np.ceil(cutoff * sigma / self.width)) + 1)
+        _gaussian = 1 / (sigma * np.sqrt(2 * np.pi)) * np.exp(- (_offset * self.width) ** 2 / (2 * sigma ** 2)) * self.width
+
+        return np.array([np.convolve(__pdos, _gaussian, mode='full')[_offset.shape[0] // 2:
+                                                                      _offset.shape[0] // 2 + self.num_dos]
+                         for __pdos in _pdos])
+
+    def save(self, out_file: str = 'dos_accumulator.npz') -> None:
+        """
+        Store the state of accumulation to resume it by :class:`analysis.DOSAccumulator.load`.
+
+        :param out_file: Path of the stored file, defaults to dos_accumulator.npz
+        :type out_file: str
+        """
+        with open(out_file, 'wb') as outfile:
+            np.savez(outfile,
+                     freq_range=np.array([self.freq_min, self.freq_max]),
+                     count=np.array([self.num_k_points, self.num_outside]),
+                     hist=self._hist)
+
+    @classmethod
+    def load(cls, in_file: str = 'dos_accumulator.npz'):
+        """
+        Restore the state of accumulation stored by :class:`analysis.DOSAccumulator.save`.
+
+        :param in_file: Path of the stored file, defaults to dos_accumulator.npz
+        :type in_file: str
+        :return: Instance of DOSAccumulator class
+        :rtype: :class:`analysis.DOSAccumulator`
+        """
+        with np.load(in_file) as data:
+            accumulator = cls(data['freq_range'][0], data['freq_range'][1],
+                              num_dos=data['hist'].shape[1], num_mode=data['hist'].shape[0])
+            accumulator.num_k_points, accumulator.num_outside = (int(count) for count in data['count'])
+            accumulator._hist[...] = data['hist']
+        return accumulator
@@ -1,7 +1,11 @@
+import os
 import numpy as np
-from InterPhon import error
+from typing import List
+from collections import OrderedDict
+from multiprocessing import Pool
 from InterPhon.inout import vasp, aims, espresso
 from InterPhon.util import MatrixLike
+from InterPhon.util.render import headless
 
 
 def to_int_numpy(data):
@@ -17,18 +21,51 @@ def to_int_numpy(data):
     return np.array(data)
 
 
+_modulation_cell = None
+
+
+def _init_modulation_worker(super_cell) -> None:
+    """
+    Keep the supercell in each worker, which is shared by all the modulated supercells to be written.
+
+    :param super_cell: Instance of SuperCell class
+    :type super_cell: :class:`core.SuperCell`
+    """
+    global _modulation_cell
+    _modulation_cell = super_cell
+
+
+def _modulation_worker(_job: tuple) -> str:
+    """
+    Write a modulated supercell in a worker.
+
+    :param _job: A set of (positions of selected atoms, out file, comment, code name)
+    :type _job: tuple
+    :return: Path of the written file
+    :rtype: str
+    """
+    positions, out_file, comment, code_name = _job
+    _modulation_cell.atom_cart[_modulation_cell.atom_true, :] = positions
+    _modulation_cell.write_unit_cell(out_file, comment=comment, code_name=code_name)
+    return out_file
+
+
 class Mode(object):
     """
     Mode class to analyze the phonon dispersion.
     Its instance variables contain an instance of :class:`core.PostProcess` class storing the information on eigen-frequency and eigen-mode.
     Based on the given information, phonon modes are visualized at a specified k-point.
+    The k-point is not necessarily included in the k-points of the process,
+    for which the eigen-frequency and eigen-mode are evaluated on demand from force constant and kept in LRU cache.
     The vibrational motions are written to external data and movie files using the :class:`analysis.Mode.write`
     and :class:`analysis.Mode.plot` methods, respectively.
 
     :param process: Instance of PostProcess class
     :type process: :class:`core.PostProcess`
+    :param cache_size: The maximum number of k-points kept in cache, defaults to 128
+    :type cache_size: int
     """
-    def __init__(self, process):
+    def __init__(self, process, cache_size=128):
         """
         Constructor of Mode class.
         """
@@ -36,9 +73,11 @@ class Mode(object):
         self.__mode_inds = []
         self.k_point = np.empty((3,))
         self.num_images = 30
-        # self.freq = np.empty((len(self.process.unit_cell.xyz_true)), dtype=float)
+        self.freq = np.empty((len(self.process.unit_cell.xyz_true)), dtype=float)
         self.mode = np.empty((len(self.process.unit_cell.xyz_true),
                              len(self.process.unit_cell.xyz_true)))
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
 
     @property
     def mode_inds(self):
@@ -53,6 +92,8 @@ class Mode(object):
             k_point: MatrixLike = (0.0, 0.0, 0.0)):
         """
         Set the k-point, mode index, and corresponding phonon mode.
+        The phonon mode is taken from the process if the k-point is one of its k-points,
+        otherwise it is evaluated at the k-point by :class:`analysis.Mode.eval_k_point`.
 
         :param mode_inds: The index of phonon mode labeled by (k-point, index)
         :type mode_inds: MatrixLike or int
@@ -62,108 +103,171 @@ class Mode(object):
         self.mode_inds = mode_inds
         self.k_point = np.array(k_point)
 
-        _ind_k = None
-        for ind, kpt in enumerate(self.process.k_points):
-            if np.allclose(self.k_point, kpt):
-                _ind_k = ind
-        if _ind_k is None:
-            raise error.Not_Specified_Kpath_Error(self.k_point)
+        _ind_k = np.empty((0,), dtype=int)
+        if len(self.process.k_points) != 0 and len(self.process.v_q) == len(self.process.k_points):
+            _ind_k = np.isclose(np.array(self.process.k_points), self.k_point).all(axis=1).nonzero()[0]
+
+        if _ind_k.shape[0] != 0:
+            self.freq = self.process.w_q[_ind_k[-1], :]
+            self.mode = self.process.v_q[_ind_k[-1], :, :]
+        else:
+            self.freq, self.mode = self.eval_k_point(self.k_point)
+
+    def eval_k_point(self, k_point: MatrixLike) -> tuple:
+        """
+        Evaluate the eigen-frequency and eigen-mode at any k-point from force constant by :class:`core.PostProcess.eval_k_point`.
+        The results are kept in LRU cache keyed by k-point, up to self.cache_size k-points.
+
+        :param k_point: K-point in the unit of reciprocal lattice vectors
+        :type k_point: MatrixLike
+        :return: A set of '(len(xyz_true),) size' eigen-frequency (unit: THz) and '(len(xyz_true), len(xyz_true)) size' eigen-mode
+        :rtype: tuple
+        """
+        # Round off to identify the same k-point, and add zero to unify -0.0 and 0.0
+        _key = tuple(np.round(np.asarray(k_point, dtype=float), 8) + 0.0)
+        if _key in self._cache:
+            self._cache.move_to_end(_key)
+            return self._cache[_key]
+
+        _, _w, _v = self.process.eval_k_point(np.array(_key))
+
+        self._cache[_key] = (_w, _v)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return _w, _v
 
-        # self.freq = self.process.w_q[_ind_k, :]
-        self.mode = self.process.v_q[_ind_k, :, :]
+    def frame_positions(self, mode_inds: MatrixLike = None) -> np.ndarray:
+        """
+        Cartesian positions of atoms in all frames of vibrational motions along the phonon modes,
+        computed as a single array operation over (mode, image, atom, xyz).
 
-    def write(self, out_folder='.'):
+        :param mode_inds: The index of phonon modes, defaults to None (self.mode_inds)
+        :type mode_inds: MatrixLike or int
+        :return: '(len(mode_inds), num_images, num_atom, 3) size' positions
+        :rtype: np.ndarray[float]
+        """
+        if mode_inds is None:
+            mode_inds = self.mode_inds
+        mode_inds = to_int_numpy(mode_inds)
+        unit_cell = self.process.unit_cell
+
+        _sin = np.sin(np.linspace(0, 2 * np.pi, self.num_images, endpoint=False))
+        _mass_weight = unit_cell.mass_true.reshape((-1, 3)) / unit_cell.mass_true.max()
+        _mode = self.mode[mode_inds, :].real.reshape((mode_inds.shape[0], 1, -1, 3))
+
+        positions = np.empty((mode_inds.shape[0], self.num_images) + unit_cell.atom_cart.shape)
+        positions[...] = unit_cell.atom_cart
+        positions[:, :, unit_cell.atom_true, :] = unit_cell.atom_cart[unit_cell.atom_true, :] \
+            + _sin[np.newaxis, :, np.newaxis, np.newaxis] * _mode / np.sqrt(_mass_weight)
+        return positions
+
+    def write(self, out_folder='.', chunk_size=2**22):
         """
         Write phonon Mode in the file name of **XDATCAR_phonon_mode**.
+        The lattice header is written once, and the frames are formatted and streamed to the file one by one.
 
         :param out_folder: Folder path for **XDATCAR_phonon_mode** to be stored, defaults to .
         :type out_folder: str
+        :param chunk_size: The maximum number of coordinates of the modes computed at once, defaults to 2**22
+        :type chunk_size: int
         """
-        from copy import deepcopy
-
-        unit_cell = deepcopy(self.process.unit_cell)
-        unit_cell.selective = False
+        unit_cell = self.process.unit_cell
+        header = "".join(vasp.write_input_lines(unit_cell, "unknown system")[0:7])
+        frame_format = "Cartesian configuration= %4d\n" + " %20.16f  %20.16f  %20.16f\n" * unit_cell.atom_cart.shape[0]
+
+        _block = max(1, chunk_size // (self.num_images * unit_cell.atom_cart.size))
+        for _start in range(0, len(self.mode_inds), _block):
+            _mode_inds = self.mode_inds[_start:_start + _block]
+            positions = self.frame_positions(_mode_inds)
+
+            for mode_ind, _positions in zip(_mode_inds, positions):
+                with open(out_folder + '/XDATCAR_phonon_mode_{0}_{1}'.format(mode_ind, self.k_point), 'w') as outfile:
+                    outfile.write(header)
+                    for ind, _position in enumerate(_positions, 1):
+                        outfile.write(frame_format % ((ind,) + tuple(_position.ravel())))
+
+    def write_xyz(self, out_folder='.', chunk_size=2**22) -> List[str]:
+        """
+        Write phonon Mode in the file name of **Trajectory_{mode_index}.xyz** in the extended XYZ format,
+        which can be read by most of visualization programs (e.g., ASE, OVITO, and VMD) without ASE.
+        The frames are computed by :class:`analysis.Mode.frame_positions`, and formatted and streamed to the file one by one.
 
-        _current_position_true = np.transpose(unit_cell.atom_cart.copy()[unit_cell.atom_true, :])
-        _mass_weight = np.transpose(unit_cell.mass_true.reshape((-1, 3))) / unit_cell.mass_true.max()
-        for mode_ind in self.mode_inds:
-            for ind, x in enumerate(np.linspace(0, 2 * np.pi, self.num_images, endpoint=False), 1):
-                unit_cell.atom_cart[unit_cell.atom_true, :] = \
-                    np.transpose(_current_position_true + np.sin(x)
-                                 * np.transpose(self.mode[mode_ind, :].reshape((-1, 3)).real) / np.sqrt(_mass_weight))
-                # np.sin(x + np.dot(_q, _current_position_true))
-
-                if ind == 1:
-                    lines = vasp.write_input_lines(unit_cell, "unknown system")
-                    lines[7] = "Cartesian configuration= %4d" % ind + '\n'
-                else:
-                    line = vasp.write_input_lines(unit_cell, "unknown system")
-                    line[7] = "Cartesian configuration= %4d" % ind + '\n'
-                    lines.extend(line[7:])
-
-            with open(out_folder + '/XDATCAR_phonon_mode_{0}_{1}'.format(mode_ind, self.k_point), 'w') as outfile:
-                outfile.write("%s" % "".join(lines))
+        :param out_folder: Folder path for **Trajectory_{mode_index}.xyz** to be stored, defaults to .
+        :type out_folder: str
+        :param chunk_size: The maximum number of coordinates of the modes computed at once, defaults to 2**22
+        :type chunk_size: int
+        :return: Paths of the written files
+        :rtype: List[str]
+        """
+        unit_cell = self.process.unit_cell
+        _lattice = ' '.join(['%.16f' % value for value in unit_cell.lattice_matrix[0:3, 0:3].reshape(-1)])
+        _pbc = ' '.join(['T' if value else 'F' for value in self.process.user_arg.periodicity])
+        comment = 'Lattice="{0}" Properties=species:S:1:pos:R:3 pbc="{1}"'.format(_lattice, _pbc)
+        frame_format = "%d\n" % unit_cell.atom_cart.shape[0] + comment + " frame=%d\n" \
+                       + "".join(["%-2s" % atom_type + " %20.16f  %20.16f  %20.16f\n" for atom_type in unit_cell.atom_type])
+
+        out_files = []
+        _block = max(1, chunk_size // (self.num_images * unit_cell.atom_cart.size))
+        for _start in range(0, len(self.mode_inds), _block):
+            _mode_inds = self.mode_inds[_start:_start + _block]
+            positions = self.frame_positions(_mode_inds)
+
+            for mode_ind, _positions in zip(_mode_inds, positions):
+                out_file = out_folder + '/Trajectory_{0}.xyz'.format(mode_ind)
+                with open(out_file, 'w') as outfile:
+                    for ind, _position in enumerate(_positions, 1):
+                        outfile.write(frame_format % ((ind,) + tuple(_position.ravel())))
+                out_files.append(out_file)
+
+        return out_files
 
     def plot(self, out_folder='.',
-             unit_cell='POSCAR',
-             code_name='vasp'):
+             unit_cell=None,
+             code_name=None,
+             view=True):
         """
-        Visualize phonon Mode using modules of the `Atomic Simulation Environment (ASE) <https://wiki.fysik.dtu.dk/ase/index.html>`_.
+        Write phonon Mode in the extended XYZ format by :class:`analysis.Mode.write_xyz`,
+        and visualize it using modules of the `Atomic Simulation Environment (ASE) <https://wiki.fysik.dtu.dk/ase/index.html>`_.
+        The visualization is optional and skipped without ASE or display.
 
-        :param out_folder: Folder path for **Trajectory.traj** to be stored, defaults to .
+        :param out_folder: Folder path for **Trajectory_{mode_index}.xyz** to be stored, defaults to .
         :type out_folder: str
-        :param unit_cell: Path of unit cell input file, defaults to POSCAR
+        :param unit_cell: Deprecated and ignored, since the structure is taken from the process, defaults to None
         :type unit_cell: str
-        :param code_name: Specification of the file-format by a DFT program, defaults to vasp
+        :param code_name: Deprecated and ignored, since the trajectory is written in the extended XYZ format, defaults to None
         :type code_name: str
+        :param view: Visualize the trajectory by ASE (True) or not (False), defaults to `True`
+        :type view: bool
         """
-        try:
-            from ase.io.trajectory import Trajectory
-            from ase.io import read, iread
-            from ase.visualize import view
-        except ImportError:
-            raise ImportError("\nThe parent directory of ase package must be included in 'sys.path'")
-
-        if code_name == 'espresso':
-            code_name = 'espresso-in'  # aims, espresso-in, vasp
+        if unit_cell is not None or code_name is not None:
+            print("\nCaution: 'unit_cell' and 'code_name' of Mode.plot are deprecated and ignored.")
+            print("The structure of phonon Mode is taken from the process, and written in the extended XYZ format.")
 
-        atom = read(unit_cell, format=code_name)
-        _current_position_true = np.transpose(atom.positions.copy()[self.process.unit_cell.atom_true, :])
-        _mass_weight = np.transpose(self.process.unit_cell.mass_true.reshape((-1, 3))) / self.process.unit_cell.mass_true.max()
-        for mode_ind in self.mode_inds:
-            traj = Trajectory(out_folder + "/Trajectory_{0}.traj".format(mode_ind), 'w')
-            for _, x in enumerate(np.linspace(0, 2 * np.pi, self.num_images, endpoint=False), 1):
-                atom.positions[self.process.unit_cell.atom_true, :] = \
-                    np.transpose(_current_position_true + np.sin(x)
-                                 * np.transpose(self.mode[mode_ind, :].reshape((-1, 3)).real) / np.sqrt(_mass_weight))
-                # np.sin(x + np.dot(_q, _current_position_true))
+        out_files = self.write_xyz(out_folder=out_folder)
+        if not view or headless():
+            return
 
-                traj.write(atom)
+        try:
+            from ase.io import read
+            from ase.visualize import view as ase_view
+        except ImportError:
+            print("\nCaution: ASE package is not found, so the visualization of phonon Mode is skipped.")
+            print("The trajectories are written in: {0}".format(', '.join(out_files)))
+            return
 
-            traj.close()
-            atoms = iread(out_folder + "/Trajectory_{0}.traj".format(mode_ind))
-            view(atoms)
+        for out_file in out_files:
+            ase_view(read(out_file, index=':', format='extxyz'))
 
-    def write_mode_displace(self, out_folder='.',
-                            amplitude: float =1.0,
-                            code_name: str = 'vasp'):
+    def _commensurate_super_cell(self) -> tuple:
         """
-        Write a supercell file which is commensurate with k-point and displaced along phonon Mode in the file name of **MPOSCAR**.
+        Build a supercell commensurate with the k-point, whose atoms are ordered by the atoms of unit cell.
 
-        :param out_folder: Folder path for **MPOSCAR** to be stored, defaults to .
-        :type out_folder: str
-        :param amplitude: Amplitude of vibrational motions, defaults to 1.0
-        :type amplitude: float
-        :param code_name: Specification of the file-format by a DFT program, defaults to vasp
-        :type code_name: str
+        :return: A set of (instance of SuperCell class, the number of unit cells in the supercell)
+        :rtype: tuple
         """
-        # Make a supercell file with displacement along normal mode
-        # The displaced supercell along an imaginary mode can be used for structure search
-        # test is ongoing
         from copy import deepcopy
         from fractions import Fraction
 
-        q = np.dot(self.k_point, self.process.reciprocal_matrix)
         super_cell = deepcopy(self.process.super_cell)
         user_arg = deepcopy(self.process.user_arg)
 
@@ -184,6 +288,138 @@ class Mode(object):
         super_cell.set_super_ind_true(self.process.unit_cell, user_arg)
         super_cell.set_mass_true()
         super_cell.selective = True
+        return super_cell, _enlarge
+
+    def modulation_positions(self, super_cell,
+                             enlarge: int,
+                             mode_combinations: list,
+                             amplitudes: MatrixLike = (1.0,),
+                             phases: MatrixLike = (0.0,)) -> np.ndarray:
+        """
+        Positions of selected atoms in the supercells modulated along the combinations of phonon modes,
+        Re[sum of eigen-mode * exp(i * (q · r + phase))] * amplitude / sqrt(mass weight),
+        for all (combination, amplitude, phase) by a single array operation.
+
+        :param super_cell: Instance of SuperCell class commensurate with the k-point
+        :type super_cell: :class:`core.SuperCell`
+        :param enlarge: The number of unit cells in the supercell
+        :type enlarge: int
+        :param mode_combinations: List of the index of phonon modes to be superposed
+        :type mode_combinations: List[List[int]]
+        :param amplitudes: Amplitudes of vibrational motions, defaults to (1.0,)
+        :type amplitudes: MatrixLike
+        :param phases: Phases (unit: degree) of modulation, defaults to (0.0,)
+        :type phases: MatrixLike
+        :return: '(len(mode_combinations), len(amplitudes), len(phases), num_selected_atom, 3) size' positions
+        :rtype: np.ndarray[float]
+        """
+        q = np.dot(self.k_point, self.process.reciprocal_matrix)
+        _current_position_true = super_cell.atom_cart[super_cell.atom_true, :]
+        _mass_weight = super_cell.mass_true.reshape((-1, 3)) / super_cell.mass_true.max()
+
+        _combination = np.zeros((len(mode_combinations), self.mode.shape[0]))
+        for ind, mode_combination in enumerate(mode_combinations):
+            _combination[ind, to_int_numpy(mode_combination)] = 1.0
+
+        # The atoms of supercell are ordered by the atoms of unit cell, each of which is repeated by enlarge.
+        _mode_super_cell = np.repeat(self.mode.reshape((self.mode.shape[0], -1, 3)), enlarge, axis=1)
+        _modulation = np.tensordot(_combination, _mode_super_cell, axes=1) \
+            * np.exp(1j * np.dot(_current_position_true, q))[:, np.newaxis] / np.sqrt(_mass_weight)
+
+        _phase = np.exp(1j * np.deg2rad(np.asarray(phases, dtype=float)))
+        _displacement = np.asarray(amplitudes, dtype=float)[np.newaxis, :, np.newaxis, np.newaxis, np.newaxis] \
+            * (_modulation[:, np.newaxis, np.newaxis] * _phase[np.newaxis, np.newaxis, :, np.newaxis, np.newaxis]).real
+        return _current_position_true + _displacement
+
+    def write_modulation(self, out_folder='.',
+                         mode_combinations: list = None,
+                         amplitudes: MatrixLike = (1.0,),
+                         phases: MatrixLike = (0.0,),
+                         code_name: str = 'vasp',
+                         num_process: int = 1) -> List[str]:
+        """
+        Write the supercells, commensurate with k-point and modulated along the combinations of phonon modes,
+        for all (combination, amplitude, phase) in the file name of **MPOSCAR-{index}**,
+        with the manifest of written files in the file name of **MPOSCAR_manifest.dat**.
+        The modulated supercells can be used for structure search along imaginary modes.
+
+        The displacement is Re[e * exp(i * (q · r + phase))] * amplitude / sqrt(mass weight) with the complex eigen-mode e,
+        i.e., (Re(e) * cos(q · r + phase) - Im(e) * sin(q · r + phase)) * amplitude / sqrt(mass weight)
+        by :class:`analysis.Mode.modulation_positions`.
+        :class:`analysis.Mode.write_mode_displace` takes cos(q · r) * Re(e) instead, which is the same only at Gamma point with phase 0.
+        At the other k-points, the imaginary part of eigen-mode is not ignored here,
+        so that the supercell of a mode at phase 0 differs from that of :class:`analysis.Mode.write_mode_displace`.
+
+        :param out_folder: Folder path for **MPOSCAR-{index}** to be stored, defaults to .
+        :type out_folder: str
+        :param mode_combinations: List of the index of phonon modes to be superposed, defaults to None (each of self.mode_inds)
+        :type mode_combinations: List[List[int]]
+        :param amplitudes: Amplitudes of vibrational motions, defaults to (1.0,)
+        :type amplitudes: MatrixLike
+        :param phases: Phases (unit: degree) of modulation, defaults to (0.0,)
+        :type phases: MatrixLike
+        :param code_name: Specification of the file-format by a DFT program, defaults to vasp
+        :type code_name: str
+        :param num_process: The number of processes writing the files concurrently, defaults to 1
+        :type num_process: int
+        :return: Paths of the written files
+        :rtype: List[str]
+        """
+        if mode_combinations is None:
+            mode_combinations = [[mode_ind] for mode_ind in self.mode_inds]
+        mode_combinations = [to_int_numpy(mode_combination) for mode_combination in mode_combinations]
+        amplitudes = np.asarray(amplitudes, dtype=float).reshape(-1)
+        phases = np.asarray(phases, dtype=float).reshape(-1)
+
+        super_cell, _enlarge = self._commensurate_super_cell()
+        positions = self.modulation_positions(super_cell, _enlarge, mode_combinations, amplitudes, phases)
+
+        jobs = []
+        manifest = []
+        for (ind_comb, ind_amp, ind_phase), _positions in zip(np.ndindex(positions.shape[0:3]),
+                                                             positions.reshape((-1,) + positions.shape[3:])):
+            out_file = out_folder + '/MPOSCAR-{0:0>4}'.format(len(jobs) + 1)
+            _modes = ' '.join([str(mode_ind) for mode_ind in mode_combinations[ind_comb]])
+            comment = 'Commensurate supercell modulated along normal mode {0} at k-point {1} ' \
+                      'with amplitude {2} and phase {3}'.format(_modes, self.k_point, amplitudes[ind_amp], phases[ind_phase])
+            jobs.append((_positions, out_file, comment, code_name))
+            manifest.append(' %16s ' % os.path.basename(out_file) + ' %16.9f ' % amplitudes[ind_amp]
+                            + ' %16.9f ' % phases[ind_phase] + '   ' + _modes)
+
+        if num_process is None or num_process > 1:
+            with Pool(processes=num_process, initializer=_init_modulation_worker, initargs=(super_cell,)) as pool:
+                out_files = pool.map(_modulation_worker, jobs)
+        else:
+            _init_modulation_worker(super_cell)
+            out_files = [_modulation_worker(_job) for _job in jobs]
+
+        with open(out_folder + '/MPOSCAR_manifest.dat', 'w') as outfile:
+            comment = "Modulated supercells at k-point {0} ({1} format)".format(self.k_point, code_name)
+            outfile.write("%s" % comment + '\n')
+            outfile.write("%s" % '    File              Amplitude          Phase (degree)     Mode_Index' + '\n')
+            for line in manifest:
+                outfile.write("%s" % line + '\n')
+
+        return out_files
+
+    def write_mode_displace(self, out_folder='.',
+                            amplitude: float =1.0,
+                            code_name: str = 'vasp'):
+        """
+        Write a supercell file which is commensurate with k-point and displaced along phonon Mode in the file name of **MPOSCAR**.
+
+        :param out_folder: Folder path for **MPOSCAR** to be stored, defaults to .
+        :type out_folder: str
+        :param amplitude: Amplitude of vibrational motions, defaults to 1.0
+        :type amplitude: float
+        :param code_name: Specification of the file-format by a DFT program, defaults to vasp
+        :type code_name: str
+        """
+        # Make a supercell file with displacement along normal mode
+        # The displaced supercell along an imaginary mode can be used for structure search
+        # test is ongoing
+        q = np.dot(self.k_point, self.process.reciprocal_matrix)
+        super_cell, _enlarge = self._commensurate_super_cell()
 
         _current_position_true = np.transpose(super_cell.atom_cart.copy()[super_cell.atom_true, :])
         _mass_weight = super_cell.mass_true.reshape((-1, 3)) / super_cell.mass_true.max()
@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class ProjectionGroup(object):
+    """
+    ProjectionGroup class to project DOS and Band onto groups of atoms.
+    A group is a named set of atom indices, which is defined by element, by layer, or by user.
+    The phonon modes follow the order of **unit_cell.xyz_true**,
+    so that the projection onto groups is a summation matrix of '(num_group, num_mode) size'.
+    The summation matrices are built once for each combination of groups and reused,
+    e.g., grouped partial DOS is given by one matrix product of the summation matrix and '(num_mode, num_dos) size' partial DOS.
+
+    :param unit_cell: Instance of UnitCell class
+    :type unit_cell: :class:`core.UnitCell`
+    """
+    def __init__(self, unit_cell):
+        """
+        Constructor of ProjectionGroup class.
+        """
+        self.unit_cell = unit_cell
+        self.groups = {}
+        self._matrix = {}
+
+    def set_custom(self, name: str,
+                   atoms) -> None:
+        """
+        Define a group of the given atoms.
+
+        :param name: Name of group
+        :type name: str
+        :param atoms: The Index of atoms in the group
+        :type atoms: List[int]
+        """
+        self.groups[name] = sorted(set(int(atom) for atom in atoms))
+        self._matrix = {}
+
+    def set_element(self) -> None:
+        """
+        Define a group for each element of the atoms allowed to move, named by the element symbol.
+        """
+        _groups = {}
+        for atom in self.unit_cell.atom_true:
+            _groups.setdefault(self.unit_cell.atom_type[atom], []).append(atom)
+        self.groups.update(_groups)
+        self._matrix = {}
+
+    def set_layer(self, tolerance: float = 0.5,
+                  axis: int = 2) -> None:
+        """
+        Define a group for each layer of the atoms allowed to move, named by layer-1, layer-2, ... from the bottom.
+        The atoms are in the same layer when the gap of positions along the axis is less than the tolerance.
+
+        :param tolerance: Tolerance (unit: Angstrom) of the gap in a layer, defaults to 0.5
+        :type tolerance: float
+        :param axis: Cartesian axis (0: x, 1: y, 2: z) normal to the layers, defaults to 2
+        :type axis: int
+        """
+        _atoms = np.array(self.unit_cell.atom_true)
+        _position = self.unit_cell.atom_cart[_atoms, axis]
+        _order = np.argsort(_position, kind='stable')
+
+        _ind_layer = np.concatenate([[0], np.cumsum(np.diff(_position[_order]) > tolerance)])
+        for ind_layer in range(_ind_layer[-1] + 1):
+            self.groups['layer-{0}'.format(ind_layer + 1)] = sorted(_atoms[_order][_ind_layer == ind_layer].tolist())
+        self._matrix = {}
+
+    def atoms(self, atom_set) -> list:
+        """
+        The Index of atoms in the given group.
+
+        :param atom_set: Name of group or the Index of atoms
+        :type atom_set: str or List[int]
+        :return: The Index of atoms
+        :rtype: List[int]
+        """
+        if isinstance(atom_set, str):
+            return self.groups[atom_set]
+        return sorted(set(atom_set))
+
+    def label(self, atom_set) -> str:
+        """
+        Label of the given group used in plots.
+
+        :param atom_set: Name of group or the Index of atoms
+        :type atom_set: str or List[int]
+        :return: Label
+        :rtype: str
+        """
+        if isinstance(atom_set, str):
+            return atom_set
+        return 'atom-{0}'.format(set(atom_set))
+
+    def matrix(self, atom_sets) -> np.ndarray:
+        """
+        Summation matrix projecting the phonon modes onto the given groups.
+
+        :param atom_sets: List of the name of group or the Index of atoms
+        :type atom_sets: List[str or List[int]]
+        :return: '(num_group, num_mode) size' summation matrix
+        :rtype: np.ndarray[float]
+        """
+        _key = tuple(atom_set if isinstance(atom_set, str) else tuple(self.atoms(atom_set)) for atom_set in atom_sets)
+        if _key not in self._matrix:
+            _xyz_true = np.array(self.unit_cell.xyz_true)
+            self._matrix[_key] = np.array([np.isin(_xyz_true, self.atoms(atom_set)) for atom_set in atom_sets],
+                                          dtype=float).reshape((len(atom_sets), _xyz_true.shape[0]))
+        return self._matrix[_key]
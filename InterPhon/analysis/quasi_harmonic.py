@@ -0,0 +1,178 @@
+import os
+import numpy as np
+from multiprocessing import Pool
+from InterPhon.util import MatrixLike, FilePath
+from InterPhon.core import UnitCell, SuperCell, PreArgument, PostArgument, PreProcess, PostProcess
+from InterPhon.analysis import ThermalProperty
+from InterPhon.inout.results import write_table
+
+
+class QuasiHarmonic(object):
+    """
+    QuasiHarmonic class to analyze the thermal properties over a set of strained (or volume-varied) cells.
+    Each cell is given by its own unit cell file, and all the cells share the same user arguments.
+    The displaced supercells of all the cells are written at once by the :class:`analysis.QuasiHarmonic.write_displace_cell` method,
+    and the post-processes of the cells are performed in parallel workers by the :class:`analysis.QuasiHarmonic.set` method.
+    The free energy at each temperature is fitted to a polynomial of strain for all the temperatures at once,
+    and the consolidated table is written using the :class:`analysis.QuasiHarmonic.write` method.
+
+    :param unit_cell_files: List of the unit cell file of each cell, where the supercell file (**SUPERCELL**) is placed in the same folder
+    :type unit_cell_files: List[str]
+    :param strain: Strain (or volume) of each cell
+    :type strain: MatrixLike
+    :param user_args: Dictionary of user arguments ('displacement', 'enlargement', and 'periodicity') shared by the cells
+    :type user_args: dict
+    :param code_name: Specification of the file-format by a DFT program, defaults to vasp
+    :type code_name: str
+    :param sym_flag: Specify whether to use symmetry operation, defaults to False
+    :type sym_flag: bool
+    :param temp: Temperatures to be studied, defaults to range(0, 1000, 10)
+    :type temp: MatrixLike
+    :param degree: Degree of the polynomial of strain fitted to free energy, defaults to 2
+    :type degree: int
+    :param num_process: The number of processes for the post-processes of the cells (if None: the number of CPUs), defaults to 1
+    :type num_process: int
+    """
+    def __init__(self, unit_cell_files: list,
+                 strain: MatrixLike,
+                 user_args: dict,
+                 code_name: str = 'vasp',
+                 sym_flag: bool = False,
+                 temp: MatrixLike = range(0, 1000, 10),
+                 degree: int = 2,
+                 num_process: int = 1):
+        """
+        Constructor of QuasiHarmonic class.
+        """
+        self.unit_cell_files = [os.path.abspath(unit_cell_file) for unit_cell_file in unit_cell_files]
+        self.strain = np.array(strain, dtype=float)
+        self.user_args = user_args
+        self.code_name = code_name
+        self.sym_flag = sym_flag
+        self.temp = np.array(temp)
+        self.degree = degree
+        self.num_process = num_process
+
+        self.free_energy = np.zeros((self.strain.shape[0], self.temp.shape[0]))
+        self.entropy = np.zeros((self.strain.shape[0], self.temp.shape[0]))
+        self.internal_energy = np.zeros((self.strain.shape[0], self.temp.shape[0]))
+        self.heat_capacity = np.zeros((self.strain.shape[0], self.temp.shape[0]))
+        self.coefficient = np.zeros((self.degree + 1, self.temp.shape[0]))
+
+    @property
+    def super_cell_files(self):
+        return [os.path.dirname(unit_cell_file) + '/SUPERCELL' for unit_cell_file in self.unit_cell_files]
+
+    def write_displace_cell(self) -> None:
+        """
+        Write the supercell file (**SUPERCELL**) and displaced supercell files of each cell in the folder of its unit cell file.
+        """
+        for unit_cell_file, super_cell_file in zip(self.unit_cell_files, self.super_cell_files):
+            pre = PreProcess(user_arg=PreArgument(), unit_cell=UnitCell(), super_cell=SuperCell())
+            pre.set_user_arg(self.user_args)
+            pre.set_unit_cell(in_file=unit_cell_file, code_name=self.code_name)
+            pre.set_super_cell(out_file=super_cell_file, comment='Supercell', write_file=True, code_name=self.code_name)
+            pre.write_displace_cell(out_file=unit_cell_file, code_name=self.code_name, sym_flag=self.sym_flag)
+
+    def set(self, force_files: list,
+            k_file: FilePath):
+        """
+        Set the thermal properties of each cell by post-process in parallel workers, and fit free energy to strain.
+
+        :param force_files: List of the force files (list of paths) of each cell
+        :type force_files: List[List[str]]
+        :param k_file: Path of KPOINTS file shared by the cells
+        :type k_file: str
+        """
+        _cells = [(unit_cell_file, super_cell_file, _force_files, os.path.abspath(k_file),
+                   self.user_args, self.code_name, self.sym_flag, self.temp)
+                  for unit_cell_file, super_cell_file, _force_files
+                  in zip(self.unit_cell_files, self.super_cell_files, force_files)]
+
+        if self.num_process is not None and self.num_process <= 1:
+            _results = [_post_worker(_cell) for _cell in _cells]
+        else:
+            with Pool(processes=self.num_process) as pool:
+                _results = pool.map(_post_worker, _cells)
+
+        for ind, _result in enumerate(_results):
+            self.free_energy[ind], self.entropy[ind], self.internal_energy[ind], self.heat_capacity[ind] = _result
+
+        self.fit()
+
+    def fit(self):
+        """
+        Fit free energy to the polynomial of strain, for all the temperatures at once,
+        setting the coefficients (**self.coefficient**) from the highest degree.
+        """
+        self.coefficient = np.polyfit(self.strain, self.free_energy, self.degree)
+
+    def evaluate(self, strain: MatrixLike) -> np.ndarray:
+        """
+        Evaluate the fitted free energy at the given strains.
+
+        :param strain: Strains to be evaluated
+        :type strain: MatrixLike
+        :return: '(num_strain, num_temp) size' free energy (unit: eV/atom)
+        :rtype: np.ndarray[float]
+        """
+        return np.dot(np.vander(np.array(strain, dtype=float).reshape(-1), self.degree + 1), self.coefficient)
+
+    def write(self, out_folder='.',
+              compress: bool = False) -> None:
+        """
+        Write the thermal properties of all the cells and fitted free energy in the file name of **quasi_harmonic.dat**.
+
+        :param out_folder: Folder path for **quasi_harmonic.dat** to be stored, defaults to .
+        :type out_folder: str
+        :param compress: Write in gzip-compressed file (True) or not (False), defaults to False
+        :type compress: bool
+        """
+        header = '    Temperature (K)' + \
+                 '    Strain' + \
+                 '    Free_energy (eV/atom)' + \
+                 '    Entropy (meV/K/atom)' + \
+                 '    Internal_energy (eV/atom)' + \
+                 '    Heat_capacity (meV/K/atom)' + \
+                 '    Fitted_free_energy (eV/atom)'
+
+        # The rows are ordered by temperature, and by cell at each temperature.
+        num_cell, num_temp = self.free_energy.shape
+        write_table(out_folder + '/quasi_harmonic.dat',
+                    "Quasi-harmonic Thermal Properties / atom with Free energy fitted to Polynomial of Degree = %d" % self.degree,
+                    header,
+                    np.column_stack((np.repeat(self.temp, num_cell),
+                                     np.tile(self.strain, num_temp),
+                                     self.free_energy.T.reshape(-1),
+                                     self.entropy.T.reshape(-1) * 1000,
+                                     self.internal_energy.T.reshape(-1),
+                                     self.heat_capacity.T.reshape(-1) * 1000,
+                                     self.evaluate(self.strain).T.reshape(-1))),
+                    fmt=' %20.9f ', compress=compress)
+
+def _post_worker(_cell: tuple) -> tuple:
+    """
+    Post-process of a cell in a worker: force constant, eigen-frequency, and thermal properties.
+
+    :param _cell: A set of (unit cell file, supercell file, force files, KPOINTS file, user arguments, code name, symmetry flag, temperatures)
+    :type _cell: tuple
+    :return: A set of free energy, entropy, internal energy, and heat capacity
+    :rtype: tuple
+    """
+    unit_cell_file, super_cell_file, force_files, k_file, user_args, code_name, sym_flag, temp = _cell
+
+    post = PostProcess(in_file_unit_cell=unit_cell_file,
+                       in_file_super_cell=super_cell_file,
+                       code_name=code_name,
+                       user_arg=PostArgument(),
+                       unit_cell=UnitCell(),
+                       super_cell=SuperCell())
+    post.set_user_arg(dict_args=user_args)
+    post.set_reciprocal_lattice()
+    post.set_force_constant(force_files=force_files, code_name=code_name, sym_flag=sym_flag)
+    post.set_k_points(k_file=k_file)
+    post.eval_phonon()
+
+    thermal = ThermalProperty(process=post, temp=temp)
+    thermal.set()
+    return thermal.free_energy, thermal.entropy, thermal.internal_energy, thermal.heat_capacity
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import numpy as np
+import unittest
+from types import SimpleNamespace
+
+from InterPhon.analysis import Band
+from InterPhon.analysis.band import _assign_branch
+
+
+class TestBand(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.RandomState(0)
+        _path = [(np.array([0.0, 0.0, 0.0]), np.array([0.5, 0.0, 0.0])),
+                 (np.array([0.5, 0.0, 0.0]), np.array([1 / 3, 1 / 3, 0.0])),
+                 (np.array([1 / 3, 1 / 3, 0.0]), np.array([0.0, 0.0, 0.0]))]
+        k_points = [start + (end - start) * ratio for start, end in _path for ratio in np.linspace(0, 1, 11)]
+        xyz_true = [0, 0, 0, 1, 1, 1]
+
+        cls.process = SimpleNamespace(k_points=k_points,
+                                      w_q=np.sort(rng.uniform(0.0, 8.0, (len(k_points), 6)), axis=1),
+                                      v_q=rng.normal(size=(len(k_points), 6, 6)) + 1j * rng.normal(size=(len(k_points), 6, 6)),
+                                      reciprocal_matrix=2 * np.pi * np.array([[1.0, 1 / np.sqrt(3), 0.0],
+                                                                              [0.0, 2 / np.sqrt(3), 0.0],
+                                                                              [0.0, 0.0, 0.1]]),
+                                      unit_cell=SimpleNamespace(xyz_true=xyz_true))
+
+    def test_set(self):
+        band = Band(self.process)
+        band.set()
+
+        self.assertListEqual(band.ind_high_sym, [0, 11, 22, 32])
+        self.assertAlmostEqual(band.k_points_length[11], 0.5)
+        self.assertAlmostEqual(band.k_points_length[-1], 0.5 + np.sqrt(1 / 36 + 1 / 9) + np.sqrt(2 / 9))
+        self.assertTrue(np.allclose(band.projected_w, abs(self.process.v_q) ** 2))
+
+        band_window = Band(self.process, window=[3.0, 5.0])
+        band_window.set()
+        self.assertTrue(np.allclose(band_window.projected_w[:, band_window.ind_band],
+                                    band.projected_w[:, band_window.ind_band]))
+
+    def test_cartesian(self):
+        band = Band(self.process, cartesian=True)
+        band.set()
+
+        # Gamma-M and M-K of the hexagonal lattice of unit length.
+        self.assertAlmostEqual(band.k_points_length[11], 2 * np.pi / np.sqrt(3))
+        self.assertAlmostEqual(band.k_points_length[22] - band.k_points_length[11], 2 * np.pi / 3)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            band.write(out_folder=tmp_dir)
+            _table = np.loadtxt(os.path.join(tmp_dir, 'band.dat'), skiprows=2)
+        self.assertTrue(np.allclose(_table[:, 0], band.k_points_length))
+
+    def test_connection(self):
+        # Three branches of fixed eigen-modes, two of which cross each other in the middle of the path.
+        rng = np.random.RandomState(1)
+        _modes, _ = np.linalg.qr(rng.normal(size=(3, 3)) + 1j * rng.normal(size=(3, 3)))
+        _k = np.linspace(0, 1, 21)
+        _w = np.array([_k, 1 - _k, 2 + _k]).T
+        _order = np.argsort(_w, axis=1)
+        process = SimpleNamespace(k_points=[np.array([ratio, 0.0, 0.0]) for ratio in _k],
+                                  w_q=np.take_along_axis(_w, _order, axis=1),
+                                  v_q=_modes.T[_order],
+                                  unit_cell=SimpleNamespace(xyz_true=[0, 0, 0]))
+
+        band = Band(process)
+        band.set()
+        band.set_connection(chunk_size=32)
+        self.assertFalse(np.allclose(band.process.w_q, _w))
+        self.assertTrue(np.allclose(band.w_q, _w))
+        self.assertTrue(np.allclose(band.projected_w[:, 0, :], abs(_modes[:, 0]) ** 2))
+
+    def test_assign_branch(self):
+        # The largest overlaps of the first two rows conflict, resolved by the pairs of the largest remaining overlap.
+        _overlap = np.array([[[0.6, 0.4, 0.0], [0.5, 0.3, 0.2], [0.0, 0.1, 0.9]],
+                             [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]]])
+        self.assertTrue(np.array_equal(_assign_branch(_overlap), [[0, 1, 2], [1, 0, 2]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
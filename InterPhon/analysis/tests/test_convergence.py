@@ -0,0 +1,59 @@
+import os
+import tempfile
+import numpy as np
+import unittest
+from types import SimpleNamespace
+
+from InterPhon.analysis import DOSConvergence
+
+
+class AnalyticProcess(object):
+    """Square lattice of one atom with an analytic dispersion, counting the k-points evaluated."""
+    def __init__(self):
+        self.k_points = []
+        self.auto_k_points = []
+        self.unit_cell = SimpleNamespace(xyz_true=[0, 0, 0])
+        self.user_arg = SimpleNamespace(periodicity=np.array([True, True, False]))
+        self.num_figure = 0
+        self.num_evaluated = 0
+
+    def eval_phonon(self):
+        _k = np.array(self.k_points)
+        _w = np.sqrt(2 - np.cos(2 * np.pi * _k[:, 0]) - np.cos(2 * np.pi * _k[:, 1]))
+        self.w_q = np.stack([1.0 + _w, 2.0 + _w, 3.0 + 2 * _w], axis=1)
+        self.v_q = np.tile(np.eye(3, dtype=complex), (len(self.k_points), 1, 1))
+        self.dyn_matrix = np.zeros((len(self.k_points), 3, 3), dtype=complex)
+        self.num_evaluated += len(self.k_points)
+
+
+class TestDOSConvergence(unittest.TestCase):
+    def test_nested_grid(self):
+        process = AnalyticProcess()
+        convergence = DOSConvergence(process, num_k_points=[3, 3, 3], max_level=3, dos_tol=0.0)
+        convergence.set()
+
+        self.assertListEqual(convergence.grid, [[3, 3, 1], [6, 6, 1], [12, 12, 1]])
+        self.assertListEqual(convergence.num_new, [9, 27, 108])
+        self.assertEqual(process.num_evaluated, 144)
+        self.assertFalse(convergence.converged)
+
+        # Reused eigen-frequencies are placed at the same k-points as evaluated from scratch.
+        _w_q = process.w_q.copy()
+        process.eval_phonon()
+        self.assertTrue(np.allclose(_w_q, process.w_q))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            convergence.write(tmp_dir)
+            with open(os.path.join(tmp_dir, 'dos_convergence.dat'), 'r') as infile:
+                self.assertEqual(len(infile.readlines()), 2 + 3)
+
+    def test_stop(self):
+        convergence = DOSConvergence(AnalyticProcess(), num_k_points=[4, 4, 4], dos_tol=1.0, free_energy_tol=1.0)
+        convergence.set()
+
+        self.assertTrue(convergence.converged)
+        self.assertEqual(len(convergence.grid), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import os
+import tempfile
+import numpy as np
+import unittest
+from types import SimpleNamespace
+
+from InterPhon.analysis import DOS, DOSAccumulator
+
+
+class TestDOS(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.RandomState(0)
+        num_k_points = 16
+        xyz_true = [0, 0, 0, 1, 1, 1]
+
+        w_q = np.sort(rng.uniform(0.5, 8.0, (num_k_points, len(xyz_true))), axis=1)
+        v_q = np.empty((num_k_points, len(xyz_true), len(xyz_true)), dtype=complex)
+        for ind_k in range(num_k_points):
+            v_q[ind_k], _ = np.linalg.qr(rng.normal(size=(len(xyz_true), len(xyz_true)))
+                                         + 1j * rng.normal(size=(len(xyz_true), len(xyz_true))))
+
+        cls.process = SimpleNamespace(w_q=w_q,
+                                      v_q=v_q,
+                                      k_points=[np.zeros((3,)) for _ in range(num_k_points)],
+                                      auto_k_points=[4, 4, 1],
+                                      unit_cell=SimpleNamespace(xyz_true=xyz_true),
+                                      user_arg=SimpleNamespace(periodicity=np.array([True, True, False])),
+                                      num_figure=0)
+
+    def test_truncated_gaussian(self):
+        dos_full = DOS(self.process, sigma=0.1, num_dos=1000)
+        dos_full.set()
+        dos_cut = DOS(self.process, sigma=0.1, num_dos=1000, cutoff=6.0)
+        dos_cut.set()
+
+        self.assertTupleEqual(dos_cut.pdos.shape, dos_full.pdos.shape)
+        self.assertTrue(np.allclose(dos_cut.pdos, dos_full.pdos, atol=1e-06))
+        self.assertTrue(np.allclose(dos_cut.tdos, dos_cut.pdos.sum(axis=0)))
+
+    def test_window(self):
+        dos_window = DOS(self.process, sigma=0.1, num_dos=300, cutoff=6.0, window=[0.0, 3.0])
+        dos_window.set()
+        self.assertEqual(dos_window.freq.shape[0], 300)
+        self.assertTrue(dos_window.freq.min() >= 0.0 and dos_window.freq.max() < 3.0)
+
+        dos_full = DOS(self.process, sigma=0.1, num_dos=300, cutoff=6.0)
+        dos_full._freq = dos_window.freq.copy()
+        dos_full._pdos = np.zeros(dos_window.pdos.shape)
+        dos_full.set()
+        self.assertTrue(np.allclose(dos_window.pdos, dos_full.pdos))
+
+    def test_projection(self):
+        dos = DOS(self.process, sigma=0.1, num_dos=500, axes={'diagonal': [1.0, 1.0, 0.0], 'normal': [0.0, 0.0, 2.0]})
+        dos.set()
+        projection = dos.projection
+
+        self.assertTrue(np.allclose(projection['freq'], dos.freq))
+        self.assertTrue(np.allclose(projection['x'] + projection['y'] + projection['z'], projection['total']))
+        self.assertTrue(np.allclose(projection['atom-000'] + projection['atom-001'], projection['total']))
+        self.assertTrue(np.allclose(projection['atom-001-z'], dos.pdos[5]))
+        self.assertTrue(np.allclose(projection['normal'], projection['z']))
+
+        # |n · v_atom| ** 2 of the custom axis is smeared in the same pass.
+        _axis = np.array([1.0, 1.0, 0.0]) / np.sqrt(2)
+        _weight = abs(np.dot(self.process.v_q.reshape((16, 6, 2, 3)), _axis)) ** 2
+        _diagonal = np.zeros((2, dos.freq.shape[0]))
+        for eig_freqs, weight in zip(self.process.w_q, _weight):
+            _diagonal = _diagonal + np.dot(weight.T, np.exp(- (dos.freq - eig_freqs[:, np.newaxis]) ** 2 / (2 * 0.1 ** 2))) \
+                        / (0.1 * np.sqrt(2 * np.pi)) / 16
+        self.assertTrue(np.allclose(projection['atom-000-diagonal'], _diagonal[0]))
+        self.assertTrue(np.allclose(projection['diagonal'], _diagonal.sum(axis=0)))
+
+        dos_plain = DOS(self.process, sigma=0.1, num_dos=500)
+        dos_plain.set()
+        self.assertTrue(np.allclose(dos.pdos, dos_plain.pdos))
+
+    def test_accumulator(self):
+        accumulator = DOSAccumulator(-2.0, 10.0, num_dos=2400, num_mode=len(self.process.unit_cell.xyz_true))
+        for start in range(0, 16, 5):
+            accumulator.add(self.process.w_q[start:start + 5], abs(self.process.v_q[start:start + 5]) ** 2)
+        self.assertEqual(accumulator.num_k_points, 16)
+        self.assertEqual(accumulator.num_outside, 0)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            accumulator.save(os.path.join(tmp_dir, 'dos_accumulator.npz'))
+            restored = DOSAccumulator.load(os.path.join(tmp_dir, 'dos_accumulator.npz'))
+        self.assertTrue(np.array_equal(restored.hist, accumulator.hist))
+        self.assertEqual(restored.num_k_points, accumulator.num_k_points)
+
+        # Each eigen-frequency holds one state in the histogram.
+        _pdos = accumulator.pdos()
+        self.assertAlmostEqual(_pdos.sum() * accumulator.width, np.sum(abs(self.process.v_q) ** 2) / 16)
+
+        # The convoluted histogram approaches the gaussian smearing at the histogram bins.
+        dos = DOS(self.process, sigma=0.1)
+        dos.set_accumulator(accumulator)
+        _freq = dos.freq
+        _gaussian = np.zeros((6, _freq.shape[0]))
+        for eig_freqs, eig_modes in zip(self.process.w_q, self.process.v_q):
+            _gaussian = _gaussian + np.einsum('bx,bm->mx',
+                                              np.exp(- (_freq - eig_freqs[:, np.newaxis]) ** 2 / (2 * 0.1 ** 2)),
+                                              abs(eig_modes) ** 2) / (0.1 * np.sqrt(2 * np.pi)) / 16
+        self.assertTrue(np.allclose(dos.pdos, _gaussian, atol=1e-02 * _gaussian.max()))
+
+    def test_adaptive(self):
+        rng = np.random.RandomState(1)
+        process = SimpleNamespace(**vars(self.process))
+        process.g_q = rng.normal(size=(16, 6, 3))
+        process.reciprocal_matrix = 2 * np.pi * np.eye(3)
+
+        dos = DOS(process, sigma=0.05, num_dos=400, window=[0.0, 9.0], adaptive=0.5)
+        dos.set()
+
+        # sigma = adaptive * |v · dq| with the grid spacing, dq = 2 * pi / 4, along both periodic directions.
+        _sigma = np.maximum(0.5 * np.sqrt(np.sum((process.g_q[:, :, :2] * 2 * np.pi / 4) ** 2, axis=2)), 0.05)
+        _pdos = np.zeros(dos.pdos.shape)
+        for eig_freqs, eig_modes, sigmas in zip(process.w_q, process.v_q, _sigma):
+            for eig_freq, eig_mode, sigma in zip(eig_freqs, eig_modes, sigmas):
+                _pdos = _pdos + np.exp(- (dos.freq - eig_freq) ** 2 / (2 * sigma ** 2)) / (sigma * np.sqrt(2 * np.pi)) \
+                        * (abs(eig_mode[:, np.newaxis]) ** 2) / 16
+        self.assertTrue(np.allclose(dos.pdos, _pdos))
+
+        # Vanishing group velocity falls back to the fixed sigma.
+        process.g_q = np.zeros((16, 6, 3))
+        dos_adaptive = DOS(process, sigma=0.05, num_dos=400, window=[0.0, 9.0], adaptive=0.5)
+        dos_adaptive.set()
+        dos_fixed = DOS(process, sigma=0.05, num_dos=400, window=[0.0, 9.0])
+        dos_fixed.set()
+        self.assertTrue(np.allclose(dos_adaptive.pdos, dos_fixed.pdos))
+
+    def test_kpm(self):
+        # Dynamical matrix whose eigen-vectors are the rows of v_q, i.e., D = sum_n lambda_n v_n v_n^*.
+        _unit = 2 * np.pi * 10 ** 12
+        _dyn_matrix = np.einsum('kbi,kb,kbj->kij', self.process.v_q, (_unit * self.process.w_q) ** 2, self.process.v_q.conj())
+        process = SimpleNamespace(w_q=np.empty((0, 6)),
+                                  k_points=[np.array([ind_k, 0.0, 0.0]) for ind_k in range(16)],
+                                  dynamical_matrix=lambda k_point: _dyn_matrix[int(k_point[0])],
+                                  unit_cell=self.process.unit_cell,
+                                  user_arg=self.process.user_arg)
+
+        dos_kpm = DOS(process, num_dos=500, window=[-1.0, 9.0])
+        dos_kpm.set_kpm(num_moment=300, num_vector=64, seed=0)
+        dos = DOS(self.process, sigma=0.02, num_dos=500, window=[-1.0, 9.0])
+        dos.set()
+
+        # The number of states up to each frequency point is compared, which is insensitive to the resolution.
+        _step = dos.freq[1] - dos.freq[0]
+        self.assertAlmostEqual(dos_kpm.tdos.sum() * _step, 6.0, delta=5e-02)
+        self.assertTrue(np.allclose(np.cumsum(dos_kpm.tdos) * _step, np.cumsum(dos.tdos) * _step, atol=0.2))
+        self.assertTrue(np.allclose(np.cumsum(dos_kpm.pdos, axis=1) * _step, np.cumsum(dos.pdos, axis=1) * _step, atol=0.2))
+
+        dos_auto = DOS(process, num_dos=500)
+        dos_auto.set_kpm(num_moment=100, num_vector=8, seed=0)
+        self.assertEqual(dos_auto.freq.shape[0], 500)
+        self.assertTrue(dos_auto.freq.min() <= self.process.w_q.min() and dos_auto.freq.max() >= self.process.w_q.max())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import os
+import glob
+import tempfile
+import numpy as np
+import unittest
+from types import SimpleNamespace
+
+from InterPhon.analysis import Mode
+from InterPhon.core import PostProcess, UnitCell
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..',
+                       'example', '2_adsorption_Cu_O', '111_pristine', 'FORCE_3Layer', 'Symmetry_ON')
+
+
+class TestMode(unittest.TestCase):
+    def setUp(self):
+        self.num_eval = 0
+
+        def eval_k_point(k_point):
+            self.num_eval = self.num_eval + 1
+            _w = np.array([1.0, 2.0, 3.0]) + k_point[0]
+            return np.zeros((3, 3), dtype=complex), _w, np.eye(3, dtype=complex) * (1 + k_point[0])
+
+        k_points = [np.array([ratio, 0.0, 0.0]) for ratio in np.linspace(0, 0.5, 6)]
+        self.process = SimpleNamespace(k_points=k_points,
+                                       w_q=np.array([eval_k_point(k_point)[1] for k_point in k_points]),
+                                       v_q=np.array([eval_k_point(k_point)[2] for k_point in k_points]),
+                                       unit_cell=SimpleNamespace(xyz_true=[0, 0, 0],
+                                                                 lattice_matrix=np.diag([3.0, 3.0, 10.0]),
+                                                                 atom_type=['Cu', 'O'],
+                                                                 num_atom=np.array([1, 1]),
+                                                                 selective=True,
+                                                                 atom_cart=np.array([[0.0, 0.0, 0.0], [1.5, 1.5, 1.0]]),
+                                                                 atom_true=np.array([1]),
+                                                                 mass_true=np.array([16.0, 16.0, 16.0])),
+                                       reciprocal_matrix=2 * np.pi * np.eye(3),
+                                       user_arg=SimpleNamespace(periodicity=np.array([1, 1, 0])),
+                                       eval_k_point=eval_k_point)
+        self.num_eval = 0
+
+    def test_set(self):
+        mode = Mode(self.process)
+
+        # The k-point on the path is taken from the process.
+        mode.set(mode_inds=[0, 2], k_point=[0.2, 0.0, 0.0])
+        self.assertEqual(self.num_eval, 0)
+        self.assertTrue(np.allclose(mode.mode, self.process.v_q[2]))
+
+        # The k-point off the path is evaluated on demand.
+        mode.set(mode_inds=1, k_point=[0.25, 0.0, 0.0])
+        self.assertEqual(self.num_eval, 1)
+        self.assertTrue(np.allclose(mode.freq, [1.25, 2.25, 3.25]))
+        self.assertTrue(np.allclose(mode.mode, 1.25 * np.eye(3)))
+
+    def test_cache(self):
+        mode = Mode(self.process, cache_size=2)
+
+        mode.eval_k_point([0.25, 0.0, 0.0])
+        mode.eval_k_point([0.25, -0.0, 1e-12])
+        self.assertEqual(self.num_eval, 1)
+
+        mode.eval_k_point([0.35, 0.0, 0.0])
+        mode.eval_k_point([0.25, 0.0, 0.0])
+        mode.eval_k_point([0.45, 0.0, 0.0])  # evicts the least recently used, 0.35
+        self.assertEqual(self.num_eval, 3)
+        self.assertListEqual(list(mode._cache), [(0.25, 0.0, 0.0), (0.45, 0.0, 0.0)])
+
+        mode.eval_k_point([0.35, 0.0, 0.0])
+        self.assertEqual(self.num_eval, 4)
+
+    def test_write(self):
+        mode = Mode(self.process)
+        mode.num_images = 4
+        mode.set(mode_inds=[0, 2], k_point=[0.2, 0.0, 0.0])
+
+        positions = mode.frame_positions()
+        self.assertTupleEqual(positions.shape, (2, 4, 2, 3))
+        self.assertTrue(np.allclose(positions[:, :, 0, :], 0.0))
+        self.assertTrue(np.allclose(positions[1, :, 1, 2], 1.0 + 1.2 * np.array([0.0, 1.0, 0.0, -1.0])))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            mode.write(out_folder=tmp_dir, chunk_size=1)
+            with open(os.path.join(tmp_dir, 'XDATCAR_phonon_mode_2_{0}'.format(mode.k_point)), 'r') as infile:
+                lines = infile.readlines()
+
+        self.assertEqual(len(lines), 7 + 4 * 3)
+        self.assertEqual(sum(line.startswith('Cartesian configuration=') for line in lines), 4)
+        self.assertTrue(np.allclose(np.loadtxt(lines[8:10]), positions[1, 0]))
+        self.assertTrue(np.allclose(np.loadtxt(lines[17:19]), positions[1, 3]))
+
+    def test_write_xyz(self):
+        mode = Mode(self.process)
+        mode.num_images = 4
+        mode.set(mode_inds=[2], k_point=[0.2, 0.0, 0.0])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_files = mode.write_xyz(out_folder=tmp_dir)
+            with open(out_files[0], 'r') as infile:
+                lines = infile.readlines()
+
+        self.assertEqual(len(lines), 4 * (2 + 2))
+        self.assertEqual(lines[0].strip(), '2')
+        self.assertIn('pbc="T T F"', lines[1])
+        self.assertIn('Lattice="3.0000000000000000 0.0000000000000000', lines[1])
+        self.assertTrue(lines[1].strip().endswith('frame=1'))
+        self.assertListEqual([line.split()[0] for line in lines[6:8]], ['Cu', 'O'])
+        self.assertTrue(np.allclose(np.array([line.split()[1:] for line in lines[6:8]], dtype=float), mode.frame_positions()[0, 1]))
+
+    def test_plot_deprecated_argument(self):
+        mode = Mode(self.process)
+        mode.num_images = 4
+        mode.set(mode_inds=[2], k_point=[0.2, 0.0, 0.0])
+
+        # The keywords of the previous API are accepted and ignored.
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            mode.plot(tmp_dir, 'POSCAR', 'vasp', view=False)
+            mode.plot(out_folder=tmp_dir, unit_cell='POSCAR', code_name='vasp', view=False)
+            self.assertListEqual(os.listdir(tmp_dir), ['Trajectory_2.xyz'])
+
+    def test_modulation_positions(self):
+        mode = Mode(self.process)
+        mode.set(mode_inds=[0, 1], k_point=[0.5, 0.0, 0.0])
+
+        # Two unit cells along x, where only the atom of second type is selected.
+        super_cell = SimpleNamespace(atom_cart=np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0],
+                                                         [0.0, 0.5, 1.0], [1.0, 0.5, 1.0]]),
+                                     atom_true=np.array([2, 3]),
+                                     mass_true=np.full((6,), 4.0))
+        positions = mode.modulation_positions(super_cell, 2, [[0], [1], [0, 1]],
+                                              amplitudes=[1.0, 2.0], phases=[0.0, 90.0, 180.0])
+        self.assertTupleEqual(positions.shape, (3, 2, 3, 2, 3))
+
+        _displacement = positions - super_cell.atom_cart[super_cell.atom_true]
+        # Mode 0 along x with the phase of cos(pi * x) at k = 0.5, which alternates between neighboring cells.
+        self.assertTrue(np.allclose(_displacement[0, 0, 0], [[1.5, 0.0, 0.0], [-1.5, 0.0, 0.0]]))
+        self.assertTrue(np.allclose(_displacement[0, 0, 1], 0.0))
+        self.assertTrue(np.allclose(_displacement[:, 1], 2 * _displacement[:, 0]))
+        self.assertTrue(np.allclose(_displacement[:, :, 2], -_displacement[:, :, 0]))
+        self.assertTrue(np.allclose(_displacement[2], _displacement[0] + _displacement[1]))
+
+
+
+class TestModeModulation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.process = PostProcess(in_file_unit_cell=os.path.join(EXAMPLE, 'POSCAR'),
+                                  in_file_super_cell=os.path.join(EXAMPLE, 'SUPERCELL'),
+                                  code_name='vasp')
+        cls.process.set_user_arg({'displacement': 0.02, 'enlargement': '4 4 1', 'periodicity': '1 1 0'})
+        cls.process.set_reciprocal_lattice()
+        cls.process.set_force_constant(sorted(glob.glob(os.path.join(EXAMPLE, 'FORCE-*', 'vasprun.xml'))),
+                                       code_name='vasp', sym_flag=True)
+        cls.process.set_k_points(os.path.join(EXAMPLE, 'KPOINTS_band'))
+        cls.process.eval_phonon()
+
+    def test_write_modulation(self):
+        mode = Mode(self.process)
+        mode.set(mode_inds=[0, 1, 2], k_point=[0.5, 0.0, 0.0])
+        super_cell, _enlarge = mode._commensurate_super_cell()
+        positions = mode.modulation_positions(super_cell, _enlarge, [[0], [1, 2]],
+                                              amplitudes=[0.5, 1.0], phases=[0.0, 90.0])
+        self.assertEqual(_enlarge, 2)
+        self.assertFalse(np.allclose(positions[1, 1, 1], positions[1, 1, 0]))
+
+        for code_name in ('vasp', 'espresso', 'aims'):
+            with self.subTest(code_name=code_name), tempfile.TemporaryDirectory() as tmp_dir:
+                out_files = mode.write_modulation(out_folder=tmp_dir, mode_combinations=[[0], [1, 2]],
+                                                  amplitudes=[0.5, 1.0], phases=[0.0, 90.0],
+                                                  code_name=code_name, num_process=2)
+                self.assertListEqual(out_files, [tmp_dir + '/MPOSCAR-{0:0>4}'.format(ind) for ind in range(1, 9)])
+                self.assertListEqual(sorted(os.listdir(tmp_dir)),
+                                     ['MPOSCAR-{0:0>4}'.format(ind) for ind in range(1, 9)] + ['MPOSCAR_manifest.dat'])
+
+                with open(tmp_dir + '/MPOSCAR_manifest.dat', 'r') as infile:
+                    manifest = [line.split() for line in infile.readlines()[2:]]
+                self.assertListEqual([line[0] for line in manifest], [os.path.basename(out_file) for out_file in out_files])
+                self.assertListEqual([[float(line[1]), float(line[2])] for line in manifest],
+                                     [[amplitude, phase] for amplitude in (0.5, 1.0) for phase in (0.0, 90.0)] * 2)
+                self.assertListEqual([line[3:] for line in manifest], [['0']] * 4 + [['1', '2']] * 4)
+
+                # The last file is modulated along the combination [1, 2] with amplitude 1.0 and phase 90.0.
+                written = UnitCell()
+                written.read_unit_cell(out_files[-1], code_name=code_name)
+                self.assertEqual(written.atom_cart.shape[0], 2 * self.process.unit_cell.atom_cart.shape[0])
+                self.assertTrue(np.allclose(written.atom_cart[super_cell.atom_true], positions[1, 1, 1], atol=1e-6))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import numpy as np
+import unittest
+from types import SimpleNamespace
+
+from InterPhon.analysis import ProjectionGroup, DOS
+
+
+class TestProjectionGroup(unittest.TestCase):
+    def setUp(self):
+        # Two-layer slab of Cu and O, where the bottom Cu atom is fixed.
+        self.unit_cell = SimpleNamespace(atom_type=['Cu', 'Cu', 'O', 'Cu'],
+                                         atom_cart=np.array([[0.0, 0.0, 0.0],
+                                                             [1.2, 1.2, 2.1],
+                                                             [0.0, 1.2, 2.3],
+                                                             [0.0, 0.0, 4.2]]),
+                                         atom_true=[1, 2, 3],
+                                         xyz_true=[1, 1, 1, 2, 2, 2, 3, 3, 3])
+
+    def test_groups(self):
+        group = ProjectionGroup(self.unit_cell)
+        group.set_element()
+        group.set_layer(tolerance=0.5)
+        group.set_custom('top', [3])
+
+        self.assertDictEqual(group.groups, {'Cu': [1, 3], 'O': [2], 'layer-1': [1, 2], 'layer-2': [3], 'top': [3]})
+        self.assertEqual(group.label('O'), 'O')
+        self.assertEqual(group.label([1, 2]), 'atom-{1, 2}')
+
+        _matrix = group.matrix(['Cu', 'layer-1', [2]])
+        self.assertTrue(np.array_equal(_matrix, [[1, 1, 1, 0, 0, 0, 1, 1, 1],
+                                                 [1, 1, 1, 1, 1, 1, 0, 0, 0],
+                                                 [0, 0, 0, 1, 1, 1, 0, 0, 0]]))
+        self.assertIs(group.matrix(['Cu', 'layer-1', [2]]), _matrix)
+
+        with self.assertRaises(KeyError):
+            group.matrix(['Ag'])
+
+    def test_group_pdos(self):
+        rng = np.random.RandomState(0)
+        w_q = np.sort(rng.uniform(0.5, 8.0, (4, 9)), axis=1)
+        v_q = rng.normal(size=(4, 9, 9))
+        process = SimpleNamespace(w_q=w_q, v_q=v_q, k_points=[np.zeros((3,)) for _ in range(4)],
+                                  unit_cell=self.unit_cell, num_figure=0,
+                                  user_arg=SimpleNamespace(periodicity=np.array([True, True, False])))
+
+        dos = DOS(process, sigma=0.1)
+        dos.set()
+        dos.group.set_element()
+
+        _pdos = dos.group_pdos(['Cu', [2]])
+        self.assertTrue(np.allclose(_pdos[0], dos.pdos[[0, 1, 2, 6, 7, 8]].sum(axis=0)))
+        self.assertTrue(np.allclose(_pdos[1], dos.pdos[[3, 4, 5]].sum(axis=0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import glob
+import shutil
+import tempfile
+import numpy as np
+import unittest
+
+from InterPhon.analysis import QuasiHarmonic, ThermalProperty
+from InterPhon.core import PostProcess, UnitCell
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..',
+                       'example', '2_adsorption_Cu_O', '111_pristine', 'FORCE_3Layer', 'Symmetry_ON')
+
+
+class TestQuasiHarmonic(unittest.TestCase):
+    def test_fit(self):
+        strain = [-0.02, -0.01, 0.0, 0.01, 0.02]
+        temp = [0.0, 300.0, 600.0]
+        qha = QuasiHarmonic(['cell_{0}/POSCAR'.format(ind) for ind in range(5)], strain,
+                            {'displacement': 0.02, 'enlargement': '2 2 1', 'periodicity': '1 1 0'}, temp=temp)
+
+        # Free energy quadratic in strain, whose curvature and minimum vary with temperature.
+        _coefficient = np.array([[10.0, 12.0, 14.0], [0.0, -0.1, -0.2], [0.05, -0.02, -0.1]])
+        qha.free_energy = np.dot(np.vander(qha.strain, 3), _coefficient)
+        qha.fit()
+        self.assertTrue(np.allclose(qha.coefficient, _coefficient))
+        self.assertTrue(np.allclose(qha.evaluate([0.005]), np.dot([0.005 ** 2, 0.005, 1.0], _coefficient)))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            qha.write(out_folder=tmp_dir)
+            _table = np.loadtxt(tmp_dir + '/quasi_harmonic.dat', skiprows=2)
+        self.assertTupleEqual(_table.shape, (15, 7))
+        self.assertTrue(np.allclose(_table[:, 2], qha.free_energy.T.reshape(-1)))
+        self.assertTrue(np.allclose(_table[:, 6], _table[:, 2]))
+
+
+    def test_driver(self):
+        user_args = {'displacement': 0.02, 'enlargement': '4 4 1', 'periodicity': '1 1 0'}
+        temp = [0.0, 100.0, 300.0]
+        force_files = sorted(glob.glob(os.path.join(EXAMPLE, 'FORCE-*', 'vasprun.xml')))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Two cells: the example cell, and the cell strained by 1 % along the periodic directions.
+            unit_cell_files = []
+            for ind, strain in enumerate([0.0, 0.01]):
+                os.mkdir(tmp_dir + '/cell_{0}'.format(ind))
+                unit_cell = UnitCell()
+                unit_cell.read_unit_cell(os.path.join(EXAMPLE, 'POSCAR'), code_name='vasp')
+                unit_cell.lattice_matrix[0:2, :] = unit_cell.lattice_matrix[0:2, :] * (1 + strain)
+                unit_cell.atom_cart[:, 0:2] = unit_cell.atom_cart[:, 0:2] * (1 + strain)
+                unit_cell.write_unit_cell(tmp_dir + '/cell_{0}/POSCAR'.format(ind), comment='Copper', code_name='vasp')
+                unit_cell_files.append(tmp_dir + '/cell_{0}/POSCAR'.format(ind))
+            k_file = tmp_dir + '/KPOINTS'
+            with open(k_file, 'w') as outfile:
+                outfile.write('kpoint\n0\nMP\n6 6 1\n0.0 0.0 0.0\n')
+
+            qha = QuasiHarmonic(unit_cell_files, [0.0, 0.01], user_args, code_name='vasp', sym_flag=True,
+                                temp=temp, degree=1, num_process=2)
+            qha.write_displace_cell()
+
+            # The supercell and displaced supercells of the example cell are reproduced.
+            for ind in range(2):
+                self.assertListEqual(sorted(os.listdir(tmp_dir + '/cell_{0}'.format(ind))),
+                                     ['POSCAR'] + ['POSCAR-{0:0>4}'.format(ind_dis) for ind_dis in range(1, len(force_files) + 1)]
+                                     + ['SUPERCELL'])
+            for written_file, in_file in zip([tmp_dir + '/cell_0/SUPERCELL']
+                                             + [tmp_dir + '/cell_0/POSCAR-{0:0>4}'.format(ind_dis) for ind_dis in range(1, len(force_files) + 1)],
+                                             [os.path.join(EXAMPLE, 'SUPERCELL')]
+                                             + [os.path.join(os.path.dirname(force_file), 'POSCAR') for force_file in force_files]):
+                written, reference = UnitCell(), UnitCell()
+                written.read_unit_cell(written_file, code_name='vasp')
+                reference.read_unit_cell(in_file, code_name='vasp')
+                self.assertTrue(np.allclose(written.lattice_matrix, reference.lattice_matrix, atol=1e-6))
+                self.assertTrue(np.allclose(written.atom_cart, reference.atom_cart, atol=1e-6))
+
+            # The forces of the example cell are shared by both cells, so that only the geometry differs.
+            qha.set(force_files=[force_files, force_files], k_file=k_file)
+
+            for ind, unit_cell_file in enumerate(unit_cell_files):
+                post = PostProcess(in_file_unit_cell=unit_cell_file,
+                                   in_file_super_cell=os.path.dirname(unit_cell_file) + '/SUPERCELL',
+                                   code_name='vasp')
+                post.set_user_arg(user_args)
+                post.set_reciprocal_lattice()
+                post.set_force_constant(force_files, code_name='vasp', sym_flag=True)
+                post.set_k_points(k_file)
+                post.eval_phonon()
+                thermal = ThermalProperty(post, temp=temp)
+                thermal.set()
+
+                self.assertTrue(np.allclose(qha.free_energy[ind], thermal.free_energy))
+                self.assertTrue(np.allclose(qha.entropy[ind], thermal.entropy))
+                self.assertTrue(np.allclose(qha.internal_energy[ind], thermal.internal_energy))
+                self.assertTrue(np.allclose(qha.heat_capacity[ind], thermal.heat_capacity))
+            self.assertFalse(np.allclose(qha.free_energy[0], qha.free_energy[1]))
+
+            qha.write(out_folder=tmp_dir, compress=True)
+            _table = np.loadtxt(tmp_dir + '/quasi_harmonic.dat.gz', skiprows=2)
+        self.assertTupleEqual(_table.shape, (len(temp) * 2, 7))
+        self.assertTrue(np.allclose(_table[:, 0], np.repeat(temp, 2)))
+        self.assertTrue(np.allclose(_table[:, 2], qha.free_energy.T.reshape(-1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
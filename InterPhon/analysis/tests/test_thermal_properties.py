@@ -0,0 +1,80 @@
+import numpy as np
+import unittest
+from types import SimpleNamespace
+
+from InterPhon.analysis import ThermalProperty, DOSThermalProperty, DOS
+
+
+class TestThermalProperty(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.RandomState(0)
+        w_q = np.sort(rng.uniform(0.1, 12.0, (20, 6)), axis=1)
+        w_q[0, 0] = -0.5
+        cls.process = SimpleNamespace(w_q=w_q, k_points=[np.zeros((3,)) for _ in range(20)])
+
+    def test_set(self):
+        thermal = ThermalProperty(self.process, temp=[0.0, 0.1, 300.0, 1000.0])
+        thermal.set(chunk_size=64)
+
+        # Direct sum over the positive eigen-frequencies in the form of hyperbolic functions.
+        kb = 1.38 * 10 ** (-23) / (1.602 * 10 ** (-19))
+        h = 6.626 * 10 ** (-34) / (1.602 * 10 ** (-19))
+        _energy = h * self.process.w_q[self.process.w_q > 0] * 10 ** 12
+        _norm = 20 * 2
+        for temp, free_energy, entropy in zip(thermal.temp[2:], thermal.free_energy[2:], thermal.entropy[2:]):
+            _x = _energy / (2 * kb * temp)
+            self.assertAlmostEqual(free_energy, np.sum(kb * temp * np.log(2 * np.sinh(_x))) / _norm)
+            self.assertAlmostEqual(entropy, np.sum(kb * _x / np.tanh(_x) - kb * np.log(2 * np.sinh(_x))) / _norm)
+
+        # Only the zero-point energy remains at 0 K, and the low temperature does not overflow.
+        self.assertAlmostEqual(thermal.free_energy[0], np.sum(_energy) / 2 / _norm)
+        self.assertTrue(np.allclose(thermal.free_energy[:2], thermal.internal_energy[:2]))
+        self.assertTrue(np.allclose([thermal.entropy[:2], thermal.heat_capacity[:2]], 0.0))
+
+    def test_consistency(self):
+        thermal = ThermalProperty(self.process, temp=np.arange(10.0, 1000.0, 0.5))
+        thermal.set()
+
+        self.assertTrue(np.allclose(thermal.free_energy, thermal.internal_energy - thermal.temp * thermal.entropy))
+        self.assertTrue(np.allclose(np.gradient(thermal.internal_energy, thermal.temp)[1:-1], thermal.heat_capacity[1:-1],
+                                    rtol=1e-03, atol=0.0))
+
+        # Dulong-Petit limit, 3 * kb per atom, at high temperature.
+        self.assertAlmostEqual(thermal.heat_capacity[-1] / (3 * 1.38 * 10 ** (-23) / (1.602 * 10 ** (-19))),
+                               (6 * 20 - 1) / (6 * 20), delta=1e-02)
+
+    def test_dos_thermal_property(self):
+        temp = np.array([0.0, 50.0, 300.0, 1000.0])
+        thermal = ThermalProperty(self.process, temp=temp)
+        thermal.set()
+
+        # Histogram of eigen-frequency with narrow bins approaches the direct sum over eigen-frequencies.
+        thermal_hist = DOSThermalProperty(self.process, temp=temp, num_bin=20000)
+        thermal_hist.set(chunk_size=64)
+        for value_hist, value in zip((thermal_hist.free_energy, thermal_hist.entropy,
+                                      thermal_hist.internal_energy, thermal_hist.heat_capacity),
+                                     (thermal.free_energy, thermal.entropy, thermal.internal_energy, thermal.heat_capacity)):
+            self.assertTrue(np.allclose(value_hist, value, rtol=1e-04, atol=1e-08))
+
+        # Arbitrary temperatures are evaluated from the cached bins.
+        _thermal = thermal_hist.evaluate([300.0])
+        self.assertAlmostEqual(_thermal[0][0], thermal_hist.free_energy[2])
+        self.assertAlmostEqual(_thermal[3][0], thermal_hist.heat_capacity[2])
+
+        # Total DOS by gaussian smearing of small sigma.
+        process = SimpleNamespace(w_q=self.process.w_q,
+                                  v_q=np.tile(np.eye(6, dtype=complex), (20, 1, 1)),
+                                  k_points=self.process.k_points,
+                                  unit_cell=SimpleNamespace(xyz_true=[0, 0, 0, 1, 1, 1]),
+                                  user_arg=SimpleNamespace(periodicity=np.array([True, True, False])))
+        dos = DOS(process, sigma=0.01, num_dos=5000, window=[0.0, 13.0])
+        dos.set()
+        thermal_dos = DOSThermalProperty(process, temp=temp, dos=dos)
+        thermal_dos.set()
+        self.assertTrue(np.allclose(thermal_dos.free_energy, thermal.free_energy, rtol=1e-03))
+        self.assertTrue(np.allclose(thermal_dos.heat_capacity[1:], thermal.heat_capacity[1:], rtol=1e-02))
+
+
+if __name__ == "__main__":
+    unittest.main()
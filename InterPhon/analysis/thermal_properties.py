@@ -1,13 +1,55 @@
 import numpy as np
 from InterPhon import error
-from InterPhon.util import MatrixLike
+from InterPhon.util import MatrixLike, save_figure
+from InterPhon.inout.results import write_thermal_dat
+
+
+def _thermal_sum(_energy: np.ndarray,
+                 _weight: np.ndarray,
+                 temp: np.ndarray) -> tuple:
+    """
+    Weighted sum of the thermal properties of harmonic oscillators at each temperature.
+    Only the zero-point energy remains at 0 K.
+
+    :param _energy: '(num_oscillator,) size' positive energy (unit: eV) of oscillators
+    :type _energy: np.ndarray[float]
+    :param _weight: '(num_oscillator,) size' weight of oscillators
+    :type _weight: np.ndarray[float]
+    :param temp: '(num_temp,) size' temperatures
+    :type temp: np.ndarray[float]
+    :return: A set of '(num_temp,) size' free energy, entropy, internal energy, and heat capacity
+    :rtype: tuple
+    """
+    kb = 1.38 * 10 ** (-23) / (1.602 * 10 ** (-19))
+
+    is_finite = temp > 0
+    zero_point_energy = np.dot(_weight, _energy) / 2
+    free_energy = np.full(temp.shape, zero_point_energy)
+    entropy = np.zeros(temp.shape)
+    internal_energy = np.full(temp.shape, zero_point_energy)
+    heat_capacity = np.zeros(temp.shape)
+
+    # x = h * w / (kb * T) and the occupation n = 1 / (exp(x) - 1) = exp(-x) / (1 - exp(-x)) are evaluated
+    # with expm1(-x), which underflows to -1 instead of overflow at low temperatures, giving n = 0.
+    # F = E / 2 + kb * T * log(1 - exp(-x)), S = kb * (x * n - log(1 - exp(-x))),
+    # U = E / 2 + kb * T * x * n, and Cv = kb * x * n * (x * n + x).
+    _x = _energy[:, np.newaxis] / (kb * temp[is_finite])
+    _expm1 = - np.expm1(- _x)
+    _log = np.dot(_weight, np.log(_expm1))
+    _xn = _x * (1 - _expm1) / _expm1
+
+    free_energy[is_finite] += kb * temp[is_finite] * _log
+    entropy[is_finite] = kb * (np.dot(_weight, _xn) - _log)
+    internal_energy[is_finite] += kb * temp[is_finite] * np.dot(_weight, _xn)
+    heat_capacity[is_finite] = kb * np.dot(_weight, _xn * (_xn + _x))
+    return free_energy, entropy, internal_energy, heat_capacity
 
 
 class ThermalProperty(object):
     """
     ThermalProperty class to analyze the thermal properties determined by phonon dispersion.
     Its instance variables contain an instance of :class:`core.PostProcess` class storing the information on eigen-frequency and eigen-mode.
-    The given information is further refined to predict vibrational entropy and free energy.
+    The given information is further refined to predict vibrational free energy, entropy, internal energy, and heat capacity.
     The thermal properties are written to external data and graphic files using the :class:`analysis.ThermalProperty.write`
     and :class:`analysis.ThermalProperty.plot` methods, respectively.
 
@@ -25,107 +67,70 @@ class ThermalProperty(object):
         self.temp = np.array(temp)
         self.free_energy = np.zeros(self.temp.shape)
         self.entropy = np.zeros(self.temp.shape)
-        # self.heat_capacity = np.zeros(self.temp.shape)
+        self.internal_energy = np.zeros(self.temp.shape)
+        self.heat_capacity = np.zeros(self.temp.shape)
 
-    def set(self):
+    def set(self, chunk_size: int = 2 ** 16):
         """
-        Set the vibrational entropy and free energy in the range of temperatures.
+        Set the vibrational free energy, entropy, internal energy, and heat capacity in the range of temperatures.
+        The contributions of eigen-frequencies are evaluated for all the temperatures at once,
+        over the blocks of k-points holding about chunk_size pairs of eigen-frequency and temperature.
+        The imaginary (negative) and zero frequencies are excluded.
+
+        :param chunk_size: The number of pairs of eigen-frequency and temperature to be evaluated at once, defaults to 2 ** 16
+        :type chunk_size: int
         """
-        kb = 1.38 * 10 ** (-23) / (1.602 * 10 ** (-19))
         h = 6.626 * 10 ** (-34) / (1.602 * 10 ** (-19))
 
-        is_imaginary = False
-        check_zero = np.isin(self.temp, 0).nonzero()[0]
-        if check_zero.shape[0] == 0:
-            for eig_freqs in self.process.w_q:
-                for eig_freq in eig_freqs:
-                    if eig_freq < 0:
-                        is_imaginary = True
-                    else:
-                        eig_freq *= 10 ** 12
-
-                        # To solve the overflow encountered in exp
-                        self.free_energy += (1.0 / 2.0 * h * eig_freq
-                                             + kb * self.temp * np.log(1 - np.exp(-h * eig_freq / (kb * self.temp)))) \
-                                            / len(self.process.k_points) \
-                                            / (self.process.w_q.shape[1] / 3)
-
-                        self.entropy += (1 / (2 * self.temp) * h * eig_freq \
-                                        * np.cosh(h * eig_freq / (2 * kb * self.temp)) \
-                                        / np.sinh(h * eig_freq / (2 * kb * self.temp)) \
-                                        - kb * np.log(2 * np.sinh(h * eig_freq / (2 * kb * self.temp)))) \
-                                        / len(self.process.k_points) \
-                                        / (self.process.w_q.shape[1] / 3)
-
-                        # self.heat_capacity += kb * np.power(h * eig_freq / (kb * self.temp), 2) \
-                        #                       * np.exp(h * eig_freq / (kb * self.temp)) \
-                        #                       / np.power(np.exp(h * eig_freq / (kb * self.temp)) - 1, 2) \
-                        #                       / len(self.process.k_points) \
-                        #                       / (self.process.w_q.shape[1] / 3)
-            if is_imaginary:
-                print("\nCaution: ", error.Thermal_Imaginary_Frequency())
-
-        elif check_zero.shape[0] == 1:
-            zero_index = check_zero[0]
-            tmp_temp = np.delete(self.temp, zero_index)
-            tmp_free_energy = np.zeros(tmp_temp.shape)
-            zero_point_energy = 0.0
-            tmp_entropy = np.zeros(tmp_temp.shape)
-
-            for eig_freqs in self.process.w_q:
-                for eig_freq in eig_freqs:
-                    if eig_freq < 0:
-                        is_imaginary = True
-                    else:
-                        eig_freq *= 10 ** 12
-
-                        # To solve the overflow encountered in exp
-                        tmp_free_energy += (1.0 / 2.0 * h * eig_freq
-                                            + kb * tmp_temp * np.log(1 - np.exp(-h * eig_freq / (kb * tmp_temp)))) \
-                                           / len(self.process.k_points) \
-                                           / (self.process.w_q.shape[1] / 3)
-
-                        zero_point_energy += 1.0 / 2.0 * h * eig_freq \
-                                             / len(self.process.k_points) / (self.process.w_q.shape[1] / 3)
-
-                        tmp_entropy += (1 / (2 * tmp_temp) * h * eig_freq
-                                        * np.cosh(h * eig_freq / (2 * kb * tmp_temp))
-                                        / np.sinh(h * eig_freq / (2 * kb * tmp_temp))
-                                        - kb * np.log(2 * np.sinh(h * eig_freq / (2 * kb * tmp_temp)))) \
-                                       / len(self.process.k_points) \
-                                       / (self.process.w_q.shape[1] / 3)
-
-            self.free_energy = np.insert(tmp_free_energy, zero_index, zero_point_energy)
-            self.entropy = np.insert(tmp_entropy, zero_index, 0.0)
-
-            if is_imaginary:
-                print("\nCaution: ", error.Thermal_Imaginary_Frequency())
-
-    def write(self, out_folder='.'):
+        self.free_energy = np.zeros(self.temp.shape)
+        self.entropy = np.zeros(self.temp.shape)
+        self.internal_energy = np.zeros(self.temp.shape)
+        self.heat_capacity = np.zeros(self.temp.shape)
+
+        is_imaginary = np.any(self.process.w_q < 0)
+
+        _block = max(1, chunk_size // max(1, self.process.w_q.shape[1] * self.temp.size))
+        for start in range(0, self.process.w_q.shape[0], _block):
+            _eig_freqs = self.process.w_q[start:start + _block].reshape(-1)
+            _energy = h * _eig_freqs[_eig_freqs > 0] * 10 ** 12
+
+            _thermal = _thermal_sum(_energy, np.ones(_energy.shape), self.temp)
+            self.free_energy += _thermal[0]
+            self.entropy += _thermal[1]
+            self.internal_energy += _thermal[2]
+            self.heat_capacity += _thermal[3]
+
+        _norm = len(self.process.k_points) * (self.process.w_q.shape[1] / 3)
+        self.free_energy = self.free_energy / _norm
+        self.entropy = self.entropy / _norm
+        self.internal_energy = self.internal_energy / _norm
+        self.heat_capacity = self.heat_capacity / _norm
+
+        if is_imaginary:
+            print("\nCaution: ", error.Thermal_Imaginary_Frequency())
+
+    def write(self, out_folder='.', compress=False):
         """
-        Write thermal properties in the file name of **thermal_properties.dat**.
+        Write thermal properties in the file name of **thermal_properties.dat** (or **thermal_properties.dat.gz**).
 
         :param out_folder: Folder path for **thermal_properties.dat** to be stored, defaults to .
         :type out_folder: str
+        :param compress: Write in gzip-compressed file (True) or not (False), defaults to False
+        :type compress: bool
         """
-        with open(out_folder + '/thermal_properties.dat', 'w') as outfile:
-            comment = "Thermal Properties / atom"
-            outfile.write("%s" % comment + '\n')
-            outfile.write("%s" %
-                          '    Temperature (K)' +
-                          '    Free_energy (eV/atom)' +
-                          '    Entropy (meV/K/atom)' + '\n')
-
-            for x, y1, y2 in zip(self.temp, self.free_energy, self.entropy):
-                line = ' %20.9f ' % x + ' %20.9f ' % y1 + ' %20.9f ' % (y2 * 1000)
-                outfile.write("%s" % line + '\n')
-
-    def plot(self, legend_location='best'):
+        write_thermal_dat(out_folder, self.temp, self.free_energy, self.entropy,
+                          self.internal_energy, self.heat_capacity, compress=compress)
+
+    def plot(self, legend_location='best', out_file='thermal_properties.png', show=True):
         """
-        Plot thermal properties in the file name of **thermal_properties.png**.
+        Plot thermal properties in the file of out_file (defaults to **thermal_properties.png**).
 
         :param legend_location: Location of DOS legend, defaults to best
         :type legend_location: str
+        :param out_file: Path of the figure file, defaults to thermal_properties.png
+        :type out_file: str
+        :param show: Show the figure on interactive backend (True) or not (False), defaults to `True`
+        :type show: bool
         """
         from matplotlib import pyplot as plt
 
@@ -154,7 +159,7 @@ class ThermalProperty(object):
 
         ax.plot(self.temp, self.free_energy, label='Free energy (eV/atom)', linewidth=4)
         ax.plot(self.temp, self.entropy * 1000, label='Entropy (meV/K/atom)', linewidth=4)
-        # ax.plot(self.temp, self.heat_capacity * 1000, label='Heat capacity (meV/K/atom)', linewidth=4)
+        ax.plot(self.temp, self.heat_capacity * 1000, label='Heat capacity (meV/K/atom)', linewidth=4)
 
         ax.set_xlabel('Temperature (K)', fontdict=font_x)
         labels = [item for item in ax.get_xticks()]
@@ -172,5 +177,85 @@ class ThermalProperty(object):
         ax.legend(loc=legend_location, fontsize='xx-large')
 
         fig.tight_layout()
-        plt.savefig('thermal_properties.png', dpi=300, format='png', bbox_inches='tight')
-        plt.show()
+        save_figure(fig, out_file, show=show)
+
+
+class DOSThermalProperty(ThermalProperty):
+    """
+    DOSThermalProperty class to analyze the thermal properties by integration over the density of states.
+    The frequencies and weights of bins are cached once, either from the total DOS of :class:`analysis.DOS`
+    or from the histogram of eigen-frequencies stored in the instance of PostProcess class,
+    so that the thermal properties are evaluated at any temperatures in O(num_bin) per temperature
+    by the :class:`analysis.DOSThermalProperty.set` and :class:`analysis.DOSThermalProperty.evaluate` methods.
+
+    :param process: Instance of PostProcess class
+    :type process: :class:`core.PostProcess`
+    :param temp: Temperatures to be studied, defaults to range(0, 1000, 10)
+    :type temp: MatrixLike
+    :param dos: Instance of DOS class whose total DOS is integrated (if None: histogram of eigen-frequency), defaults to None
+    :type dos: :class:`analysis.DOS`
+    :param num_bin: The number of bins in the histogram of eigen-frequency, defaults to 1000
+    :type num_bin: int
+    """
+    def __init__(self, process,
+                 temp: MatrixLike = range(0, 1000, 10),
+                 dos=None,
+                 num_bin: int = 1000):
+        """
+        Constructor of DOSThermalProperty class.
+        """
+        super(DOSThermalProperty, self).__init__(process, temp)
+        h = 6.626 * 10 ** (-34) / (1.602 * 10 ** (-19))
+
+        if dos is not None:
+            _freq = dos.freq
+            _weight = dos.tdos * (dos.freq[1] - dos.freq[0])
+        else:
+            _eig_freqs = self.process.w_q[self.process.w_q > 0]
+            _count, _edge = np.histogram(_eig_freqs, bins=num_bin)
+            _freq = (_edge[1:] + _edge[:-1]) / 2
+            _weight = _count / len(self.process.k_points)
+
+        # Only the bins of positive frequency holding the states are cached.
+        _mask = (_freq > 0) & (_weight != 0)
+        self.bin_energy = h * _freq[_mask] * 10 ** 12
+        self.bin_weight = _weight[_mask] / (self.process.w_q.shape[1] / 3)
+
+    def evaluate(self, temp: MatrixLike) -> tuple:
+        """
+        Evaluate the thermal properties at the given temperatures from the cached bins.
+
+        :param temp: Temperatures to be evaluated
+        :type temp: MatrixLike
+        :return: A set of free energy (eV/atom), entropy (eV/K/atom), internal energy (eV/atom), and heat capacity (eV/K/atom)
+        :rtype: tuple
+        """
+        return _thermal_sum(self.bin_energy, self.bin_weight, np.array(temp, dtype=float).reshape(-1))
+
+    def set(self, temp: MatrixLike = None,
+            chunk_size: int = 2 ** 16):
+        """
+        Set the vibrational free energy, entropy, internal energy, and heat capacity in the range of temperatures.
+        The temperatures are evaluated in the blocks holding about chunk_size pairs of bin and temperature.
+
+        :param temp: Temperatures to be studied (if None: the temperatures given to the constructor), defaults to None
+        :type temp: MatrixLike
+        :param chunk_size: The number of pairs of bin and temperature to be evaluated at once, defaults to 2 ** 16
+        :type chunk_size: int
+        """
+        if temp is not None:
+            self.temp = np.array(temp)
+
+        self.free_energy = np.zeros(self.temp.shape)
+        self.entropy = np.zeros(self.temp.shape)
+        self.internal_energy = np.zeros(self.temp.shape)
+        self.heat_capacity = np.zeros(self.temp.shape)
+
+        _block = max(1, chunk_size // max(1, self.bin_energy.shape[0]))
+        for start in range(0, self.temp.size, _block):
+            __slice = slice(start, start + _block)
+            self.free_energy[__slice], self.entropy[__slice], self.internal_energy[__slice], self.heat_capacity[__slice] \
+                = self.evaluate(self.temp[__slice])
+
+        if np.any(self.process.w_q < 0):
+            print("\nCaution: ", error.Thermal_Imaginary_Frequency())
@@ -63,6 +63,10 @@ class PostProcess(PreProcess):
         self.v_q = np.empty((len(self.k_points),
                              len(self.unit_cell.xyz_true),
                              len(self.unit_cell.xyz_true)), dtype=complex)
+        self.g_q = np.empty((len(self.k_points),
+                             len(self.unit_cell.xyz_true), 3), dtype=float)
+        self.image_pos = None
+        self.image_row = None
 
     def set_user_arg(self, dict_args: dict) -> None:
         """
@@ -388,9 +392,194 @@ class PostProcess(PreProcess):
             # Explicit list of k-points
             self.k_points = k_points.explicit_reciprocal(lines)
 
+    def set_image_table(self) -> None:
+        """
+        Set the instance variables of image table (**self.image_pos** and **self.image_row**),
+        the position vectors from the atoms of unit cell to their nearest periodic images of the atoms of super cell,
+        and the row of dynamical matrix to which each atom of super cell contributes.
+        The table is used to build the dynamical matrix at any k-point by :class:`core.PostProcess.dynamical_matrix`.
+        """
+        _enlarge = 1
+        for ind, value in enumerate(self.user_arg.periodicity):
+            if value:
+                _enlarge = _enlarge * self.user_arg.enlargement[ind]
+        _ind_pbc = self.user_arg.periodicity.nonzero()[0]
+
+        # Each atom has three (x, y, z) components in xyz_true.
+        _super_atom = np.array(self.super_cell.xyz_true[::3])
+        _unit_atom = np.array(self.unit_cell.xyz_true[::3])
+        _pos = self.super_cell.atom_cart[_super_atom, np.newaxis, 0:3] - self.unit_cell.atom_cart[np.newaxis, _unit_atom, 0:3]
+
+        # The periodic images are searched in the same order as the shifts are visited one by one,
+        # where the position vector is replaced whenever the shifted one is shorter.
+        if _ind_pbc.shape[0] == 0:
+            _shifts = np.zeros((0, 0))
+        else:
+            _shifts = np.array(np.meshgrid(*[(-1, 0, 1) for _ in _ind_pbc], indexing='ij')).reshape((_ind_pbc.shape[0], -1)).T
+        for _shift in _shifts:
+            _tmp_pos = _pos + np.dot(_shift, self.super_cell.lattice_matrix[_ind_pbc, 0:3])
+            _mask = np.einsum('ijk,ijk->ij', _pos, _pos) > np.einsum('ijk,ijk->ij', _tmp_pos, _tmp_pos)
+            _pos[_mask] = _tmp_pos[_mask]
+
+        self.image_pos = _pos
+        self.image_row = ((np.arange(_super_atom.shape[0]) // _enlarge)[:, np.newaxis] * 3 + np.arange(3)).reshape(-1)
+        self._image_fc_row = (_super_atom[:, np.newaxis] * 3 + np.arange(3)).reshape(-1)
+
+    def dynamical_matrix(self, k_point: np.ndarray) -> np.ndarray:
+        """
+        Build the mass-weighted dynamical matrix at the given k-point from force constant and image table.
+
+        :param k_point: '(3,) size' k-point in the unit of reciprocal lattice vectors
+        :type k_point: np.ndarray[float]
+        :return: '(len(xyz_true), len(xyz_true)) size' dynamical matrix
+        :rtype: np.ndarray[complex]
+        """
+        if self.image_pos is None:
+            self.set_image_table()
+
+        num_unit_atom = self.image_pos.shape[1]
+        q = np.dot(k_point, self.reciprocal_matrix)
+        _phase = np.exp(1j * np.dot(self.image_pos, q))
+
+        _dyn_matrix = np.zeros([num_unit_atom * 3, num_unit_atom * 3], dtype=complex)
+        np.add.at(_dyn_matrix, self.image_row,
+                  (self.force_constant[self._image_fc_row, :].reshape((-1, 3, num_unit_atom, 3))
+                   * _phase[:, np.newaxis, :, np.newaxis]).reshape((-1, num_unit_atom * 3)))
+
+        _mass_true = np.sqrt(np.dot(self.unit_cell.mass_true.reshape([len(self.unit_cell.xyz_true), 1]),
+                                    self.unit_cell.mass_true.reshape([1, len(self.unit_cell.xyz_true)])))
+        return _dyn_matrix / _mass_true
+
+    def dynamical_matrix_derivative(self, k_point: np.ndarray) -> np.ndarray:
+        """
+        Build the derivative of mass-weighted dynamical matrix with respect to the Cartesian components of wave vector,
+        dD/dq = sum (i * r * exp(i * q · r) * force constant) / mass, from force constant and image table.
+
+        :param k_point: '(3,) size' k-point in the unit of reciprocal lattice vectors
+        :type k_point: np.ndarray[float]
+        :return: '(3, len(xyz_true), len(xyz_true)) size' derivative of dynamical matrix (unit: 1/s^2 * Angstrom)
+        :rtype: np.ndarray[complex]
+        """
+        if self.image_pos is None:
+            self.set_image_table()
+
+        num_unit_atom = self.image_pos.shape[1]
+        q = np.dot(k_point, self.reciprocal_matrix)
+        _phase = 1j * self.image_pos.transpose((2, 0, 1)) * np.exp(1j * np.dot(self.image_pos, q))
+
+        _d_dyn_matrix = np.zeros([3, num_unit_atom * 3, num_unit_atom * 3], dtype=complex)
+        np.add.at(_d_dyn_matrix, (slice(None), self.image_row),
+                  (self.force_constant[self._image_fc_row, :].reshape((1, -1, 3, num_unit_atom, 3))
+                   * _phase[:, :, np.newaxis, :, np.newaxis]).reshape((3, -1, num_unit_atom * 3)))
+
+        _mass_true = np.sqrt(np.dot(self.unit_cell.mass_true.reshape([len(self.unit_cell.xyz_true), 1]),
+                                    self.unit_cell.mass_true.reshape([1, len(self.unit_cell.xyz_true)])))
+        return _d_dyn_matrix / _mass_true
+
+    def eval_group_velocity(self) -> None:
+        """
+        Set the instance variable, group velocity (**self.g_q**) of each eigen-frequency (unit: THz * Angstrom),
+        from the derivative of eigenvalue, dw/dq = <u|dD/dq|v> / (2 * |w|), by Hellmann-Feynman theorem,
+        where u is the left eigen-vector of dynamical matrix, since force constant is not exactly symmetric.
+        The eigen-frequency and eigen-mode are required to be evaluated by :class:`core.PostProcess.eval_phonon` in advance.
+        """
+        self.g_q = np.zeros((len(self.k_points), len(self.unit_cell.xyz_true), 3), dtype=float)
+        _unit = 2 * np.pi * 10 ** 12  # THz
+
+        for _ind_k, k_point in enumerate(self.k_points):
+            _d_dyn_matrix = self.dynamical_matrix_derivative(k_point)
+
+            _vec = self.v_q[_ind_k, :, :].T
+            _left_vec = np.linalg.inv(_vec)
+            _eig = np.einsum('bi,ij,jb->b', _left_vec, self.dyn_matrix[_ind_k, :, :], _vec).real
+            _d_eig = np.einsum('bi,aij,jb->ba', _left_vec, _d_dyn_matrix, _vec).real
+
+            _w = np.sqrt(abs(_eig[:, np.newaxis])) / _unit
+            self.g_q[_ind_k, :, :] = np.divide(_d_eig, 2 * _unit ** 2 * _w, out=np.zeros(_d_eig.shape), where=(_w != 0))
+
+    def eval_k_point(self, k_point: np.ndarray) -> tuple:
+        """
+        Evaluate the dynamical matrix, sorted eigen-frequency and corresponding eigen-mode at the given k-point.
+
+        :param k_point: '(3,) size' k-point in the unit of reciprocal lattice vectors
+        :type k_point: np.ndarray[float]
+        :return: dynamical matrix, eigen-frequency (unit: THz), and eigen-mode
+        :rtype: tuple
+        """
+        _dyn_matrix = self.dynamical_matrix(k_point)
+        _eig_w, _eig_v = np.linalg.eig(_dyn_matrix)
+
+        _w = (np.sqrt(_eig_w).real - np.abs(np.sqrt(_eig_w).imag)) / (2 * np.pi) / 10 ** 12  # THz
+        _order = np.argsort(_w)
+
+        # Each row of eigen-mode is the eigen-vector (column of _eig_v) of the sorted eigen-frequency.
+        return _dyn_matrix, _w[_order], _eig_v[:, _order].T
+
+    def refine_k_path(self, tolerance: float = 0.05, max_level: int = 5) -> int:
+        """
+        Refine the line path of k-points adaptively, after :class:`core.PostProcess.eval_phonon` on a coarse line path.
+        The intervals of the path are bisected level by level, where the eigen-frequency deviates from
+        the linear interpolation of its neighbors (curvature) by more than tolerance,
+        or where the eigen-modes are exchanged between non-degenerate bands (band-crossing).
+        Only the inserted k-points are evaluated, and the instance variables
+        (**self.k_points**, **self.dyn_matrix**, **self.w_q**, and **self.v_q**) are updated in the order of path.
+
+        :param tolerance: Tolerance of eigen-frequency (unit: THz)
+        :type tolerance: float
+        :param max_level: Maximum number of bisection levels
+        :type max_level: int
+        :return: Number of inserted k-points
+        :rtype: int
+        """
+        if self.image_pos is None:
+            self.set_image_table()
+
+        num_insert = 0
+        for _level in range(max_level):
+            _k_points = np.array(self.k_points, dtype=float)
+            _length = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(np.dot(_k_points, self.reciprocal_matrix),
+                                                                                    axis=0), axis=1))))
+            _step = np.diff(_length)
+
+            # The high symmetry k-point is repeated at the junction of line segments, which is not an interval.
+            _interval = ~np.isclose(_step, 0.0)
+
+            # Curvature: deviation of eigen-frequency from the linear interpolation of its neighbors in the same segment.
+            _curvature = np.zeros(len(_k_points), dtype=bool)
+            _inner = _interval[:-1] & _interval[1:]
+            _h_left = _step[:-1, np.newaxis]
+            _h_right = _step[1:, np.newaxis]
+            _linear = (_h_right * self.w_q[:-2] + _h_left * self.w_q[2:]) / np.where(_inner, _step[:-1] + _step[1:], 1.0)[:, np.newaxis]
+            _curvature[1:-1] = _inner & (np.abs(self.w_q[1:-1] - _linear).max(axis=1) > tolerance)
+
+            _flag = _interval & (_curvature[:-1] | _curvature[1:])
+
+            # Band-crossing: the eigen-mode of a band is carried by another band of distinct eigen-frequency.
+            _overlap = np.abs(np.einsum('kbi,kci->kbc', self.v_q[:-1].conj(), self.v_q[1:])) ** 2
+            _connect = np.argmax(_overlap, axis=2)
+            _gap = np.abs(np.take_along_axis(self.w_q[:-1], _connect, axis=1) - self.w_q[:-1])
+            _flag = _flag | (_interval & (_gap > tolerance).any(axis=1))
+
+            _ind_flag = _flag.nonzero()[0]
+            if _ind_flag.shape[0] == 0:
+                break
+
+            _new_k_points = (_k_points[_ind_flag] + _k_points[_ind_flag + 1]) / 2
+            _new = [self.eval_k_point(k_point) for k_point in _new_k_points]
+
+            self.k_points = list(np.insert(_k_points, _ind_flag + 1, _new_k_points, axis=0))
+            self.dyn_matrix = np.insert(self.dyn_matrix, _ind_flag + 1, [_value[0] for _value in _new], axis=0)
+            self.w_q = np.insert(self.w_q, _ind_flag + 1, [_value[1] for _value in _new], axis=0)
+            self.v_q = np.insert(self.v_q, _ind_flag + 1, [_value[2] for _value in _new], axis=0)
+            num_insert = num_insert + _ind_flag.shape[0]
+
+        return num_insert
+
     def eval_phonon(self) -> None:
         """
         Set the instance variables, eigen-frequency (**self.w_q**) and corresponding eigen-mode (**self.v_q**).
+        At each k-point, the eigen-frequencies are sorted in ascending order,
+        and each row of eigen-mode (**self.v_q[k, band, :]**) is the eigen-vector of the eigen-frequency of the band.
         """
         if len(self.k_points) != 0:
             self.dyn_matrix = np.empty((len(self.k_points),
@@ -402,62 +591,11 @@ class PostProcess(PreProcess):
                                  len(self.unit_cell.xyz_true),
                                  len(self.unit_cell.xyz_true)), dtype=complex)
 
-        _ind_k = 0
-        _enlarge = 1
-        for ind, value in enumerate(self.user_arg.periodicity):
-            if value:
-                _enlarge = _enlarge * self.user_arg.enlargement[ind]
         _ind_pbc = self.user_arg.periodicity.nonzero()[0]
+        self.set_image_table()
 
-        for k_point in self.k_points:
-            q = np.dot(k_point, self.reciprocal_matrix)
-            _dyn_matrix = np.zeros([len(self.unit_cell.xyz_true), len(self.unit_cell.xyz_true)], dtype=complex)
-
-            for s1, satom_ind in enumerate(self.super_cell.xyz_true):
-                for s2, atom_ind in enumerate(self.unit_cell.xyz_true):
-                    pos_vector = self.super_cell.atom_cart[satom_ind, 0:3] - self.unit_cell.atom_cart[atom_ind, 0:3]
-
-                    if _ind_pbc.shape[0] == 0:
-                        pass
-
-                    elif _ind_pbc.shape[0] == 1:
-                        for first in (-1, 0, 1):
-                            _tmp_pos = pos_vector + first * self.super_cell.lattice_matrix[_ind_pbc[0], 0:3]
-                            if np.dot(pos_vector, pos_vector) > np.dot(_tmp_pos, _tmp_pos):
-                                pos_vector = _tmp_pos.copy()
-
-                    elif _ind_pbc.shape[0] == 2:
-                        for first in (-1, 0, 1):
-                            for second in (-1, 0, 1):
-                                _tmp_pos = pos_vector + first * self.super_cell.lattice_matrix[_ind_pbc[0], 0:3] \
-                                           + second * self.super_cell.lattice_matrix[_ind_pbc[1], 0:3]
-                                if np.dot(pos_vector, pos_vector) > np.dot(_tmp_pos, _tmp_pos):
-                                    pos_vector = _tmp_pos.copy()
-
-                    elif _ind_pbc.shape[0] == 3:
-                        for first in (-1, 0, 1):
-                            for second in (-1, 0, 1):
-                                for third in (-1, 0, 1):
-                                    _tmp_pos = pos_vector + first * self.super_cell.lattice_matrix[_ind_pbc[0], 0:3] \
-                                               + second * self.super_cell.lattice_matrix[_ind_pbc[1], 0:3] \
-                                               + third * self.super_cell.lattice_matrix[_ind_pbc[2], 0:3]
-                                    if np.dot(pos_vector, pos_vector) > np.dot(_tmp_pos, _tmp_pos):
-                                        pos_vector = _tmp_pos.copy()
-
-                    _dyn_matrix[(s1 // (_enlarge * 3)) * 3 + (s1 % 3), s2] = \
-                        _dyn_matrix[(s1 // (_enlarge * 3)) * 3 + (s1 % 3), s2] \
-                        + complex(self.force_constant[satom_ind * 3 + (s1 % 3), s2], 0) \
-                        * np.exp(1j * complex(np.dot(q, pos_vector), 0))
-
-            _mass_true = np.sqrt(np.dot(self.unit_cell.mass_true.reshape([len(self.unit_cell.xyz_true), 1]),
-                                        self.unit_cell.mass_true.reshape([1, len(self.unit_cell.xyz_true)])))
-            self.dyn_matrix[_ind_k, :, :] = _dyn_matrix / _mass_true
-            _eig_w, self.v_q[_ind_k, :, :] = np.linalg.eig(self.dyn_matrix[_ind_k, :, :])
-
-            self.w_q[_ind_k, :] = (np.sqrt(_eig_w).real - np.abs(np.sqrt(_eig_w).imag)) / (2 * np.pi) / 10 ** 12  # THz
-            self.w_q[_ind_k, :] = self.w_q[_ind_k, np.argsort(self.w_q[_ind_k, :])]
-            self.v_q[_ind_k, :, :] = self.v_q[_ind_k, np.argsort(self.w_q[_ind_k, :]), :]
-            _ind_k = _ind_k + 1
+        for _ind_k, k_point in enumerate(self.k_points):
+            self.dyn_matrix[_ind_k, :, :], self.w_q[_ind_k, :], self.v_q[_ind_k, :, :] = self.eval_k_point(k_point)
 
         if _ind_pbc.shape[0] == 0:
             with open('./freqency_at_gamma_point.dat', 'w') as outfile:
@@ -0,0 +1,86 @@
+import os
+import glob
+import numpy as np
+import unittest
+from types import SimpleNamespace
+
+from InterPhon.core import PostProcess
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..',
+                       'example', '2_adsorption_Cu_O', '111_pristine', 'FORCE_3Layer', 'Symmetry_ON')
+
+
+def eval_k_point(k_point):
+    # Two bands of fixed eigen-modes, one dispersive and the other flat, which cross each other at k = 1/6.
+    _w = np.array([4 * np.sin(np.pi * k_point[0]), 2.0])
+    _v = np.eye(2, dtype=complex)
+    _order = np.argsort(_w)
+    return np.zeros((2, 2), dtype=complex), _w[_order], _v[_order]
+
+
+class TestPostProcess(unittest.TestCase):
+    def setUp(self):
+        k_points = [np.array([ratio, 0.0, 0.0]) for ratio in np.linspace(0, 0.5, 6)]
+        _new = [eval_k_point(k_point) for k_point in k_points]
+        self.process = SimpleNamespace(k_points=k_points,
+                                       image_pos=np.zeros((1, 1, 3)),
+                                       reciprocal_matrix=np.eye(3),
+                                       dyn_matrix=np.array([_value[0] for _value in _new]),
+                                       w_q=np.array([_value[1] for _value in _new]),
+                                       v_q=np.array([_value[2] for _value in _new]),
+                                       eval_k_point=eval_k_point)
+
+    def test_refine_k_path(self):
+        num_insert = PostProcess.refine_k_path(self.process, tolerance=0.01, max_level=8)
+
+        _k = np.array(self.process.k_points)[:, 0]
+        self.assertEqual(len(_k), 6 + num_insert)
+        self.assertTrue((np.diff(_k) > 0).all())
+        self.assertTrue(np.allclose(self.process.w_q, [eval_k_point(k_point)[1] for k_point in self.process.k_points]))
+
+        # The refined path is denser around the band-crossing than at the flat top of the dispersive band.
+        _step = np.diff(_k)
+        self.assertLess(_step[np.searchsorted(_k, 1 / 6) - 1], _step[-1])
+
+        _dense = np.linspace(0, 0.5, 501)
+        _ref = np.array([eval_k_point(np.array([k, 0.0, 0.0]))[1] for k in _dense])
+        for _band in range(2):
+            self.assertLess(abs(np.interp(_dense, _k, self.process.w_q[:, _band]) - _ref[:, _band]).max(), 0.02)
+
+    def test_converged(self):
+        num_insert = PostProcess.refine_k_path(self.process, tolerance=10.0)
+        self.assertEqual(num_insert, 0)
+        self.assertEqual(len(self.process.k_points), 6)
+
+
+class TestEvalPhonon(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.process = PostProcess(in_file_unit_cell=os.path.join(EXAMPLE, 'POSCAR'),
+                                  in_file_super_cell=os.path.join(EXAMPLE, 'SUPERCELL'),
+                                  code_name='vasp')
+        cls.process.set_user_arg({'displacement': 0.02, 'enlargement': '4 4 1', 'periodicity': '1 1 0'})
+        cls.process.set_reciprocal_lattice()
+        cls.process.set_force_constant(sorted(glob.glob(os.path.join(EXAMPLE, 'FORCE-*', 'vasprun.xml'))),
+                                       code_name='vasp', sym_flag=True)
+        cls.process.set_k_points(os.path.join(EXAMPLE, 'KPOINTS_band'))
+        cls.process.eval_phonon()
+
+    def test_sorted_frequency(self):
+        self.assertTrue((np.diff(self.process.w_q, axis=1) >= 0).all())
+
+    def test_eigen_vector_row(self):
+        # Each row of eigen-mode is the eigen-vector of dynamical matrix, whose eigenvalue gives the eigen-frequency of the band.
+        for _ind_k in range(len(self.process.k_points)):
+            _dyn_matrix = self.process.dyn_matrix[_ind_k]
+            _scale = np.abs(_dyn_matrix).max()
+            for _band, _vec in enumerate(self.process.v_q[_ind_k]):
+                _eig = np.vdot(_vec, _dyn_matrix @ _vec) / np.vdot(_vec, _vec)
+                self.assertTrue(np.allclose(_dyn_matrix @ _vec, _eig * _vec, rtol=0, atol=1e-10 * _scale))
+
+                _w = (np.sqrt(_eig).real - np.abs(np.sqrt(_eig).imag)) / (2 * np.pi) / 10 ** 12
+                self.assertAlmostEqual(_w, self.process.w_q[_ind_k, _band], places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,12 @@
 """
 InterPhon inout sub-package.
 
-This sub-package consists of following three modules:
+This sub-package consists of following four modules:
 
 vasp.py -> Collection of parser functions to read and write the input (or output) files of VASP code.
 espresso.py -> Collection of parser functions to read and write the input (or output) files of Quantum Espresso code.
 aims.py -> Collection of parser functions to read and write the input (or output) files of FHI-aims code.
+results.py -> Collection of functions to store the results of post-process in binary container and text files.
 """
 
-__all__ = ["vasp", "espresso", "aims"]
+__all__ = ["vasp", "espresso", "aims", "results"]
@@ -0,0 +1,312 @@
+"""
+Collection of functions to store the results of post-process in a binary container, and to write them in text (.dat) files.
+
+The container is either a directory of .npy files, which can be memory-mapped by :class:`inout.results.read_results`,
+or a single compressed .npz file. The metadata of post-process is stored in JSON format along with the arrays.
+"""
+import io
+import os
+import gzip
+import json
+import numpy as np
+from typing import List
+
+
+def write_table(out_file: str,
+                comment: str,
+                header: str,
+                table: np.ndarray,
+                fmt: str = ' %16.9f ',
+                compress: bool = False,
+                chunk_size: int = 2**16) -> str:
+    """
+    Write a table of numbers in the text file with a comment line and a header line.
+    The rows are formatted block by block, each of which is formatted at once by a single format string,
+    and written through a large buffer (optionally, gzip-compressed in the file name with .gz extension).
+    The (decompressed) text is identical to that formatted number by number.
+
+    :param out_file: Path of the text file
+    :type out_file: str
+    :param comment: Comment line
+    :type comment: str
+    :param header: Header line of columns
+    :type header: str
+    :param table: '(num_row, num_column) size' table
+    :type table: np.ndarray[float]
+    :param fmt: Format of each number, defaults to ' %16.9f '
+    :type fmt: str
+    :param compress: Write in gzip-compressed file (True) or not (False), defaults to False
+    :type compress: bool
+    :param chunk_size: The maximum number of values formatted at once, defaults to 2**16
+    :type chunk_size: int
+    :return: Path of the written file
+    :rtype: str
+    """
+    table = np.asarray(table, dtype=float)
+    row_format = fmt * table.shape[1] + '\n'
+    _block = max(1, chunk_size // max(table.shape[1], 1))
+
+    if compress:
+        out_file = out_file + '.gz'
+        # The fastest compression level is used, since the numeric text is compressed well enough at this level,
+        # and the modification time is fixed, so that the same table is compressed into the same bytes.
+        outfile = io.TextIOWrapper(gzip.GzipFile(out_file, 'wb', compresslevel=1, mtime=0))
+    else:
+        outfile = open(out_file, 'w', buffering=2**20)
+
+    with outfile:
+        outfile.write("%s" % comment + '\n')
+        outfile.write("%s" % header + '\n')
+
+        for _start in range(0, table.shape[0], _block):
+            _rows = table[_start:_start + _block]
+            outfile.write((row_format * _rows.shape[0]) % tuple(_rows.reshape(-1).tolist()))
+
+    return out_file
+
+
+def write_band_dat(out_folder: str,
+                   k_points_length: np.ndarray,
+                   w_q: np.ndarray,
+                   cartesian: bool = False,
+                   compress: bool = False) -> None:
+    """
+    Write phonon Band in the file name of **band.dat**.
+
+    :param out_folder: Folder path for **band.dat** to be stored
+    :type out_folder: str
+    :param k_points_length: '(num_k_points,) size' length along the k-path
+    :type k_points_length: np.ndarray[float]
+    :param w_q: '(num_k_points, num_band) size' eigen-frequency (unit: THz)
+    :type w_q: np.ndarray[float]
+    :param cartesian: Whether the length is in Cartesian unit (1/Angstrom) or not, defaults to False
+    :type cartesian: bool
+    :param compress: Write in gzip-compressed file (True) or not (False), defaults to False
+    :type compress: bool
+    """
+    if cartesian:
+        header = '    K_Points_Path (1/Angstrom)' + '    Frequency (THz)'
+    else:
+        header = '    K_Points_Path' + '    Frequency (THz)'
+
+    write_table(out_folder + '/band.dat', "Phonon Band", header,
+                np.column_stack((k_points_length, w_q)), compress=compress)
+
+
+def write_dos_dat(out_folder: str,
+                  freq: np.ndarray,
+                  tdos: np.ndarray,
+                  pdos: np.ndarray,
+                  xyz_true: List[int],
+                  method: str,
+                  compress: bool = False) -> None:
+    """
+    Write total and projected DOSs in the file name of **total_dos.dat** and **projected_dos.dat**, respectively.
+
+    :param out_folder: Folder path for **total_dos.dat** and **projected_dos.dat** to be stored
+    :type out_folder: str
+    :param freq: '(num_dos,) size' frequency (unit: THz)
+    :type freq: np.ndarray[float]
+    :param tdos: '(num_dos,) size' total DOS
+    :type tdos: np.ndarray[float]
+    :param pdos: '(len(xyz_true), num_dos) size' projected DOS
+    :type pdos: np.ndarray[float]
+    :param xyz_true: Index of atom for each (x, y, z) component of selected atoms
+    :type xyz_true: List[int]
+    :param method: Description of the method of DOS evaluation (e.g., Gaussian Smearing with Sigma = 0.100000)
+    :type method: str
+    :param compress: Write in gzip-compressed files (True) or not (False), defaults to False
+    :type compress: bool
+    """
+    write_table(out_folder + '/total_dos.dat', "Total phonon DOS by " + method,
+                '    Frequency (THz)' + '    Total_Density_of_State',
+                np.column_stack((freq, tdos)), compress=compress)
+
+    header = "%s" % '    Frequency (THz)'
+    for _xyz_true in xyz_true:
+        header += '   pdos-atom-{0:0>3}  '.format(_xyz_true)
+    write_table(out_folder + '/projected_dos.dat', "Projected phonon DOS by " + method, header,
+                np.column_stack((freq, np.transpose(pdos))), compress=compress)
+
+
+def write_thermal_dat(out_folder: str,
+                      temp: np.ndarray,
+                      free_energy: np.ndarray,
+                      entropy: np.ndarray,
+                      internal_energy: np.ndarray,
+                      heat_capacity: np.ndarray,
+                      compress: bool = False) -> None:
+    """
+    Write thermal properties in the file name of **thermal_properties.dat**.
+
+    :param out_folder: Folder path for **thermal_properties.dat** to be stored
+    :type out_folder: str
+    :param temp: Temperatures (unit: K)
+    :type temp: np.ndarray[float]
+    :param free_energy: Free energy (unit: eV/atom)
+    :type free_energy: np.ndarray[float]
+    :param entropy: Entropy (unit: eV/K/atom)
+    :type entropy: np.ndarray[float]
+    :param internal_energy: Internal energy (unit: eV/atom)
+    :type internal_energy: np.ndarray[float]
+    :param heat_capacity: Heat capacity (unit: eV/K/atom)
+    :type heat_capacity: np.ndarray[float]
+    :param compress: Write in gzip-compressed file (True) or not (False), defaults to False
+    :type compress: bool
+    """
+    header = '    Temperature (K)' + \
+             '    Free_energy (eV/atom)' + \
+             '    Entropy (meV/K/atom)' + \
+             '    Internal_energy (eV/atom)' + \
+             '    Heat_capacity (meV/K/atom)'
+    write_table(out_folder + '/thermal_properties.dat', "Thermal Properties / atom", header,
+                np.column_stack((temp, free_energy, entropy * 1000, internal_energy, heat_capacity * 1000)),
+                fmt=' %20.9f ', compress=compress)
+
+
+def write_results(out_path: str,
+                  process,
+                  dos=None,
+                  band=None,
+                  thermal=None,
+                  eigen_vector: bool = False,
+                  compress: bool = False) -> str:
+    """
+    Store the results of post-process in a binary container:
+    k-points, weights, eigen-frequency, (optionally) eigen-mode, DOS, Band, and thermal properties with metadata.
+    The container is a directory of .npy files (compress=False), or a compressed .npz file (compress=True).
+
+    :param out_path: Path of the container
+    :type out_path: str
+    :param process: Instance of PostProcess class
+    :type process: :class:`core.PostProcess`
+    :param dos: Instance of DOS class, defaults to None
+    :type dos: :class:`analysis.DOS`
+    :param band: Instance of Band class, defaults to None
+    :type band: :class:`analysis.Band`
+    :param thermal: Instance of ThermalProperty class, defaults to None
+    :type thermal: :class:`analysis.ThermalProperty`
+    :param eigen_vector: Store eigen-mode (True) or not (False), defaults to False
+    :type eigen_vector: bool
+    :param compress: Store in a compressed .npz file (True) or a directory of .npy files (False), defaults to False
+    :type compress: bool
+    :return: Path of the container
+    :rtype: str
+    """
+    from InterPhon import __version__
+
+    _k_points = np.array(process.k_points, dtype=float).reshape((-1, 3))
+    arrays = {'k_points': _k_points,
+              'weights': np.full((_k_points.shape[0],), 1.0 / max(_k_points.shape[0], 1)),
+              'w_q': process.w_q}
+    metadata = {'version': __version__,
+                'lattice_matrix': np.asarray(process.unit_cell.lattice_matrix).tolist(),
+                'atom_type': list(process.unit_cell.atom_type),
+                'xyz_true': [int(value) for value in process.unit_cell.xyz_true],
+                'enlargement': [int(value) for value in process.user_arg.enlargement],
+                'periodicity': [int(value) for value in process.user_arg.periodicity],
+                'contents': ['k_points', 'weights', 'w_q']}
+    if eigen_vector:
+        arrays['v_q'] = process.v_q
+        metadata['contents'].append('v_q')
+
+    if dos is not None:
+        arrays.update({'dos_freq': dos.freq, 'dos_tdos': dos.tdos, 'dos_pdos': dos.pdos})
+        metadata['dos_method'] = dos.method_label()
+        metadata['contents'].append('dos')
+
+    if band is not None:
+        arrays.update({'band_k_points_length': band.k_points_length, 'band_w_q': band.w_q[:, band.ind_band]})
+        metadata['band_cartesian'] = bool(band.cartesian)
+        metadata['band_ind_high_sym'] = [int(value) for value in band.ind_high_sym]
+        metadata['contents'].append('band')
+
+    if thermal is not None:
+        arrays.update({'thermal_temp': thermal.temp,
+                       'thermal_free_energy': thermal.free_energy,
+                       'thermal_entropy': thermal.entropy,
+                       'thermal_internal_energy': thermal.internal_energy,
+                       'thermal_heat_capacity': thermal.heat_capacity})
+        metadata['contents'].append('thermal')
+
+    if compress:
+        if not out_path.endswith('.npz'):
+            out_path = out_path + '.npz'
+        with open(out_path, 'wb') as outfile:
+            np.savez_compressed(outfile, metadata=np.array(json.dumps(metadata)), **arrays)
+    else:
+        os.makedirs(out_path, exist_ok=True)
+        for key, value in arrays.items():
+            np.save(os.path.join(out_path, key + '.npy'), np.asarray(value))
+        with open(os.path.join(out_path, 'metadata.json'), 'w') as outfile:
+            json.dump(metadata, outfile, indent=2)
+
+    return out_path
+
+
+def read_results(in_path: str,
+                 mmap_mode: str = 'r') -> dict:
+    """
+    Read the binary container stored by :class:`inout.results.write_results`.
+    The arrays in a directory container are memory-mapped, so that only the accessed parts are read from disk.
+
+    :param in_path: Path of the container
+    :type in_path: str
+    :param mmap_mode: Memory-map mode of numpy.load for a directory container, defaults to r
+    :type mmap_mode: str
+    :return: Dictionary of the arrays and metadata (key: 'metadata')
+    :rtype: dict
+    """
+    if os.path.isdir(in_path):
+        with open(os.path.join(in_path, 'metadata.json'), 'r') as infile:
+            results = {'metadata': json.load(infile)}
+        for file_name in sorted(os.listdir(in_path)):
+            if file_name.endswith('.npy'):
+                results[file_name[:-4]] = np.load(os.path.join(in_path, file_name), mmap_mode=mmap_mode)
+    else:
+        with np.load(in_path) as data:
+            results = {key: data[key] for key in data.files}
+        results['metadata'] = json.loads(str(results['metadata']))
+
+    return results
+
+
+def export_dat(in_path: str,
+               out_folder: str = '.',
+               compress: bool = False) -> List[str]:
+    """
+    Export the contents of binary container to the text files,
+    **band.dat**, **total_dos.dat**, **projected_dos.dat**, and **thermal_properties.dat**.
+
+    :param in_path: Path of the container
+    :type in_path: str
+    :param out_folder: Folder path for the text files to be stored, defaults to .
+    :type out_folder: str
+    :param compress: Write in gzip-compressed files (True) or not (False), defaults to False
+    :type compress: bool
+    :return: Names of the exported text files
+    :rtype: List[str]
+    """
+    results = read_results(in_path)
+    metadata = results['metadata']
+
+    out_files = []
+    if 'band' in metadata['contents']:
+        write_band_dat(out_folder, results['band_k_points_length'], results['band_w_q'],
+                       cartesian=metadata['band_cartesian'], compress=compress)
+        out_files.append('band.dat')
+
+    if 'dos' in metadata['contents']:
+        write_dos_dat(out_folder, results['dos_freq'], results['dos_tdos'], results['dos_pdos'],
+                      metadata['xyz_true'], metadata['dos_method'], compress=compress)
+        out_files.extend(['total_dos.dat', 'projected_dos.dat'])
+
+    if 'thermal' in metadata['contents']:
+        write_thermal_dat(out_folder, results['thermal_temp'], results['thermal_free_energy'],
+                          results['thermal_entropy'], results['thermal_internal_energy'],
+                          results['thermal_heat_capacity'], compress=compress)
+        out_files.append('thermal_properties.dat')
+
+    if compress:
+        out_files = [out_file + '.gz' for out_file in out_files]
+    return out_files
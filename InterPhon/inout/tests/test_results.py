@@ -0,0 +1,92 @@
+import os
+import gzip
+import filecmp
+import tempfile
+import numpy as np
+import unittest
+from types import SimpleNamespace
+
+from InterPhon.inout.results import write_results, read_results, export_dat
+from InterPhon.inout.results import write_table, write_band_dat, write_dos_dat, write_thermal_dat
+
+
+class TestResults(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.RandomState(0)
+        k_points = [np.array([ratio, 0.0, 0.0]) for ratio in np.linspace(0, 0.5, 5)]
+        cls.process = SimpleNamespace(k_points=k_points,
+                                      w_q=np.sort(rng.uniform(0.0, 8.0, (5, 3)), axis=1),
+                                      v_q=rng.normal(size=(5, 3, 3)) + 1j * rng.normal(size=(5, 3, 3)),
+                                      unit_cell=SimpleNamespace(lattice_matrix=np.eye(3), atom_type=['Cu'], xyz_true=[0, 0, 0]),
+                                      user_arg=SimpleNamespace(enlargement=np.array([4, 4, 1]), periodicity=np.array([1, 1, 0])))
+        cls.dos = SimpleNamespace(freq=np.linspace(0, 8, 11), tdos=rng.uniform(size=11), pdos=rng.uniform(size=(3, 11)),
+                                  method_label=lambda: "Gaussian Smearing with Sigma = 0.100000")
+        cls.band = SimpleNamespace(k_points_length=np.linspace(0, 1, 5), w_q=cls.process.w_q, ind_band=np.arange(3),
+                                   cartesian=False, ind_high_sym=[0, 4])
+        cls.thermal = SimpleNamespace(temp=np.arange(0, 100, 10), free_energy=rng.normal(size=10),
+                                      entropy=rng.uniform(size=10), internal_energy=rng.normal(size=10),
+                                      heat_capacity=rng.uniform(size=10))
+
+    def test_write_read(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for compress in (False, True):
+                out_path = write_results(os.path.join(tmp_dir, 'results'), self.process, dos=self.dos,
+                                         eigen_vector=True, compress=compress)
+                results = read_results(out_path)
+
+                self.assertEqual(out_path.endswith('.npz'), compress)
+                self.assertListEqual(results['metadata']['contents'], ['k_points', 'weights', 'w_q', 'v_q', 'dos'])
+                self.assertListEqual(results['metadata']['periodicity'], [1, 1, 0])
+                self.assertTrue(np.allclose(results['k_points'], self.process.k_points))
+                self.assertTrue(np.allclose(results['weights'], 0.2))
+                self.assertTrue(np.allclose(results['v_q'], self.process.v_q))
+                self.assertTrue(np.allclose(results['dos_pdos'], self.dos.pdos))
+                self.assertNotIn('band_w_q', results)
+
+            self.assertIsInstance(read_results(os.path.join(tmp_dir, 'results'))['w_q'], np.memmap)
+
+    def test_write_table(self):
+        table = np.random.RandomState(1).normal(size=(1000, 7)) * 1e3
+        table[0, 0:3] = [np.nan, np.inf, -0.0]
+        _text = "comment\nheader\n" + "".join(["".join([' %16.9f ' % value for value in row]) + '\n' for row in table])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_file = write_table(os.path.join(tmp_dir, 'table.dat'), "comment", "header", table, chunk_size=100)
+            with open(out_file, 'r') as infile:
+                self.assertEqual(infile.read(), _text)
+
+            out_file = write_table(os.path.join(tmp_dir, 'table.dat'), "comment", "header", table, compress=True)
+            self.assertTrue(out_file.endswith('table.dat.gz'))
+            with gzip.open(out_file, 'rt') as infile:
+                self.assertEqual(infile.read(), _text)
+
+    def test_export_dat(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_path = write_results(os.path.join(tmp_dir, 'results'), self.process,
+                                     dos=self.dos, band=self.band, thermal=self.thermal, compress=True)
+            os.mkdir(os.path.join(tmp_dir, 'export'))
+            out_files = export_dat(out_path, os.path.join(tmp_dir, 'export'))
+
+            write_band_dat(tmp_dir, self.band.k_points_length, self.band.w_q, cartesian=False)
+            write_dos_dat(tmp_dir, self.dos.freq, self.dos.tdos, self.dos.pdos, [0, 0, 0], self.dos.method_label())
+            write_thermal_dat(tmp_dir, self.thermal.temp, self.thermal.free_energy, self.thermal.entropy,
+                              self.thermal.internal_energy, self.thermal.heat_capacity)
+
+            self.assertListEqual(out_files, ['band.dat', 'total_dos.dat', 'projected_dos.dat', 'thermal_properties.dat'])
+            for out_file in out_files:
+                self.assertTrue(filecmp.cmp(os.path.join(tmp_dir, out_file), os.path.join(tmp_dir, 'export', out_file),
+                                            shallow=False))
+
+            with open(os.path.join(tmp_dir, 'export', 'total_dos.dat'), 'r') as infile:
+                self.assertEqual(infile.readline().strip(), "Total phonon DOS by Gaussian Smearing with Sigma = 0.100000")
+
+            out_files = export_dat(out_path, os.path.join(tmp_dir, 'export'), compress=True)
+            self.assertListEqual(out_files, ['band.dat.gz', 'total_dos.dat.gz', 'projected_dos.dat.gz', 'thermal_properties.dat.gz'])
+            with gzip.open(os.path.join(tmp_dir, 'export', 'band.dat.gz'), 'rb') as infile:
+                with open(os.path.join(tmp_dir, 'band.dat'), 'rb') as reference:
+                    self.assertEqual(infile.read(), reference.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
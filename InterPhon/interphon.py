@@ -699,6 +699,10 @@ def main(force_files, option_file, process,
         print('\tThis is post-process...')
         print('#########################################')
 
+        # Figures are only saved (not shown) in batch jobs without display.
+        from InterPhon.util import set_batch_backend
+        set_batch_backend()
+
         if dos_args.get('flag', False):
             # define process
             print('\n>>>>>> Defining process for DOS...')
@@ -848,9 +852,7 @@ def main(force_files, option_file, process,
                 post_band.mode = Mode(process=post_band)
                 post_band.mode.set(mode_inds=mode_args.get('index'), k_point=mode_args.get('k_point'))
                 post_band.mode.write(out_folder=working_dir)
-                post_band.mode.plot(out_folder=working_dir,
-                                    unit_cell=files.get('unit_cell_file'),
-                                    code_name=user_args.get('dft_code'))
+                post_band.mode.plot(out_folder=working_dir)
                 if mode_args['write_disp']:
                     print('Commensurate supercell files with displacement along normal mode are written... ---> MPOSCAR-[mode_index]')
                     post_band.mode.write_mode_displace(amplitude=mode_args['displacement_amplitude'],
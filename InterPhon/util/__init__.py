@@ -1,24 +1,30 @@
 """
 InterPhon utility sub-package.
 
-This sub-package consists of following five modules:
+This sub-package consists of following seven modules:
 
 atomic_weight.py -> Dictionary of atomic weight collections.
 typing.py -> Defined typing formats of arguments to increase readability.
 linear_tetrahedron_method.py -> Function collection of 1D, 2D, and 3D version of linear tetrahedron method.
+kernel_polynomial_method.py -> Function collection of stochastic kernel polynomial method for spectral density.
 k_points.py -> Function collection to sample the points in Brillouin Zone.
 symmetry.py -> Searching and leveraging in-plane symmetry operations.
+render.py -> Function collection to render figures in batch mode.
 """
 
 from .atomic_weight import get_atomic_weight
 from .typing import MatrixLike, AtomType, SelectIndex, FilePath, File, KptPath
-from .linear_tetrahedron_method import tetrahedron_1d, tetrahedron_2d, tetrahedron_3d
+from .linear_tetrahedron_method import tetrahedron_1d, tetrahedron_2d, tetrahedron_3d, tetrahedron_parallel
+from .kernel_polynomial_method import spectral_bound, chebyshev_moment, jackson_kernel, kpm_density
 from .k_points import gamma_centered, monkhorst_pack, line_path, explicit_reciprocal
 from .symmetry import Symmetry2D
+from .render import set_batch_backend, branch_collection, save_figure, render_parallel
 
-__all__ = ["atomic_weight", "typing", "linear_tetrahedron_method", "k_points", "symmetry",
+__all__ = ["atomic_weight", "typing", "linear_tetrahedron_method", "kernel_polynomial_method", "k_points", "symmetry", "render",
            "get_atomic_weight",
            "MatrixLike", "AtomType", "SelectIndex", "FilePath", "File", "KptPath",
-           "tetrahedron_1d", "tetrahedron_2d", "tetrahedron_3d",
+           "tetrahedron_1d", "tetrahedron_2d", "tetrahedron_3d", "tetrahedron_parallel",
+           "spectral_bound", "chebyshev_moment", "jackson_kernel", "kpm_density",
            "gamma_centered", "monkhorst_pack", "line_path", "explicit_reciprocal",
-           "Symmetry2D"]
+           "Symmetry2D",
+           "set_batch_backend", "branch_collection", "save_figure", "render_parallel"]
@@ -0,0 +1,115 @@
+"""
+For more details on the demonstrated formula below, please find the following reference:
+
+Ref 1) The kernel polynomial method,
+Reviews of Modern Physics 78, 275 (2006).
+"""
+import numpy as np
+
+
+def spectral_bound(matrix: np.ndarray) -> tuple:
+    """
+    Lower and upper bounds of the eigenvalues of hermitian matrix by Gershgorin circle theorem.
+
+    :param matrix: '(num_mode, num_mode) size' hermitian matrix
+    :type matrix: np.ndarray[complex]
+    :return: A set of (lower bound, upper bound)
+    :rtype: tuple
+    """
+    _center = matrix.diagonal().real
+    _radius = abs(matrix).sum(axis=1) - abs(matrix.diagonal())
+    return np.min(_center - _radius), np.max(_center + _radius)
+
+
+def chebyshev_moment(matrix: np.ndarray,
+                     bound: tuple,
+                     num_moment: int = 200,
+                     num_vector: int = 16,
+                     rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Chebyshev moments, mu_m[j] = [T_m(H)]_jj, of the rescaled matrix H = (matrix - b) / a for each diagonal component,
+    which are estimated by the stochastic trace over random phase vectors r: mu_m[j] ~ < r_j^* [T_m(H) r]_j >.
+    Only the matrix-vector products, T_m+1(H) r = 2 H T_m(H) r - T_m-1(H) r, are required.
+
+    :param matrix: '(num_mode, num_mode) size' hermitian matrix
+    :type matrix: np.ndarray[complex]
+    :param bound: A set of (lower bound, upper bound) of the eigenvalues of matrix
+    :type bound: tuple
+    :param num_moment: The number of Chebyshev moments, defaults to 200
+    :type num_moment: int
+    :param num_vector: The number of random phase vectors, defaults to 16
+    :type num_vector: int
+    :param rng: Random number generator (if None: unseeded generator), defaults to None
+    :type rng: np.random.Generator
+    :return: '(num_moment, num_mode) size' Chebyshev moments for each diagonal component
+    :rtype: np.ndarray[float]
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    _a, _b = _rescale(bound)
+
+    _vector = np.exp(2j * np.pi * rng.random((matrix.shape[0], num_vector)))
+    _moment = np.empty((num_moment, matrix.shape[0]))
+
+    _prev = _vector
+    _curr = (np.dot(matrix, _vector) - _b * _vector) / _a
+    _moment[0] = 1.0
+    if num_moment > 1:
+        _moment[1] = np.mean((_vector.conj() * _curr).real, axis=1)
+    for m in range(2, num_moment):
+        _prev, _curr = _curr, 2 * (np.dot(matrix, _curr) - _b * _curr) / _a - _prev
+        _moment[m] = np.mean((_vector.conj() * _curr).real, axis=1)
+
+    return _moment
+
+
+def jackson_kernel(num_moment: int) -> np.ndarray:
+    """
+    Jackson kernel damping the Gibbs oscillation of truncated Chebyshev series.
+
+    :param num_moment: The number of Chebyshev moments
+    :type num_moment: int
+    :return: '(num_moment,) size' kernel coefficients
+    :rtype: np.ndarray[float]
+    """
+    m = np.arange(num_moment)
+    _q = np.pi / (num_moment + 1)
+    return ((num_moment - m + 1) * np.cos(m * _q) + np.sin(m * _q) / np.tan(_q)) / (num_moment + 1)
+
+
+def kpm_density(moment: np.ndarray,
+                eig: np.ndarray,
+                bound: tuple) -> np.ndarray:
+    """
+    Spectral density of each diagonal component reconstructed from the Chebyshev moments with Jackson kernel:
+    rho_j(x) = [g_0 mu_0[j] + 2 sum_m g_m mu_m[j] T_m(x)] / (pi a sqrt(1 - x ** 2)) with x = (eig - b) / a.
+
+    :param moment: '(num_moment, num_mode) size' Chebyshev moments for each diagonal component
+    :type moment: np.ndarray[float]
+    :param eig: '(num_dos,) size' eigenvalues where the density will be evaluated
+    :type eig: np.ndarray[float]
+    :param bound: A set of (lower bound, upper bound) of the eigenvalues used for the moments
+    :type bound: tuple
+    :return: '(num_mode, num_dos) size' spectral density for each diagonal component
+    :rtype: np.ndarray[float]
+    """
+    _a, _b = _rescale(bound)
+    _x = (eig - _b) / _a
+    _inside = abs(_x) < 1
+    _theta = np.arccos(np.clip(_x, -1, 1))
+
+    _kernel = jackson_kernel(moment.shape[0])
+    _kernel[1:] = 2 * _kernel[1:]
+    _chebyshev = np.cos(np.arange(moment.shape[0])[:, np.newaxis] * _theta[np.newaxis, :])
+
+    _density = np.dot((moment * _kernel[:, np.newaxis]).T, _chebyshev)
+    _density[:, _inside] = _density[:, _inside] / (np.pi * _a * np.sqrt(1 - _x[_inside] ** 2))
+    _density[:, ~_inside] = 0.0
+    return _density
+
+
+def _rescale(bound: tuple,
+             epsilon: float = 0.01) -> tuple:
+    # Rescale factors, a and b, that map the bounded eigenvalues into (-1 + epsilon / 2, 1 - epsilon / 2).
+    _width = max(bound[1] - bound[0], np.finfo(float).tiny)
+    return _width / (2 - epsilon), (bound[1] + bound[0]) / 2
@@ -6,8 +6,10 @@ Journal of Physics C 12, 2991 (1979).
 Ref 2) FermiSurfer: Fermi-surface viewer providing multiple representation schemes,
 Computer Physics Communications 239, 197 (2019).
 """
+import os
 import numpy as np
-from typing import List
+from multiprocessing import Pool
+from typing import List, Callable
 
 
 def tetrahedron_1d(_freq: np.ndarray,
@@ -48,32 +50,52 @@ def tetrahedron_1d(_freq: np.ndarray,
     length_bz = 1.0 ** 1
     length_ith = np.sqrt(np.dot(k_points[1 % num_1st_kpt] - k_points[0], k_points[1 % num_1st_kpt] - k_points[0]))
 
-    for ind_x, __freq in enumerate(_freq):
-        for ind_freq in range(v_q.shape[1]):
-            _w_q = w_q[:, ind_freq]
-            _v_q = v_q[:, ind_freq, :]
-            for ind_1st_kpt in range(num_1st_kpt):
-                # line 1: 0-1
-                # for ind_mode in range(v_q.shape[2]):
-                __w0 = _w_q[ind_1st_kpt]
-                __F0 = abs(_v_q[ind_1st_kpt, :]) ** 2
-                __w1 = _w_q[(ind_1st_kpt + 1) % num_1st_kpt]
-                __F1 = abs(_v_q[(ind_1st_kpt + 1) % num_1st_kpt, :]) ** 2
-
-                __w0, __w1 = np.asfarray([__w0, __w1])[np.argsort(np.asfarray([__w0, __w1]))]
-                __F0, __F1 = np.asfarray([__F0, __F1])[np.argsort(np.asfarray([__w0, __w1])), :]
-
-                if __w0 <= __freq < __w1:
-                    __g = 1.0 / (__w1 - __w0)
-
-                    __I0 = (__freq - __w1) / (__w0 - __w1)
-                    __I1 = (__freq - __w0) / (__w1 - __w0)
-
-                    _pdos[:, ind_x] += length_ith / length_bz * __g \
-                                                 * (__I0 * __F0 + __I1 * __F1)
-
-                else:
-                    pass
+    # Within a line, the contribution, length_ith / length_bz * g * (I0 * F0 + I1 * F1), is linear in freq:
+    # (A + B * freq) with A = (w1 * F0 - w0 * F1) * c, B = (F1 - F0) * c, c = length_ith / length_bz / (w1 - w0) ** 2.
+    # A and B are added at the first covered frequency and subtracted after the last one,
+    # so that a single cumulative sum over frequencies collects all lines.
+    # Lines covering only one frequency point (possibly with w1 ~ w0) are added directly without the cumulative sum.
+    _ind_line = _segment_index(num_1st_kpt)
+    _A = np.zeros((v_q.shape[2], _freq.shape[0] + 1))
+    _B = np.zeros((v_q.shape[2], _freq.shape[0] + 1))
+
+    for ind_freq in range(v_q.shape[1]):
+        _w, _ind_vertex = _sort_vertex(w_q[:, ind_freq][_ind_line], _ind_line)
+        __w0, __w1 = _w[:, 0], _w[:, 1]
+
+        _lower = np.searchsorted(_freq, __w0, side='left')
+        _upper = np.searchsorted(_freq, __w1, side='left')
+        _count = _upper - _lower
+        if not np.any(_count > 0):
+            continue
+
+        # w0 <= freq < w1, one frequency point
+        _mask = _count == 1
+        _F = abs(v_q[_ind_vertex[_mask], ind_freq, :]) ** 2
+        __e, __w0_, __w1_ = _freq[_lower[_mask]], __w0[_mask], __w1[_mask]
+        __g = 1.0 / (__w1_ - __w0_)
+
+        __I0 = (__e - __w1_) / (__w0_ - __w1_)
+        __I1 = (__e - __w0_) / (__w1_ - __w0_)
+
+        _add_contribution(_pdos, _lower[_mask], _F, np.arange(_F.shape[0]),
+                          length_ith / length_bz * __g * np.array([__I0, __I1]))
+
+        # w0 <= freq < w1, more than one frequency point
+        _mask = _count > 1
+        _F = abs(v_q[_ind_vertex[_mask], ind_freq, :]) ** 2
+        __w0_, __w1_ = __w0[_mask, np.newaxis], __w1[_mask, np.newaxis]
+        __c = length_ith / length_bz / (__w1_ - __w0_) ** 2
+
+        __A = (__w1_ * _F[:, 0, :] - __w0_ * _F[:, 1, :]) * __c
+        __B = (_F[:, 1, :] - _F[:, 0, :]) * __c
+
+        _add_columns(_A, _lower[_mask], __A)
+        _add_columns(_A, _upper[_mask], -__A)
+        _add_columns(_B, _lower[_mask], __B)
+        _add_columns(_B, _upper[_mask], -__B)
+
+    _pdos += np.cumsum(_A, axis=1)[:, :-1] + np.cumsum(_B, axis=1)[:, :-1] * _freq
 
     return _pdos
 
@@ -84,7 +106,8 @@ def tetrahedron_2d(_freq: np.ndarray,
                    w_q: np.ndarray,
                    v_q: np.ndarray,
                    num_k_points: List[int],
-                   _ind_pbc: np.ndarray) -> np.ndarray:
+                   _ind_pbc: np.ndarray,
+                   chunk_size: int = 2 ** 20) -> np.ndarray:
     """
     The 2D version of linear tetrahedron method: **linear triangle method**.
 
@@ -102,6 +125,8 @@ def tetrahedron_2d(_freq: np.ndarray,
     :type num_k_points: List[int]
     :param _ind_pbc: Indices for the lattice direction of periodic boundary
     :type _ind_pbc: np.ndarray[int]
+    :param chunk_size: Maximum number of (triangle, frequency, mode) entries evaluated at once, defaults to 2 ** 20
+    :type chunk_size: int
     :return: '(num_mode, num_dos) size' partial DOS for each phonon mode
     :rtype: np.ndarray[float]
     """
@@ -130,93 +155,41 @@ def tetrahedron_2d(_freq: np.ndarray,
     area_bz = 1.0 ** 2
     area_ith = 1.0 / 2.0 * abs(np.dot(__tmp, np.cross(__k01, __k02)))
 
-    for ind_x, __freq in enumerate(_freq):
-        for ind_freq in range(v_q.shape[1]):
-            _w_q = w_q[:, ind_freq]
-            _v_q = v_q[:, ind_freq, :]
-            for ind_1st_kpt in range(num_1st_kpt):
-                for ind_2nd_kpt in range(num_2nd_kpt):
-                    # triangle 1: 0-1-3
-                    # for ind_mode in range(v_q.shape[2]):
-                    __w0 = _w_q[ind_1st_kpt * num_2nd_kpt +
-                                ind_2nd_kpt]
-                    __F0 = abs(_v_q[ind_1st_kpt * num_2nd_kpt +
-                                    ind_2nd_kpt, :]) ** 2
-                    __w1 = _w_q[ind_1st_kpt * num_2nd_kpt +
-                                (ind_2nd_kpt + 1) % num_2nd_kpt]
-                    __F1 = abs(_v_q[ind_1st_kpt * num_2nd_kpt +
-                                    (ind_2nd_kpt + 1) % num_2nd_kpt, :]) ** 2
-                    __w2 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt +
-                                (ind_2nd_kpt + 1) % num_2nd_kpt]
-                    __F2 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt +
-                                    (ind_2nd_kpt + 1) % num_2nd_kpt, :]) ** 2
-
-                    __w0, __w1, __w2 = np.asfarray([__w0, __w1, __w2])[np.argsort(np.asfarray([__w0, __w1, __w2]))]
-                    __F0, __F1, __F2 = np.asfarray([__F0, __F1, __F2])[np.argsort(np.asfarray([__w0, __w1, __w2])), :]
-
-                    if __w0 <= __freq < __w1:
-                        __g = 2 * (__freq - __w0) / (__w1 - __w0) / (__w2 - __w0)
-
-                        __I0 = 1.0 / 2.0 * ((__freq - __w1) / (__w0 - __w1) + (__freq - __w2) / (__w0 - __w2))
-                        __I1 = 1.0 / 2.0 * (__freq - __w0) / (__w1 - __w0)
-                        __I2 = 1.0 / 2.0 * (__freq - __w0) / (__w2 - __w0)
-
-                        _pdos[:, ind_x] += area_ith / area_bz * __g \
-                                                     * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2)
-
-                    elif __w1 <= __freq < __w2:
-                        __g = 2 * (__w2 - __freq) / (__w2 - __w1) / (__w2 - __w0)
-
-                        __I0 = 1.0 / 2.0 * (__freq - __w2) / (__w0 - __w2)
-                        __I1 = 1.0 / 2.0 * (__freq - __w2) / (__w1 - __w2)
-                        __I2 = 1.0 / 2.0 * ((__freq - __w0) / (__w2 - __w0) + (__freq - __w1) / (__w2 - __w1))
-
-                        _pdos[:, ind_x] += area_ith / area_bz * __g \
-                                                     * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2)
-
-                    else:
-                        pass
-
-                    # triangle 2: 0-2-3
-                    # for ind_mode in range(v_q.shape[2]):
-                    __w0 = _w_q[ind_1st_kpt * num_2nd_kpt +
-                                ind_2nd_kpt]
-                    __F0 = abs(_v_q[ind_1st_kpt * num_2nd_kpt +
-                                    ind_2nd_kpt, :]) ** 2
-                    __w1 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt +
-                                ind_2nd_kpt]
-                    __F1 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt +
-                                    ind_2nd_kpt, :]) ** 2
-                    __w2 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt +
-                                (ind_2nd_kpt + 1) % num_2nd_kpt]
-                    __F2 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt +
-                                    (ind_2nd_kpt + 1) % num_2nd_kpt, :]) ** 2
-
-                    __w0, __w1, __w2 = np.asfarray([__w0, __w1, __w2])[np.argsort(np.asfarray([__w0, __w1, __w2]))]
-                    __F0, __F1, __F2 = np.asfarray([__F0, __F1, __F2])[np.argsort(np.asfarray([__w0, __w1, __w2])), :]
-
-                    if __w0 <= __freq < __w1:
-                        __g = 2 * (__freq - __w0) / (__w1 - __w0) / (__w2 - __w0)
-
-                        __I0 = 1.0 / 2.0 * ((__freq - __w1) / (__w0 - __w1) + (__freq - __w2) / (__w0 - __w2))
-                        __I1 = 1.0 / 2.0 * (__freq - __w0) / (__w1 - __w0)
-                        __I2 = 1.0 / 2.0 * (__freq - __w0) / (__w2 - __w0)
-
-                        _pdos[:, ind_x] += area_ith / area_bz * __g \
-                                                     * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2)
-
-                    elif __w1 <= __freq < __w2:
-                        __g = 2 * (__w2 - __freq) / (__w2 - __w1) / (__w2 - __w0)
-
-                        __I0 = 1.0 / 2.0 * (__freq - __w2) / (__w0 - __w2)
-                        __I1 = 1.0 / 2.0 * (__freq - __w2) / (__w1 - __w2)
-                        __I2 = 1.0 / 2.0 * ((__freq - __w0) / (__w2 - __w0) + (__freq - __w1) / (__w2 - __w1))
-
-                        _pdos[:, ind_x] += area_ith / area_bz * __g \
-                                                     * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2)
-
-                    else:
-                        pass
+    # The triangles are built once from the grid index, and their vertices are sorted once per band.
+    _ind_triangle = _triangle_index(num_1st_kpt, num_2nd_kpt)
+    max_pairs = max(1, chunk_size // v_q.shape[2])
+
+    for ind_freq in range(v_q.shape[1]):
+        _w, _ind_vertex = _sort_vertex(w_q[:, ind_freq][_ind_triangle], _ind_triangle)
+
+        for _ind_simplex, _ind_local, _ind_x in _iter_pairs(_freq, _w[:, 0], _w[:, -1], max_pairs):
+            _F = abs(v_q[_ind_vertex[_ind_simplex], ind_freq, :]) ** 2
+            __freq = _freq[_ind_x]
+            __w0, __w1, __w2 = np.transpose(_w[_ind_simplex][_ind_local])
+
+            # w0 <= freq < w1
+            _mask = __freq < __w1
+            __e, __w0_, __w1_, __w2_ = __freq[_mask], __w0[_mask], __w1[_mask], __w2[_mask]
+            __g = 2 * (__e - __w0_) / (__w1_ - __w0_) / (__w2_ - __w0_)
+
+            __I0 = 1.0 / 2.0 * ((__e - __w1_) / (__w0_ - __w1_) + (__e - __w2_) / (__w0_ - __w2_))
+            __I1 = 1.0 / 2.0 * (__e - __w0_) / (__w1_ - __w0_)
+            __I2 = 1.0 / 2.0 * (__e - __w0_) / (__w2_ - __w0_)
+
+            _add_contribution(_pdos, _ind_x[_mask], _F, _ind_local[_mask],
+                              area_ith / area_bz * __g * np.array([__I0, __I1, __I2]))
+
+            # w1 <= freq < w2
+            _mask = ~_mask
+            __e, __w0_, __w1_, __w2_ = __freq[_mask], __w0[_mask], __w1[_mask], __w2[_mask]
+            __g = 2 * (__w2_ - __e) / (__w2_ - __w1_) / (__w2_ - __w0_)
+
+            __I0 = 1.0 / 2.0 * (__e - __w2_) / (__w0_ - __w2_)
+            __I1 = 1.0 / 2.0 * (__e - __w2_) / (__w1_ - __w2_)
+            __I2 = 1.0 / 2.0 * ((__e - __w0_) / (__w2_ - __w0_) + (__e - __w1_) / (__w2_ - __w1_))
+
+            _add_contribution(_pdos, _ind_x[_mask], _F, _ind_local[_mask],
+                              area_ith / area_bz * __g * np.array([__I0, __I1, __I2]))
 
     return _pdos
 
@@ -227,7 +200,8 @@ def tetrahedron_3d(_freq: np.ndarray,
                    w_q: np.ndarray,
                    v_q: np.ndarray,
                    num_k_points: List[int],
-                   _ind_pbc: np.ndarray) -> np.ndarray:
+                   _ind_pbc: np.ndarray,
+                   chunk_size: int = 2 ** 20) -> np.ndarray:
     """
     The 3D version of linear tetrahedron method: **linear tetrahedron method**.
 
@@ -245,6 +219,8 @@ def tetrahedron_3d(_freq: np.ndarray,
     :type num_k_points: List[int]
     :param _ind_pbc: Indices for the lattice direction of periodic boundary
     :type _ind_pbc: np.ndarray[int]
+    :param chunk_size: Maximum number of (tetrahedron, frequency, mode) entries evaluated at once, defaults to 2 ** 20
+    :type chunk_size: int
     :return: '(num_mode, num_dos) size' partial DOS for each phonon mode
     :rtype: np.ndarray[float]
     """
@@ -271,594 +247,374 @@ def tetrahedron_3d(_freq: np.ndarray,
     num_2nd_kpt = num_k_points[_ind_pbc[1]]
     num_3rd_kpt = num_k_points[_ind_pbc[2]]
 
-    __k01 = k_points[1 % num_2nd_kpt] - k_points[0]
-    __k02 = k_points[num_2nd_kpt] - k_points[0]
-    __k03 = k_points[num_2nd_kpt * num_3rd_kpt] - k_points[0]
+    __k01 = k_points[1 % num_3rd_kpt] - k_points[0]
+    __k02 = k_points[num_3rd_kpt % (num_2nd_kpt * num_3rd_kpt)] - k_points[0]
+    __k03 = k_points[(num_2nd_kpt * num_3rd_kpt) % len(k_points)] - k_points[0]
 
     volume_bz = 1.0 ** 3
     volume_ith = 1.0 / 6.0 * abs(np.dot(__k01, np.cross(__k02, __k03)))
 
-    for ind_x, __freq in enumerate(_freq):
-        for ind_freq in range(v_q.shape[1]):
-            _w_q = w_q[:, ind_freq]
-            _v_q = v_q[:, ind_freq, :]
-            for ind_1st_kpt in range(num_1st_kpt):
-                for ind_2nd_kpt in range(num_2nd_kpt):
-                    for ind_3rd_kpt in range(num_3rd_kpt):
-                        # tetrahedron 1: 0-1-5-7
-                        # for ind_mode in range(v_q.shape[2]):
-                        __w0 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F0 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w1 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F1 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-                        __w2 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F2 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-                        __w3 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F3 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-
-                        __w0, __w1, __w2, __w3 = np.asfarray([__w0,
-                                                              __w1,
-                                                              __w2,
-                                                              __w3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3]))]
-                        __F0, __F1, __F2, __F3 = np.asfarray([__F0,
-                                                              __F1,
-                                                              __F2,
-                                                              __F3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3])), :]
-
-                        if __w0 <= __freq < __w1:
-                            __g = 3 * (__freq - __w0) ** 2 / (__w1 - __w0) / (__w2 - __w0) / (__w3 - __w0)
-
-                            __I0 = 1.0 / 3.0 * ((__freq - __w1) / (__w0 - __w1)
-                                                + (__freq - __w2) / (__w0 - __w2)
-                                                + (__freq - __w3) / (__w0 - __w3))
-                            __I1 = 1.0 / 3.0 * (__freq - __w0) / (__w1 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w0) / (__w2 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                                         * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w1 <= __freq < __w2:
-                            __g = 3 / (__w3 - __w0) \
-                                  * ((__freq - __w1) * (__freq - __w3) / ((__w2 - __w1) * (__w1 - __w3))
-                                     + (__freq - __w0) * (__freq - __w2) / ((__w2 - __w0) * (__w1 - __w2)))
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3) \
-                                   + (__freq - __w2) / (__w0 - __w2) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I1 = 1.0 / 3.0 * (__freq - __w2) / (__w1 - __w2) \
-                                   + (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w1) / (__w2 - __w1) \
-                                   + (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0) \
-                                   + (__freq - __w1) / (__w3 - __w1) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                                         * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w2 <= __freq < __w3:
-                            __g = 3 * (__w3 - __freq) ** 2 / (__w3 - __w0) / (__w3 - __w1) / (__w3 - __w2)
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3)
-                            __I1 = 1.0 / 3.0 * (__freq - __w3) / (__w1 - __w3)
-                            __I2 = 1.0 / 3.0 * (__freq - __w3) / (__w2 - __w3)
-                            __I3 = 1.0 / 3.0 * ((__freq - __w0) / (__w3 - __w0)
-                                                + (__freq - __w1) / (__w3 - __w1)
-                                                + (__freq - __w2) / (__w3 - __w2))
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                                         * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        else:
-                            pass
-
-                        # tetrahedron 2: 0-1-3-7
-                        # for ind_mode in range(v_q.shape[2]):
-                        __w0 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F0 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w1 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F1 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-                        __w2 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F2 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-                        __w3 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F3 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-
-                        __w0, __w1, __w2, __w3 = np.asfarray([__w0,
-                                                              __w1,
-                                                              __w2,
-                                                              __w3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3]))]
-                        __F0, __F1, __F2, __F3 = np.asfarray([__F0,
-                                                              __F1,
-                                                              __F2,
-                                                              __F3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3])), :]
-
-                        if __w0 <= __freq < __w1:
-                            __g = 3 * (__freq - __w0) ** 2 / (__w1 - __w0) / (__w2 - __w0) / (__w3 - __w0)
-
-                            __I0 = 1.0 / 3.0 * ((__freq - __w1) / (__w0 - __w1)
-                                                + (__freq - __w2) / (__w0 - __w2)
-                                                + (__freq - __w3) / (__w0 - __w3))
-                            __I1 = 1.0 / 3.0 * (__freq - __w0) / (__w1 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w0) / (__w2 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w1 <= __freq < __w2:
-                            __g = 3 / (__w3 - __w0) \
-                                  * ((__freq - __w1) * (__freq - __w3) / ((__w2 - __w1) * (__w1 - __w3))
-                                     + (__freq - __w0) * (__freq - __w2) / ((__w2 - __w0) * (__w1 - __w2)))
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3) \
-                                   + (__freq - __w2) / (__w0 - __w2) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I1 = 1.0 / 3.0 * (__freq - __w2) / (__w1 - __w2) \
-                                   + (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w1) / (__w2 - __w1) \
-                                   + (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0) \
-                                   + (__freq - __w1) / (__w3 - __w1) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w2 <= __freq < __w3:
-                            __g = 3 * (__w3 - __freq) ** 2 / (__w3 - __w0) / (__w3 - __w1) / (__w3 - __w2)
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3)
-                            __I1 = 1.0 / 3.0 * (__freq - __w3) / (__w1 - __w3)
-                            __I2 = 1.0 / 3.0 * (__freq - __w3) / (__w2 - __w3)
-                            __I3 = 1.0 / 3.0 * ((__freq - __w0) / (__w3 - __w0)
-                                                + (__freq - __w1) / (__w3 - __w1)
-                                                + (__freq - __w2) / (__w3 - __w2))
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        else:
-                            pass
-
-                        # tetrahedron 3: 0-2-3-7
-                        # for ind_mode in range(v_q.shape[2]):
-                        __w0 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F0 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w1 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F1 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w2 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F2 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-                        __w3 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F3 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-
-                        __w0, __w1, __w2, __w3 = np.asfarray([__w0,
-                                                              __w1,
-                                                              __w2,
-                                                              __w3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3]))]
-                        __F0, __F1, __F2, __F3 = np.asfarray([__F0,
-                                                              __F1,
-                                                              __F2,
-                                                              __F3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3])), :]
-
-                        if __w0 <= __freq < __w1:
-                            __g = 3 * (__freq - __w0) ** 2 / (__w1 - __w0) / (__w2 - __w0) / (__w3 - __w0)
-
-                            __I0 = 1.0 / 3.0 * ((__freq - __w1) / (__w0 - __w1)
-                                                + (__freq - __w2) / (__w0 - __w2)
-                                                + (__freq - __w3) / (__w0 - __w3))
-                            __I1 = 1.0 / 3.0 * (__freq - __w0) / (__w1 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w0) / (__w2 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w1 <= __freq < __w2:
-                            __g = 3 / (__w3 - __w0) \
-                                  * ((__freq - __w1) * (__freq - __w3) / ((__w2 - __w1) * (__w1 - __w3))
-                                     + (__freq - __w0) * (__freq - __w2) / ((__w2 - __w0) * (__w1 - __w2)))
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3) \
-                                   + (__freq - __w2) / (__w0 - __w2) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I1 = 1.0 / 3.0 * (__freq - __w2) / (__w1 - __w2) \
-                                   + (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w1) / (__w2 - __w1) \
-                                   + (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0) \
-                                   + (__freq - __w1) / (__w3 - __w1) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w2 <= __freq < __w3:
-                            __g = 3 * (__w3 - __freq) ** 2 / (__w3 - __w0) / (__w3 - __w1) / (__w3 - __w2)
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3)
-                            __I1 = 1.0 / 3.0 * (__freq - __w3) / (__w1 - __w3)
-                            __I2 = 1.0 / 3.0 * (__freq - __w3) / (__w2 - __w3)
-                            __I3 = 1.0 / 3.0 * ((__freq - __w0) / (__w3 - __w0)
-                                                + (__freq - __w1) / (__w3 - __w1)
-                                                + (__freq - __w2) / (__w3 - __w2))
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        else:
-                            pass
-
-                        # tetrahedron 4: 0-4-5-7
-                        # for ind_mode in range(v_q.shape[2]):
-                        __w0 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F0 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w1 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F1 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w2 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F2 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-                        __w3 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F3 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-
-                        __w0, __w1, __w2, __w3 = np.asfarray([__w0,
-                                                              __w1,
-                                                              __w2,
-                                                              __w3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3]))]
-                        __F0, __F1, __F2, __F3 = np.asfarray([__F0,
-                                                              __F1,
-                                                              __F2,
-                                                              __F3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3])), :]
-
-                        if __w0 <= __freq < __w1:
-                            __g = 3 * (__freq - __w0) ** 2 / (__w1 - __w0) / (__w2 - __w0) / (__w3 - __w0)
-
-                            __I0 = 1.0 / 3.0 * ((__freq - __w1) / (__w0 - __w1)
-                                                + (__freq - __w2) / (__w0 - __w2)
-                                                + (__freq - __w3) / (__w0 - __w3))
-                            __I1 = 1.0 / 3.0 * (__freq - __w0) / (__w1 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w0) / (__w2 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w1 <= __freq < __w2:
-                            __g = 3 / (__w3 - __w0) \
-                                  * ((__freq - __w1) * (__freq - __w3) / ((__w2 - __w1) * (__w1 - __w3))
-                                     + (__freq - __w0) * (__freq - __w2) / ((__w2 - __w0) * (__w1 - __w2)))
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3) \
-                                   + (__freq - __w2) / (__w0 - __w2) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I1 = 1.0 / 3.0 * (__freq - __w2) / (__w1 - __w2) \
-                                   + (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w1) / (__w2 - __w1) \
-                                   + (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0) \
-                                   + (__freq - __w1) / (__w3 - __w1) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w2 <= __freq < __w3:
-                            __g = 3 * (__w3 - __freq) ** 2 / (__w3 - __w0) / (__w3 - __w1) / (__w3 - __w2)
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3)
-                            __I1 = 1.0 / 3.0 * (__freq - __w3) / (__w1 - __w3)
-                            __I2 = 1.0 / 3.0 * (__freq - __w3) / (__w2 - __w3)
-                            __I3 = 1.0 / 3.0 * ((__freq - __w0) / (__w3 - __w0)
-                                                + (__freq - __w1) / (__w3 - __w1)
-                                                + (__freq - __w2) / (__w3 - __w2))
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        else:
-                            pass
-
-                        # tetrahedron 5: 0-4-6-7
-                        # for ind_mode in range(v_q.shape[2]):
-                        __w0 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F0 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w1 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F1 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w2 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F2 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w3 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F3 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-
-                        __w0, __w1, __w2, __w3 = np.asfarray([__w0,
-                                                              __w1,
-                                                              __w2,
-                                                              __w3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3]))]
-                        __F0, __F1, __F2, __F3 = np.asfarray([__F0,
-                                                              __F1,
-                                                              __F2,
-                                                              __F3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3])), :]
-
-                        if __w0 <= __freq < __w1:
-                            __g = 3 * (__freq - __w0) ** 2 / (__w1 - __w0) / (__w2 - __w0) / (__w3 - __w0)
-
-                            __I0 = 1.0 / 3.0 * ((__freq - __w1) / (__w0 - __w1)
-                                                + (__freq - __w2) / (__w0 - __w2)
-                                                + (__freq - __w3) / (__w0 - __w3))
-                            __I1 = 1.0 / 3.0 * (__freq - __w0) / (__w1 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w0) / (__w2 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w1 <= __freq < __w2:
-                            __g = 3 / (__w3 - __w0) \
-                                  * ((__freq - __w1) * (__freq - __w3) / ((__w2 - __w1) * (__w1 - __w3))
-                                     + (__freq - __w0) * (__freq - __w2) / ((__w2 - __w0) * (__w1 - __w2)))
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3) \
-                                   + (__freq - __w2) / (__w0 - __w2) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I1 = 1.0 / 3.0 * (__freq - __w2) / (__w1 - __w2) \
-                                   + (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w1) / (__w2 - __w1) \
-                                   + (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0) \
-                                   + (__freq - __w1) / (__w3 - __w1) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w2 <= __freq < __w3:
-                            __g = 3 * (__w3 - __freq) ** 2 / (__w3 - __w0) / (__w3 - __w1) / (__w3 - __w2)
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3)
-                            __I1 = 1.0 / 3.0 * (__freq - __w3) / (__w1 - __w3)
-                            __I2 = 1.0 / 3.0 * (__freq - __w3) / (__w2 - __w3)
-                            __I3 = 1.0 / 3.0 * ((__freq - __w0) / (__w3 - __w0)
-                                                + (__freq - __w1) / (__w3 - __w1)
-                                                + (__freq - __w2) / (__w3 - __w2))
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        else:
-                            pass
-
-                        # tetrahedron 6: 0-2-6-7
-                        # for ind_mode in range(v_q.shape[2]):
-                        __w0 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ind_2nd_kpt * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F0 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ind_2nd_kpt * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w1 = _w_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F1 = abs(_v_q[ind_1st_kpt * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w2 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    ind_3rd_kpt]
-                        __F2 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        ind_3rd_kpt, :]) ** 2
-                        __w3 = _w_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                    ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                    (ind_3rd_kpt + 1) % num_3rd_kpt]
-                        __F3 = abs(_v_q[((ind_1st_kpt + 1) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt +
-                                        ((ind_2nd_kpt + 1) % num_2nd_kpt) * num_3rd_kpt +
-                                        (ind_3rd_kpt + 1) % num_3rd_kpt, :]) ** 2
-
-                        __w0, __w1, __w2, __w3 = np.asfarray([__w0,
-                                                              __w1,
-                                                              __w2,
-                                                              __w3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3]))]
-                        __F0, __F1, __F2, __F3 = np.asfarray([__F0,
-                                                              __F1,
-                                                              __F2,
-                                                              __F3])[np.argsort(np.asfarray([__w0,
-                                                                                             __w1,
-                                                                                             __w2,
-                                                                                             __w3])), :]
-
-                        if __w0 <= __freq < __w1:
-                            __g = 3 * (__freq - __w0) ** 2 / (__w1 - __w0) / (__w2 - __w0) / (__w3 - __w0)
-
-                            __I0 = 1.0 / 3.0 * ((__freq - __w1) / (__w0 - __w1)
-                                                + (__freq - __w2) / (__w0 - __w2)
-                                                + (__freq - __w3) / (__w0 - __w3))
-                            __I1 = 1.0 / 3.0 * (__freq - __w0) / (__w1 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w0) / (__w2 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w1 <= __freq < __w2:
-                            __g = 3 / (__w3 - __w0) \
-                                  * ((__freq - __w1) * (__freq - __w3) / ((__w2 - __w1) * (__w1 - __w3))
-                                     + (__freq - __w0) * (__freq - __w2) / ((__w2 - __w0) * (__w1 - __w2)))
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3) \
-                                   + (__freq - __w2) / (__w0 - __w2) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I1 = 1.0 / 3.0 * (__freq - __w2) / (__w1 - __w2) \
-                                   + (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-                            __I2 = 1.0 / 3.0 * (__freq - __w1) / (__w2 - __w1) \
-                                   + (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w0) / (__w2 - __w0) \
-                                   * (__freq - __w2) / (__w1 - __w2) / __g / (__w3 - __w0)
-                            __I3 = 1.0 / 3.0 * (__freq - __w0) / (__w3 - __w0) \
-                                   + (__freq - __w1) / (__w3 - __w1) \
-                                   * (__freq - __w3) / (__w1 - __w3) \
-                                   * (__freq - __w1) / (__w2 - __w1) / __g / (__w3 - __w0)
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        elif __w2 <= __freq < __w3:
-                            __g = 3 * (__w3 - __freq) ** 2 / (__w3 - __w0) / (__w3 - __w1) / (__w3 - __w2)
-
-                            __I0 = 1.0 / 3.0 * (__freq - __w3) / (__w0 - __w3)
-                            __I1 = 1.0 / 3.0 * (__freq - __w3) / (__w1 - __w3)
-                            __I2 = 1.0 / 3.0 * (__freq - __w3) / (__w2 - __w3)
-                            __I3 = 1.0 / 3.0 * ((__freq - __w0) / (__w3 - __w0)
-                                                + (__freq - __w1) / (__w3 - __w1)
-                                                + (__freq - __w2) / (__w3 - __w2))
-
-                            _pdos[:, ind_x] += volume_ith / volume_bz * __g \
-                                               * (__I0 * __F0 + __I1 * __F1 + __I2 * __F2 + __I3 * __F3)
-
-                        else:
-                            pass
+    # The tetrahedra are built once from the grid index, and their vertices are sorted once per band.
+    _ind_tetrahedron = _tetrahedron_index(num_1st_kpt, num_2nd_kpt, num_3rd_kpt)
+    max_pairs = max(1, chunk_size // v_q.shape[2])
+
+    for ind_freq in range(v_q.shape[1]):
+        _w, _ind_vertex = _sort_vertex(w_q[:, ind_freq][_ind_tetrahedron], _ind_tetrahedron)
+
+        for _ind_simplex, _ind_local, _ind_x in _iter_pairs(_freq, _w[:, 0], _w[:, -1], max_pairs):
+            _F = abs(v_q[_ind_vertex[_ind_simplex], ind_freq, :]) ** 2
+            __freq = _freq[_ind_x]
+            __w0, __w1, __w2, __w3 = np.transpose(_w[_ind_simplex][_ind_local])
+
+            # w0 <= freq < w1
+            _mask = __freq < __w1
+            __e, __w0_, __w1_, __w2_, __w3_ = __freq[_mask], __w0[_mask], __w1[_mask], __w2[_mask], __w3[_mask]
+            __g = 3 * (__e - __w0_) ** 2 / (__w1_ - __w0_) / (__w2_ - __w0_) / (__w3_ - __w0_)
+
+            __I0 = 1.0 / 3.0 * ((__e - __w1_) / (__w0_ - __w1_)
+                                + (__e - __w2_) / (__w0_ - __w2_)
+                                + (__e - __w3_) / (__w0_ - __w3_))
+            __I1 = 1.0 / 3.0 * (__e - __w0_) / (__w1_ - __w0_)
+            __I2 = 1.0 / 3.0 * (__e - __w0_) / (__w2_ - __w0_)
+            __I3 = 1.0 / 3.0 * (__e - __w0_) / (__w3_ - __w0_)
+
+            _add_contribution(_pdos, _ind_x[_mask], _F, _ind_local[_mask],
+                              volume_ith / volume_bz * __g * np.array([__I0, __I1, __I2, __I3]))
+
+            # w1 <= freq < w2
+            # (g * I) is evaluated directly, which is identical to the division form of I by g but stays finite for g = 0.
+            _mask = (__w1 <= __freq) & (__freq < __w2)
+            __e, __w0_, __w1_, __w2_, __w3_ = __freq[_mask], __w0[_mask], __w1[_mask], __w2[_mask], __w3[_mask]
+            __g = 3 / (__w3_ - __w0_) \
+                * ((__e - __w1_) * (__e - __w3_) / ((__w2_ - __w1_) * (__w1_ - __w3_))
+                   + (__e - __w0_) * (__e - __w2_) / ((__w2_ - __w0_) * (__w1_ - __w2_)))
+
+            __gI0 = __g / 3.0 * (__e - __w3_) / (__w0_ - __w3_) \
+                + (__e - __w2_) / (__w0_ - __w2_) \
+                * (__e - __w0_) / (__w2_ - __w0_) \
+                * (__e - __w2_) / (__w1_ - __w2_) / (__w3_ - __w0_)
+            __gI1 = __g / 3.0 * (__e - __w2_) / (__w1_ - __w2_) \
+                + (__e - __w3_) / (__w1_ - __w3_) \
+                * (__e - __w3_) / (__w1_ - __w3_) \
+                * (__e - __w1_) / (__w2_ - __w1_) / (__w3_ - __w0_)
+            __gI2 = __g / 3.0 * (__e - __w1_) / (__w2_ - __w1_) \
+                + (__e - __w0_) / (__w2_ - __w0_) \
+                * (__e - __w0_) / (__w2_ - __w0_) \
+                * (__e - __w2_) / (__w1_ - __w2_) / (__w3_ - __w0_)
+            __gI3 = __g / 3.0 * (__e - __w0_) / (__w3_ - __w0_) \
+                + (__e - __w1_) / (__w3_ - __w1_) \
+                * (__e - __w3_) / (__w1_ - __w3_) \
+                * (__e - __w1_) / (__w2_ - __w1_) / (__w3_ - __w0_)
+
+            _add_contribution(_pdos, _ind_x[_mask], _F, _ind_local[_mask],
+                              volume_ith / volume_bz * np.array([__gI0, __gI1, __gI2, __gI3]))
+
+            # w2 <= freq < w3
+            _mask = __w2 <= __freq
+            __e, __w0_, __w1_, __w2_, __w3_ = __freq[_mask], __w0[_mask], __w1[_mask], __w2[_mask], __w3[_mask]
+            __g = 3 * (__w3_ - __e) ** 2 / (__w3_ - __w0_) / (__w3_ - __w1_) / (__w3_ - __w2_)
+
+            __I0 = 1.0 / 3.0 * (__e - __w3_) / (__w0_ - __w3_)
+            __I1 = 1.0 / 3.0 * (__e - __w3_) / (__w1_ - __w3_)
+            __I2 = 1.0 / 3.0 * (__e - __w3_) / (__w2_ - __w3_)
+            __I3 = 1.0 / 3.0 * ((__e - __w0_) / (__w3_ - __w0_)
+                                + (__e - __w1_) / (__w3_ - __w1_)
+                                + (__e - __w2_) / (__w3_ - __w2_))
+
+            _add_contribution(_pdos, _ind_x[_mask], _F, _ind_local[_mask],
+                              volume_ith / volume_bz * __g * np.array([__I0, __I1, __I2, __I3]))
 
     return _pdos
+
+
+def tetrahedron_parallel(tetrahedron: Callable,
+                         _freq: np.ndarray,
+                         _pdos: np.ndarray,
+                         k_points: List[np.ndarray],
+                         w_q: np.ndarray,
+                         v_q: np.ndarray,
+                         num_k_points: List[int],
+                         _ind_pbc: np.ndarray,
+                         num_process: int = None,
+                         **kwargs) -> np.ndarray:
+    """
+    Band-decomposed parallel execution of linear tetrahedron method.
+    Each phonon branch contributes to the partial DOS independently,
+    so that the branches are distributed over a pool of processes which accumulate their own partial DOS.
+    The eigen-frequency and the magnitude of eigen-mode are placed in shared memory once,
+    and the partial DOSs of all processes are summed at the end.
+
+    :param tetrahedron: One of tetrahedron_1d, tetrahedron_2d, and tetrahedron_3d
+    :type tetrahedron: Callable
+    :param _freq: '(num_dos,) size' frequencies where DOS will be evaluated
+    :type _freq: np.ndarray[float]
+    :param _pdos: '(num_mode, num_dos) size' partial DOS for each phonon mode
+    :type _pdos: np.ndarray[float]
+    :param k_points: List of '(3,) size' k-point
+    :type k_points: List[np.ndarray]
+    :param w_q: '(num_k_points, num_mode) size' eigen-frequency
+    :type w_q: np.ndarray[float]
+    :param v_q: '(num_k_points, num_mode, num_mode) size' eigen-mode
+    :type v_q: np.ndarray[float]
+    :param num_k_points: '(3,) size' list for the number of automatic grid
+    :type num_k_points: List[int]
+    :param _ind_pbc: Indices for the lattice direction of periodic boundary
+    :type _ind_pbc: np.ndarray[int]
+    :param num_process: The number of processes (if None: the number of CPUs), defaults to None
+    :type num_process: int
+    :param kwargs: Keyword arguments passed to tetrahedron, e.g., chunk_size
+    :return: '(num_mode, num_dos) size' partial DOS for each phonon mode
+    :rtype: np.ndarray[float]
+    """
+    if num_process is None:
+        num_process = os.cpu_count() or 1
+    num_process = min(num_process, v_q.shape[1])
+
+    if num_process <= 1:
+        return tetrahedron(_freq, _pdos, k_points, w_q, v_q, num_k_points, _ind_pbc, **kwargs)
+
+    # multiprocessing.shared_memory is available from Python 3.8, so that it is imported only in parallel execution.
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        print("\nCaution: Parallel execution of tetrahedron method requires Python 3.8 or later, so that it runs in a single process.")
+        return tetrahedron(_freq, _pdos, k_points, w_q, v_q, num_k_points, _ind_pbc, **kwargs)
+
+    # Only |v_q| ** 2 enters the integration, so that the real-valued |v_q| is shared instead of complex v_q.
+    _shared = []
+    try:
+        for _array in (np.asarray(w_q, dtype=float), abs(v_q)):
+            __shm = shared_memory.SharedMemory(create=True, size=max(1, _array.nbytes))
+            np.ndarray(_array.shape, dtype=float, buffer=__shm.buf)[...] = _array
+            _shared.append((__shm, _array.shape))
+
+        # Several band blocks per process balance the load among the processes.
+        _band_block = [(int(__block[0]), int(__block[-1]) + 1)
+                       for __block in np.array_split(np.arange(v_q.shape[1]), 4 * num_process) if __block.shape[0] > 0]
+
+        with Pool(num_process, initializer=_init_band_worker,
+                  initargs=(tetrahedron, _freq, k_points, num_k_points, _ind_pbc, kwargs,
+                            [(__shm.name, __shape) for __shm, __shape in _shared])) as pool:
+            for __pdos in pool.imap(_band_worker, _band_block):
+                _pdos += __pdos
+
+    finally:
+        for __shm, _ in _shared:
+            __shm.close()
+            __shm.unlink()
+
+    return _pdos
+
+
+_band_worker_state = {}
+
+
+def _init_band_worker(tetrahedron: Callable,
+                      _freq: np.ndarray,
+                      k_points: List[np.ndarray],
+                      num_k_points: List[int],
+                      _ind_pbc: np.ndarray,
+                      kwargs: dict,
+                      _shared: list) -> None:
+    """
+    Attach the shared eigen-frequency and magnitude of eigen-mode in a worker process of :func:`tetrahedron_parallel`.
+    """
+    from multiprocessing import shared_memory
+
+    _shm = [shared_memory.SharedMemory(name=name) for name, _ in _shared]
+    _band_worker_state.update(tetrahedron=tetrahedron, _freq=_freq, k_points=k_points,
+                              num_k_points=num_k_points, _ind_pbc=_ind_pbc, kwargs=kwargs, _shm=_shm,
+                              w_q=np.ndarray(_shared[0][1], dtype=float, buffer=_shm[0].buf),
+                              abs_v_q=np.ndarray(_shared[1][1], dtype=float, buffer=_shm[1].buf))
+
+
+def _band_worker(_band_block: tuple) -> np.ndarray:
+    """
+    Partial DOS contributed by the phonon branches in [start, end) of _band_block in a worker process.
+    """
+    start, end = _band_block
+    _state = _band_worker_state
+    return _state['tetrahedron'](_state['_freq'],
+                                 np.zeros((_state['abs_v_q'].shape[2], _state['_freq'].shape[0])),
+                                 _state['k_points'],
+                                 _state['w_q'][:, start:end],
+                                 _state['abs_v_q'][:, start:end, :],
+                                 _state['num_k_points'],
+                                 _state['_ind_pbc'],
+                                 **_state['kwargs'])
+
+
+def _segment_index(num_1st_kpt: int) -> np.ndarray:
+    """
+    Vertex indices of the lines segmenting the 1D k-points grid.
+
+    :param num_1st_kpt: The number of k-points along the periodic direction
+    :type num_1st_kpt: int
+    :return: '(num_1st_kpt, 2) size' k-point indices of line vertices
+    :rtype: np.ndarray[int]
+    """
+    _ind_1st = np.arange(num_1st_kpt)
+    return np.stack([_ind_1st, (_ind_1st + 1) % num_1st_kpt], axis=1)
+
+
+def _triangle_index(num_1st_kpt: int,
+                    num_2nd_kpt: int) -> np.ndarray:
+    """
+    Vertex indices of the triangles segmenting the 2D k-points grid.
+    The k-point at (ind_1st_kpt, ind_2nd_kpt) of the grid is stored at (ind_1st_kpt * num_2nd_kpt + ind_2nd_kpt).
+
+    :param num_1st_kpt: The number of k-points along the 1st periodic direction
+    :type num_1st_kpt: int
+    :param num_2nd_kpt: The number of k-points along the 2nd periodic direction
+    :type num_2nd_kpt: int
+    :return: '(2 * num_1st_kpt * num_2nd_kpt, 3) size' k-point indices of triangle vertices
+    :rtype: np.ndarray[int]
+    """
+    _ind_1st, _ind_2nd = np.meshgrid(np.arange(num_1st_kpt), np.arange(num_2nd_kpt), indexing='ij')
+    _ind_1st, _ind_2nd = _ind_1st.reshape(-1), _ind_2nd.reshape(-1)
+
+    # corner = 2 * (shift along 1st) + (shift along 2nd)
+    _corner = [((_ind_1st + (c // 2)) % num_1st_kpt) * num_2nd_kpt
+               + (_ind_2nd + (c % 2)) % num_2nd_kpt for c in range(4)]
+
+    # triangle 1: 0-1-3, triangle 2: 0-2-3
+    return np.concatenate([np.stack([_corner[v] for v in triangle], axis=1)
+                           for triangle in ((0, 1, 3), (0, 2, 3))], axis=0)
+
+
+def _tetrahedron_index(num_1st_kpt: int,
+                       num_2nd_kpt: int,
+                       num_3rd_kpt: int) -> np.ndarray:
+    """
+    Vertex indices of the tetrahedra segmenting the 3D k-points grid.
+    The k-point at (ind_1st_kpt, ind_2nd_kpt, ind_3rd_kpt) of the grid is stored at
+    (ind_1st_kpt * num_2nd_kpt * num_3rd_kpt + ind_2nd_kpt * num_3rd_kpt + ind_3rd_kpt).
+
+    :param num_1st_kpt: The number of k-points along the 1st periodic direction
+    :type num_1st_kpt: int
+    :param num_2nd_kpt: The number of k-points along the 2nd periodic direction
+    :type num_2nd_kpt: int
+    :param num_3rd_kpt: The number of k-points along the 3rd periodic direction
+    :type num_3rd_kpt: int
+    :return: '(6 * num_1st_kpt * num_2nd_kpt * num_3rd_kpt, 4) size' k-point indices of tetrahedron vertices
+    :rtype: np.ndarray[int]
+    """
+    _ind_1st, _ind_2nd, _ind_3rd = np.meshgrid(np.arange(num_1st_kpt), np.arange(num_2nd_kpt),
+                                               np.arange(num_3rd_kpt), indexing='ij')
+    _ind_1st, _ind_2nd, _ind_3rd = _ind_1st.reshape(-1), _ind_2nd.reshape(-1), _ind_3rd.reshape(-1)
+
+    # corner = 4 * (shift along 1st) + 2 * (shift along 2nd) + (shift along 3rd)
+    _corner = [((_ind_1st + (c // 4)) % num_1st_kpt) * num_2nd_kpt * num_3rd_kpt
+               + ((_ind_2nd + (c // 2) % 2) % num_2nd_kpt) * num_3rd_kpt
+               + (_ind_3rd + (c % 2)) % num_3rd_kpt for c in range(8)]
+
+    return np.concatenate([np.stack([_corner[v] for v in tetrahedron], axis=1)
+                           for tetrahedron in ((0, 1, 5, 7), (0, 1, 3, 7), (0, 2, 3, 7),
+                                               (0, 4, 5, 7), (0, 4, 6, 7), (0, 2, 6, 7))], axis=0)
+
+
+def _sort_vertex(_w: np.ndarray,
+                 _ind_vertex: np.ndarray) -> tuple:
+    """
+    Sort the vertices of each simplex in ascending order of eigen-frequency.
+
+    :param _w: '(num_simplex, num_vertex) size' eigen-frequency at vertices
+    :type _w: np.ndarray[float]
+    :param _ind_vertex: '(num_simplex, num_vertex) size' k-point indices of vertices
+    :type _ind_vertex: np.ndarray[int]
+    :return: A set of sorted _w and _ind_vertex
+    :rtype: tuple
+    """
+    _order = np.argsort(_w, axis=1, kind='stable')
+    return np.take_along_axis(_w, _order, axis=1), np.take_along_axis(_ind_vertex, _order, axis=1)
+
+
+def _iter_pairs(_freq: np.ndarray,
+                w_min: np.ndarray,
+                w_max: np.ndarray,
+                max_pairs: int):
+    """
+    Generate the (simplex, frequency) index pairs with w_min <= _freq < w_max,
+    in chunks of at most max_pairs pairs (at least one simplex per chunk).
+
+    :param _freq: '(num_dos,) size' ascending frequencies where DOS will be evaluated
+    :type _freq: np.ndarray[float]
+    :param w_min: '(num_simplex,) size' minimum eigen-frequency of each simplex
+    :type w_min: np.ndarray[float]
+    :param w_max: '(num_simplex,) size' maximum eigen-frequency of each simplex
+    :type w_max: np.ndarray[float]
+    :param max_pairs: Maximum number of pairs in a chunk
+    :type max_pairs: int
+    :return: Generator of the simplex indices in a chunk, their local index for each pair, and frequency index for each pair
+    :rtype: generator
+    """
+    _lower = np.searchsorted(_freq, w_min, side='left')
+    _upper = np.searchsorted(_freq, w_max, side='left')
+
+    # Simplices which do not cover any frequency point are skipped.
+    _active = np.nonzero(_upper > _lower)[0]
+    _lower = _lower[_active]
+    _count = _upper[_active] - _lower
+    _cumulative = np.concatenate([[0], np.cumsum(_count)])
+
+    start = 0
+    while start < _active.shape[0]:
+        end = np.searchsorted(_cumulative, _cumulative[start] + max_pairs, side='right') - 1
+        end = max(end, start + 1)
+
+        __count = _count[start:end]
+        _ind_local = np.repeat(np.arange(end - start), __count)
+        _ind_x = np.arange(_ind_local.shape[0]) \
+            - np.repeat(_cumulative[start:end] - _cumulative[start], __count) \
+            + np.repeat(_lower[start:end], __count)
+        yield _active[start:end], _ind_local, _ind_x
+
+        start = end
+
+
+def _add_contribution(_pdos: np.ndarray,
+                      _ind_x: np.ndarray,
+                      _F: np.ndarray,
+                      _ind_local: np.ndarray,
+                      _coefficient: np.ndarray) -> None:
+    """
+    Accumulate sum_i coefficient_i * F_i of each (simplex, frequency) pair into _pdos.
+
+    :param _pdos: '(num_mode, num_dos) size' partial DOS for each phonon mode
+    :type _pdos: np.ndarray[float]
+    :param _ind_x: '(num_pair,) size' frequency index of each pair
+    :type _ind_x: np.ndarray[int]
+    :param _F: '(num_simplex, num_vertex, num_mode) size' projection weight at sorted vertices
+    :type _F: np.ndarray[float]
+    :param _ind_local: '(num_pair,) size' index of the simplex in _F for each pair
+    :type _ind_local: np.ndarray[int]
+    :param _coefficient: '(num_vertex, num_pair) size' integration weight of each vertex
+    :type _coefficient: np.ndarray[float]
+    """
+    if _ind_x.shape[0] == 0:
+        return
+
+    _add_columns(_pdos, _ind_x, np.einsum('vp,pvm->pm', _coefficient, _F[_ind_local]))
+
+
+def _add_columns(_pdos: np.ndarray,
+                 _ind_x: np.ndarray,
+                 _weight: np.ndarray) -> None:
+    """
+    Accumulate the weight of each pair into the column of _pdos at its frequency index (repeated indices are summed).
+
+    :param _pdos: '(num_mode, num_dos) size' partial DOS for each phonon mode
+    :type _pdos: np.ndarray[float]
+    :param _ind_x: '(num_pair,) size' frequency index of each pair
+    :type _ind_x: np.ndarray[int]
+    :param _weight: '(num_pair, num_mode) size' weight of each pair
+    :type _weight: np.ndarray[float]
+    """
+    if _ind_x.shape[0] == 0:
+        return
+
+    _order = np.argsort(_ind_x, kind='stable')
+    _sorted_x = _ind_x[_order]
+    _start = np.nonzero(np.concatenate([[True], _sorted_x[1:] != _sorted_x[:-1]]))[0]
+
+    _pdos[:, _sorted_x[_start]] += np.add.reduceat(_weight[_order], _start, axis=0).T
@@ -0,0 +1,143 @@
+"""
+Rendering helpers shared by the plot methods of analysis classes.
+
+Figures are saved to the given path, and shown only when the backend of matplotlib is interactive,
+so that batch jobs without display neither hang on plt.show() nor keep the figures in memory.
+"""
+import os
+import sys
+from multiprocessing import Pool
+from typing import List
+
+import numpy as np
+
+_NON_INTERACTIVE = ('agg', 'cairo', 'pdf', 'pgf', 'ps', 'svg', 'template')
+
+
+def headless() -> bool:
+    """
+    Whether the process runs without display (e.g., batch job on cluster).
+
+    :return: True if no display is available
+    :rtype: bool
+    """
+    if sys.platform.startswith('win') or sys.platform == 'darwin':
+        return False
+    return not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def set_batch_backend(force: bool = False) -> None:
+    """
+    Select the non-interactive backend (Agg) of matplotlib in batch mode.
+    The backend explicitly designated by MPLBACKEND environment variable is kept unless force is True.
+
+    :param force: Select the backend irrespective of display and environment variable, defaults to False
+    :type force: bool
+    """
+    import matplotlib
+
+    if force or (headless() and not os.environ.get('MPLBACKEND')):
+        matplotlib.use('Agg')
+
+
+def is_interactive() -> bool:
+    """
+    Whether the current backend of matplotlib can show figures on display.
+
+    :return: True if the backend is interactive
+    :rtype: bool
+    """
+    import matplotlib
+
+    return matplotlib.get_backend().lower() not in _NON_INTERACTIVE
+
+
+def branch_collection(x: np.ndarray,
+                      y: np.ndarray,
+                      array: np.ndarray = None,
+                      **kwargs):
+    """
+    Build a single LineCollection artist for a set of branches sharing the x-axis.
+    Without array, each branch is a polyline of uniform color.
+    With array, each branch is split into segments, which are colored by the value at the starting point of segment.
+
+    :param x: '(num_point,) size' x-coordinates
+    :type x: np.ndarray[float]
+    :param y: '(num_point, num_branch) size' y-coordinates of branches
+    :type y: np.ndarray[float]
+    :param array: '(num_point, num_branch) size' values mapped to colors, defaults to None
+    :type array: np.ndarray[float]
+    :return: LineCollection of all branches
+    :rtype: matplotlib.collections.LineCollection
+    """
+    from matplotlib.collections import LineCollection
+
+    _x = np.broadcast_to(np.asarray(x, dtype=float)[:, np.newaxis], y.shape)
+    points = np.stack((_x, y), axis=-1).transpose((1, 0, 2))  # (num_branch, num_point, 2)
+
+    if array is None:
+        return LineCollection(points, **kwargs)
+
+    segments = np.stack((points[:, :-1], points[:, 1:]), axis=2).reshape((-1, 2, 2))
+    lc = LineCollection(segments, **kwargs)
+    lc.set_array(np.asarray(array)[:-1].T.reshape(-1))
+    return lc
+
+
+def save_figure(fig,
+                out_file: str,
+                show: bool = True) -> None:
+    """
+    Save the figure (the format is given by the extension of out_file), and show it on interactive backend.
+    The figure is closed after saving, unless it is shown.
+
+    :param fig: Figure to be saved
+    :type fig: matplotlib.figure.Figure
+    :param out_file: Path of the figure file
+    :type out_file: str
+    :param show: Show the figure on interactive backend (True) or not (False), defaults to `True`
+    :type show: bool
+    """
+    from matplotlib import pyplot as plt
+
+    fig.savefig(out_file, dpi=300, bbox_inches='tight')
+    if show and is_interactive():
+        plt.show()
+    else:
+        plt.close(fig)
+
+
+def _render_worker(_job: tuple) -> str:
+    """
+    Render a figure in a worker with the non-interactive backend.
+
+    :param _job: A set of (plot method, keyword arguments)
+    :type _job: tuple
+    :return: Path of the figure file
+    :rtype: str
+    """
+    set_batch_backend(force=True)
+    plot_method, kwargs = _job
+    plot_method(**dict(kwargs, show=False))
+    return kwargs.get('out_file')
+
+
+def render_parallel(jobs: List[tuple],
+                    num_process: int = None) -> List[str]:
+    """
+    Render the figures of many systems in parallel worker processes.
+    Each job is a set of (plot method, keyword arguments), e.g., (band.plot, {'out_file': 'system_1/band.png'}),
+    where the plot method should be picklable (the bound method of analysis instance).
+
+    :param jobs: List of (plot method, keyword arguments)
+    :type jobs: List[tuple]
+    :param num_process: The number of worker processes, defaults to None (the number of CPUs)
+    :type num_process: int
+    :return: Paths of the figure files
+    :rtype: List[str]
+    """
+    if num_process is not None and num_process <= 1:
+        return [_render_worker(_job) for _job in jobs]
+
+    with Pool(processes=num_process) as pool:
+        return pool.map(_render_worker, jobs)
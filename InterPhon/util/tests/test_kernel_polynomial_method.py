@@ -0,0 +1,48 @@
+import numpy as np
+import unittest
+
+from InterPhon.util import spectral_bound, chebyshev_moment, jackson_kernel, kpm_density
+
+
+class TestKernelPolynomialMethod(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        _matrix = rng.normal(size=(8, 8)) + 1j * rng.normal(size=(8, 8))
+        self.matrix = _matrix + _matrix.conj().T
+
+    def test_spectral_bound(self):
+        _eig = np.linalg.eigvalsh(self.matrix)
+        lower, upper = spectral_bound(self.matrix)
+
+        self.assertTrue(lower <= _eig.min() and _eig.max() <= upper)
+
+    def test_chebyshev_moment(self):
+        bound = spectral_bound(self.matrix)
+        _moment = chebyshev_moment(self.matrix, bound, num_moment=6, num_vector=4096, rng=np.random.default_rng(0))
+
+        # Exact diagonal of T_m(H) by the recursion of the rescaled matrix itself.
+        _a = (bound[1] - bound[0]) / (2 - 0.01)
+        _h = (self.matrix - (bound[1] + bound[0]) / 2 * np.eye(8)) / _a
+        _chebyshev = [np.eye(8), _h]
+        for _ in range(4):
+            _chebyshev.append(2 * np.dot(_h, _chebyshev[-1]) - _chebyshev[-2])
+        _exact = np.array([chebyshev.diagonal().real for chebyshev in _chebyshev])
+
+        self.assertTrue(np.allclose(_moment, _exact, atol=0.1))
+
+    def test_kpm_density(self):
+        self.assertAlmostEqual(jackson_kernel(100)[0], 1.0)
+
+        bound = spectral_bound(self.matrix)
+        _moment = chebyshev_moment(self.matrix, bound, num_moment=200, num_vector=1024, rng=np.random.default_rng(0))
+        _eig = np.linspace(bound[0], bound[1], 4001)
+        _density = kpm_density(_moment, _eig, bound)
+
+        # Each diagonal component holds one state, and the mean eigenvalue is the mean of diagonal.
+        _step = _eig[1] - _eig[0]
+        self.assertTrue(np.allclose(_density.sum(axis=1) * _step, 1.0, atol=1e-02))
+        self.assertAlmostEqual(np.dot(_density.sum(axis=0), _eig) * _step / 8, np.trace(self.matrix).real / 8, delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import sys
+import itertools
+import multiprocessing
+import numpy as np
+import unittest
+from unittest import mock
+
+from InterPhon.util import tetrahedron_1d, tetrahedron_2d, tetrahedron_3d, tetrahedron_parallel
+
+
+def random_phonon(num_k_points, num_mode, seed=0):
+    rng = np.random.RandomState(seed)
+    w_q = np.sort(rng.uniform(1.0, 5.0, (num_k_points, num_mode)), axis=1)
+    v_q = np.empty((num_k_points, num_mode, num_mode), dtype=complex)
+    for ind_k in range(num_k_points):
+        v_q[ind_k], _ = np.linalg.qr(rng.normal(size=(num_mode, num_mode))
+                                     + 1j * rng.normal(size=(num_mode, num_mode)))
+    return w_q, v_q
+
+
+# Edges of each simplex (of vertices sorted by frequency) cut by the iso-frequency point, segment or polygon,
+# in cyclic order, when the frequency is between the i-th and (i + 1)-th vertex frequencies.
+ISO_EDGES = {1: [[(0, 1)]],
+             2: [[(0, 1), (0, 2)], [(0, 2), (1, 2)]],
+             3: [[(0, 1), (0, 2), (0, 3)], [(0, 2), (0, 3), (1, 3), (1, 2)], [(0, 3), (1, 3), (2, 3)]]}
+
+
+def simplex_grid(num_k_points, _ind_pbc, simplices):
+    # Fractional coordinates along the periodic directions and k-point indices of the vertices of each simplex,
+    # where the simplices are given by the corners, 2 ** (dim - 1) * (shift along 1st) + ... + (shift along last).
+    _num = np.array([num_k_points[_ind] for _ind in _ind_pbc])
+    _corner = np.array(list(itertools.product(range(2), repeat=_num.shape[0])))
+    _position, _index = [], []
+    for _origin in itertools.product(*[range(_n) for _n in _num]):
+        for simplex in simplices:
+            _grid = np.array(_origin) + _corner[list(simplex)]
+            _position.append(_grid / _num)
+            _index.append(np.ravel_multi_index(tuple((_grid % _num).T), _num))
+    return np.array(_position), np.array(_index)
+
+
+def iso_surface_pdos(_freq, w_q, v_q, position, index):
+    # Reference partial DOS by direct integration of the linearly interpolated |v_q| ** 2 over the iso-frequency
+    # point (1D), segment (2D) or polygon (3D) in each simplex, divided by |grad w| of the simplex.
+    _pdos = np.zeros((v_q.shape[2], _freq.shape[0]))
+    dim = position.shape[2]
+    for _position, _index in zip(position, index):
+        for _band in range(w_q.shape[1]):
+            _order = np.argsort(w_q[_index, _band])
+            _w, _P = w_q[_index[_order], _band], _position[_order]
+            _F = abs(v_q[_index[_order], _band, :]) ** 2
+            _grad = np.linalg.norm(np.linalg.solve(_P[1:] - _P[0], _w[1:] - _w[0]))
+
+            for _piece, _edges in enumerate(ISO_EDGES[dim]):
+                ind_x = np.nonzero((_w[_piece] < _freq) & (_freq < _w[_piece + 1]))[0]
+                _t = [((_freq[ind_x] - _w[i]) / (_w[j] - _w[i]))[:, np.newaxis] for i, j in _edges]
+                _point = [_P[i] + t * (_P[j] - _P[i]) for (i, j), t in zip(_edges, _t)]
+                _weight = [_F[i] + t * (_F[j] - _F[i]) for (i, j), t in zip(_edges, _t)]
+
+                if dim == 1:
+                    _integral = _weight[0]
+                elif dim == 2:
+                    _integral = np.linalg.norm(_point[1] - _point[0], axis=1)[:, np.newaxis] * (_weight[0] + _weight[1]) / 2
+                else:
+                    _integral = sum(np.linalg.norm(np.cross(_point[k] - _point[0], _point[k + 1] - _point[0]), axis=1)[:, np.newaxis] / 2
+                                    * (_weight[0] + _weight[k] + _weight[k + 1]) / 3 for k in range(1, len(_edges) - 1))
+                _pdos[:, ind_x] += np.transpose(_integral) / _grad
+    return _pdos
+
+
+class TestLinearTetrahedronMethod(unittest.TestCase):
+    def test_tetrahedron_1d(self):
+        num_k_points = [1, 7, 1]
+        num_mode = 3
+        _ind_pbc = np.array([1])
+        k_points = [np.array([0.0, j / num_k_points[1], 0.0]) for j in range(num_k_points[1])]
+        w_q, v_q = random_phonon(len(k_points), num_mode)
+
+        _freq = np.linspace(0.0, 6.0, 6001)
+        _pdos = tetrahedron_1d(_freq, np.zeros((num_mode, _freq.shape[0])),
+                               k_points, w_q, v_q, num_k_points, _ind_pbc)
+
+        # Each band holds one state per unit length of Brillouin zone.
+        self.assertAlmostEqual(np.trapz(_pdos.sum(axis=0), _freq), num_mode, delta=1e-02)
+        self.assertTrue(np.all(_pdos >= -1e-12))
+
+        # Each component of partial DOS is weighted by its own projection of eigen-mode.
+        position, index = simplex_grid(num_k_points, _ind_pbc, ((0, 1),))
+        self.assertTrue(np.allclose(_pdos, iso_surface_pdos(_freq, w_q, v_q, position, index), rtol=1e-10, atol=1e-10))
+
+    def test_tetrahedron_2d(self):
+        num_k_points = [6, 5, 1]
+        num_mode = 3
+        _ind_pbc = np.array([0, 1])
+        k_points = [np.array([i / num_k_points[0], j / num_k_points[1], 0.0])
+                    for i in range(num_k_points[0]) for j in range(num_k_points[1])]
+        w_q, v_q = random_phonon(len(k_points), num_mode)
+
+        _freq = np.linspace(0.0, 6.0, 6001)
+        _pdos = tetrahedron_2d(_freq, np.zeros((num_mode, _freq.shape[0])),
+                               k_points, w_q, v_q, num_k_points, _ind_pbc)
+
+        # Each band holds one state per unit area of Brillouin zone.
+        self.assertAlmostEqual(np.trapz(_pdos.sum(axis=0), _freq), num_mode, delta=1e-02)
+        self.assertTrue(np.all(_pdos >= 0.0))
+
+        # Each component of partial DOS is weighted by its own projection of eigen-mode.
+        position, index = simplex_grid(num_k_points, _ind_pbc, ((0, 1, 3), (0, 2, 3)))
+        self.assertTrue(np.allclose(_pdos, iso_surface_pdos(_freq, w_q, v_q, position, index), rtol=1e-10, atol=1e-10))
+
+        _pdos_chunk = tetrahedron_2d(_freq, np.zeros((num_mode, _freq.shape[0])),
+                                     k_points, w_q, v_q, num_k_points, _ind_pbc, chunk_size=30)
+        self.assertTrue(np.allclose(_pdos, _pdos_chunk))
+
+    def test_tetrahedron_3d(self):
+        num_k_points = [3, 4, 5]
+        num_mode = 3
+        _ind_pbc = np.array([0, 1, 2])
+        k_points = [np.array([i / num_k_points[0], j / num_k_points[1], k / num_k_points[2]])
+                    for i in range(num_k_points[0]) for j in range(num_k_points[1]) for k in range(num_k_points[2])]
+        w_q, v_q = random_phonon(len(k_points), num_mode)
+
+        _freq = np.linspace(0.0, 6.0, 6001)
+        _pdos = tetrahedron_3d(_freq, np.zeros((num_mode, _freq.shape[0])),
+                               k_points, w_q, v_q, num_k_points, _ind_pbc)
+
+        # Each band holds one state per unit volume of Brillouin zone.
+        self.assertAlmostEqual(np.trapz(_pdos.sum(axis=0), _freq), num_mode, delta=1e-02)
+        self.assertTrue(np.all(_pdos >= -1e-12))
+
+        # Each component of partial DOS is weighted by its own projection of eigen-mode.
+        position, index = simplex_grid(num_k_points, _ind_pbc, ((0, 1, 5, 7), (0, 1, 3, 7), (0, 2, 3, 7),
+                                                                (0, 4, 5, 7), (0, 4, 6, 7), (0, 2, 6, 7)))
+        self.assertTrue(np.allclose(_pdos, iso_surface_pdos(_freq, w_q, v_q, position, index), rtol=1e-10, atol=1e-10))
+
+        _pdos_chunk = tetrahedron_3d(_freq, np.zeros((num_mode, _freq.shape[0])),
+                                     k_points, w_q, v_q, num_k_points, _ind_pbc, chunk_size=30)
+        self.assertTrue(np.allclose(_pdos, _pdos_chunk))
+
+    def test_tetrahedron_parallel(self):
+        num_k_points = [6, 5, 1]
+        num_mode = 3
+        _ind_pbc = np.array([0, 1])
+        k_points = [np.array([i / num_k_points[0], j / num_k_points[1], 0.0])
+                    for i in range(num_k_points[0]) for j in range(num_k_points[1])]
+        w_q, v_q = random_phonon(len(k_points), num_mode)
+
+        _freq = np.linspace(0.0, 6.0, 601)
+        _pdos = tetrahedron_2d(_freq, np.zeros((num_mode, _freq.shape[0])),
+                               k_points, w_q, v_q, num_k_points, _ind_pbc)
+        _pdos_parallel = tetrahedron_parallel(tetrahedron_2d, _freq, np.zeros((num_mode, _freq.shape[0])),
+                                              k_points, w_q, v_q, num_k_points, _ind_pbc, num_process=2)
+        self.assertTrue(np.allclose(_pdos, _pdos_parallel))
+
+    def test_tetrahedron_parallel_without_shared_memory(self):
+        num_k_points = [6, 5, 1]
+        num_mode = 3
+        _ind_pbc = np.array([0, 1])
+        k_points = [np.array([i / num_k_points[0], j / num_k_points[1], 0.0])
+                    for i in range(num_k_points[0]) for j in range(num_k_points[1])]
+        w_q, v_q = random_phonon(len(k_points), num_mode)
+
+        _freq = np.linspace(0.0, 6.0, 601)
+        _pdos = tetrahedron_2d(_freq, np.zeros((num_mode, _freq.shape[0])),
+                               k_points, w_q, v_q, num_k_points, _ind_pbc)
+
+        # Python earlier than 3.8 has no multiprocessing.shared_memory, where the method runs in a single process.
+        _shared_memory = sys.modules.get('multiprocessing.shared_memory')
+        try:
+            if hasattr(multiprocessing, 'shared_memory'):
+                delattr(multiprocessing, 'shared_memory')
+            with mock.patch.dict(sys.modules, {'multiprocessing.shared_memory': None}):
+                _pdos_serial = tetrahedron_parallel(tetrahedron_2d, _freq, np.zeros((num_mode, _freq.shape[0])),
+                                                    k_points, w_q, v_q, num_k_points, _ind_pbc, num_process=2)
+        finally:
+            if _shared_memory is not None:
+                multiprocessing.shared_memory = _shared_memory
+        self.assertTrue(np.allclose(_pdos, _pdos_serial))
+
+
+if __name__ == "__main__":
+    unittest.main()
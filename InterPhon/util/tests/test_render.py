@@ -0,0 +1,63 @@
+import os
+import tempfile
+import numpy as np
+import unittest
+from types import SimpleNamespace
+
+from InterPhon.analysis import Band
+from InterPhon.util import set_batch_backend, branch_collection, save_figure, render_parallel
+
+
+class TestRender(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        set_batch_backend(force=True)
+
+        rng = np.random.RandomState(0)
+        k_points = [np.array([ratio, 0.0, 0.0]) for ratio in np.linspace(0, 0.5, 11)]
+        cls.process = SimpleNamespace(k_points=k_points,
+                                      w_q=np.sort(rng.uniform(0.0, 8.0, (len(k_points), 6)), axis=1),
+                                      v_q=rng.normal(size=(len(k_points), 6, 6)) + 1j * rng.normal(size=(len(k_points), 6, 6)),
+                                      reciprocal_matrix=np.eye(3),
+                                      unit_cell=SimpleNamespace(xyz_true=[0, 0, 0, 1, 1, 1]),
+                                      user_arg=SimpleNamespace(periodicity=np.array([1, 1, 0])),
+                                      num_figure=0)
+
+    def test_branch_collection(self):
+        _x = np.linspace(0, 1, 11)
+        _y = np.arange(33, dtype=float).reshape((11, 3))
+
+        lc = branch_collection(_x, _y)
+        self.assertEqual(len(lc.get_segments()), 3)
+        self.assertTrue(np.allclose(lc.get_segments()[1], np.array([_x, _y[:, 1]]).T))
+
+        lc = branch_collection(_x, _y, array=_y)
+        self.assertEqual(len(lc.get_segments()), 3 * 10)
+        self.assertTrue(np.allclose(lc.get_segments()[10], [[_x[0], _y[0, 1]], [_x[1], _y[1, 1]]]))
+        self.assertTrue(np.allclose(lc.get_array()[10:20], _y[:-1, 1]))
+
+    def test_save_figure(self):
+        from matplotlib import pyplot as plt
+
+        fig = plt.figure()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_file = os.path.join(tmp_dir, 'figure.pdf')
+            save_figure(fig, out_file)
+            self.assertTrue(os.path.isfile(out_file))
+        self.assertFalse(plt.fignum_exists(fig.number))
+
+    def test_render_parallel(self):
+        band = Band(self.process)
+        band.set()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jobs = [(band.plot, {'k_labels': ['G', 'X'], 'option': option, 'atoms': [0],
+                                 'out_file': os.path.join(tmp_dir, 'band_{0}.png'.format(option))})
+                    for option in ('plain', 'projection')]
+            out_files = render_parallel(jobs, num_process=2)
+            self.assertListEqual(out_files, [_job[1]['out_file'] for _job in jobs])
+            self.assertTrue(all(os.path.isfile(out_file) for out_file in out_files))
+
+
+if __name__ == "__main__":
+    unittest.main()